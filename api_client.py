@@ -0,0 +1,102 @@
+"""
+Shared HTTP client for the backend test harnesses
+Keeps one pooled keep-alive session per backend so repeated calls (especially
+status polling) reuse connections instead of paying a TCP+TLS handshake each time
+"""
+
+import json
+import re
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = 5
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 10
+
+
+class ApiClient:
+    def __init__(self, base_url, pool_size=DEFAULT_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.api_url = f"{self.base_url}/api"
+        self.pool_size = 0
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.ensure_pool_size(pool_size)
+
+    def ensure_pool_size(self, pool_size):
+        """Grow the connection pool so concurrent callers don't discard connections"""
+        if pool_size <= self.pool_size:
+            return
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool_size = pool_size
+
+    def url(self, endpoint):
+        return f"{self.api_url}/{endpoint}" if endpoint else self.api_url
+
+    def request(self, method, endpoint, json=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+        """Send a request to /api/{endpoint}; `timeout` is the read timeout in seconds"""
+        return self.session.request(
+            method, self.url(endpoint), json=json, timeout=(CONNECT_TIMEOUT, timeout), **kwargs
+        )
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, json=None, **kwargs):
+        return self.request("POST", endpoint, json=json, **kwargs)
+
+    def put(self, endpoint, json=None, **kwargs):
+        return self.request("PUT", endpoint, json=json, **kwargs)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url, pool_size=DEFAULT_POOL_SIZE):
+    """Shared client for a backend URL, created on first use"""
+    key = base_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ApiClient(key, pool_size)
+        else:
+            client.ensure_pool_size(pool_size)
+        return client
+
+
+def iter_lines_unbuffered(response):
+    """Yield decoded lines as soon as they arrive (iter_lines waits for a full 512 byte chunk)"""
+    buffer = ""
+    for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode("utf-8")
+        buffer += chunk
+        *lines, buffer = re.split(r"\r?\n", buffer)
+        yield from lines
+    if buffer:
+        yield buffer
+
+
+def iter_sse_events(response):
+    """Yield (event, data) pairs from a text/event-stream response opened with stream=True"""
+    event, data_lines = "message", []
+    for line in iter_lines_unbuffered(response):
+        if line == "":
+            if data_lines:
+                payload = "\n".join(data_lines)
+                try:
+                    yield event, json.loads(payload)
+                except ValueError:
+                    yield event, payload
+            event, data_lines = "message", []
+        elif line.startswith(":"):
+            continue  # keep-alive comment
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
@@ -11,6 +11,7 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 import { API } from '@/lib/config';
+import { thumbnailSrc } from '@/lib/imageUrls';
 import { usePageView } from '@/hooks/useAudit';
 
 interface UserStats {
@@ -1232,7 +1233,7 @@ export default function AdminPage() {
                               <div className="flex items-center gap-3">
                                 {property.images?.[0] ? (
                                   <img
-                                    src={property.images[0]}
+                                    src={thumbnailSrc(property.images[0])}
                                     alt={property.location}
                                     className="w-12 h-12 rounded-lg object-cover"
                                   />
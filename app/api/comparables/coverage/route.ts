@@ -0,0 +1,36 @@
+import { NextResponse } from 'next/server';
+import { comparablesCoverage } from '@/lib/areaDemand';
+import { lastPrefetchRun, prefetchCandidates } from '@/lib/prefetchScheduler';
+import { sourceGuardStatus } from '@/lib/sourceGuard';
+import { singleFlightStats } from '@/lib/singleFlight';
+
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - How often comparables are served from warm stored sales
+ * `coverage` is the fraction of comparable fetches answered without a scrape, overall
+ * and since this instance started. `areas` lists the most in-demand areas with their
+ * own coverage and prefetch state; `last_run` is this instance's last prefetch run and
+ * `sources` the circuit breaker and rate limit state of each comparable source.
+ * `coalescing` counts upstream fetches saved by sharing identical in-flight requests.
+ */
+export async function GET() {
+  try {
+    const [coverage, candidates] = await Promise.all([comparablesCoverage(), prefetchCandidates()]);
+    return NextResponse.json({
+      coverage,
+      areas: candidates.map(candidate => ({
+        ...candidate,
+        score: Math.round(candidate.score * 100) / 100,
+        coverage: candidate.requests > 0 ? Math.round((candidate.warm_hits / candidate.requests) * 1000) / 1000 : 0
+      })),
+      last_run: lastPrefetchRun(),
+      sources: sourceGuardStatus(),
+      coalescing: singleFlightStats()
+    });
+  } catch (error) {
+    console.error('Comparables coverage error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to load coverage: ' + errorMessage }, { status: 500 });
+  }
+}
@@ -0,0 +1,53 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { findBestComparables } from '@/lib/comparables';
+import { getSalesNear, indexedSalesCount } from '@/lib/salesStore';
+
+export const dynamic = 'force-dynamic';
+
+// The index scans cells in proportion to radius², so both bounds keep a query cheap
+const MAX_RADIUS_KM = 25;
+const MAX_K = 100;
+
+/**
+ * GET - Sold properties near a point, from the in-process spatial index
+ * Query: lat, lon, radius_km (default 3, at most 25), k (default 10, at most 100).
+ * With beds/baths/size the k most similar sales within the radius are returned,
+ * otherwise the k nearest.
+ */
+export async function GET(request: NextRequest) {
+  const searchParams = request.nextUrl.searchParams;
+  const lat = parseFloat(searchParams.get('lat') || '');
+  const lon = parseFloat(searchParams.get('lon') || '');
+  if (!Number.isFinite(lat) || !Number.isFinite(lon)) {
+    return NextResponse.json({ detail: 'lat and lon are required' }, { status: 400 });
+  }
+  const requestedRadius = Number(searchParams.get('radius_km') || '3');
+  const requestedK = Number(searchParams.get('k') || '10');
+  if (!Number.isFinite(requestedRadius) || requestedRadius <= 0 || !Number.isInteger(requestedK) || requestedK <= 0) {
+    return NextResponse.json({ detail: 'radius_km must be a positive number and k a positive integer' }, { status: 400 });
+  }
+  const radiusKm = Math.min(requestedRadius, MAX_RADIUS_KM);
+  const k = Math.min(requestedK, MAX_K);
+
+  const started = performance.now();
+  const nearby = getSalesNear(lat, lon, radiusKm);
+  const sales = searchParams.has('beds')
+    ? findBestComparables(
+        {
+          beds: parseInt(searchParams.get('beds') || '0', 10),
+          baths: parseInt(searchParams.get('baths') || '0', 10),
+          size: searchParams.has('size') ? parseFloat(searchParams.get('size')!) : null
+        },
+        nearby,
+        k
+      )
+    : nearby.slice(0, k);
+
+  return NextResponse.json({
+    sales,
+    total_within_radius: nearby.length,
+    radius_km: radiusKm,
+    indexed_sales: indexedSalesCount(),
+    query_ms: Math.round((performance.now() - started) * 1000) / 1000
+  });
+}
@@ -0,0 +1,31 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { runPrefetch } from '@/lib/prefetchScheduler';
+
+// A run is capped by PREFETCH_RUN_BUDGET_MS, below this limit
+export const maxDuration = 300;
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - Refresh comparables for in-demand areas ahead of their staleness budget
+ * Called by the Vercel cron in vercel.json. Requests must carry
+ * `Authorization: Bearer <CRON_SECRET>` (Vercel adds it to cron invocations); without
+ * CRON_SECRET the route is open only outside production.
+ */
+export async function GET(request: NextRequest) {
+  const secret = process.env.CRON_SECRET;
+  if (!secret && process.env.NODE_ENV === 'production') {
+    console.log('[Prefetch] CRON_SECRET is not set, refusing prefetch request');
+    return NextResponse.json({ detail: 'Unauthorized' }, { status: 401 });
+  }
+  if (secret && request.headers.get('authorization') !== `Bearer ${secret}`) {
+    return NextResponse.json({ detail: 'Unauthorized' }, { status: 401 });
+  }
+
+  try {
+    return NextResponse.json(await runPrefetch());
+  } catch (error) {
+    console.error('Comparables prefetch error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Prefetch failed: ' + errorMessage }, { status: 500 });
+  }
+}
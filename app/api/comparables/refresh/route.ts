@@ -0,0 +1,28 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getPropertyTypeFilter, parseLocation, refreshSalesArea } from '@/lib/comparables';
+
+export const maxDuration = 60;
+export const dynamic = 'force-dynamic';
+
+/**
+ * POST - Incrementally refresh the sold listings stored for a suburb
+ * Body: { location, property_type? }. Only listings not already stored are added.
+ */
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+    if (!body.location) {
+      return NextResponse.json({ detail: 'location is required' }, { status: 400 });
+    }
+
+    const { suburb, state, postcode } = parseLocation(body.location);
+    const propertyType = body.property_type ? getPropertyTypeFilter(body.property_type) : null;
+    const result = await refreshSalesArea({ suburb, state, postcode, propertyType });
+
+    return NextResponse.json({ suburb, state, postcode, property_type: propertyType || 'all', ...result });
+  } catch (error) {
+    console.error('Comparables refresh error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to refresh comparables: ' + errorMessage }, { status: 502 });
+  }
+}
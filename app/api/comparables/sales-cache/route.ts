@@ -0,0 +1,11 @@
+import { NextResponse } from 'next/server';
+import { historicSalesCacheStats } from '@/lib/historicSalesCache';
+
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - Historic sales cache counters for this instance, per tier (L1 in-process, L2 backend)
+ */
+export async function GET() {
+  return NextResponse.json(historicSalesCacheStats());
+}
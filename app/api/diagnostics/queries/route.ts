@@ -0,0 +1,32 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { isMongoConfigured } from '@/lib/mongo';
+import { indexPlanStatus } from '@/lib/indexPlan';
+import { SLOW_QUERY_MS, topQueryShapes } from '@/lib/queryStats';
+
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - MongoDB query shapes seen by this instance, most total time first
+ * Query: limit (default 20). Also reports which planned indexes exist.
+ */
+export async function GET(request: NextRequest) {
+  if (!isMongoConfigured()) {
+    return NextResponse.json({ detail: 'MongoDB is not configured (MONGO_URL)' }, { status: 404 });
+  }
+  try {
+    const limit = parseInt(request.nextUrl.searchParams.get('limit') || '20', 10);
+    const shapes = topQueryShapes(Number.isFinite(limit) && limit > 0 ? limit : 20);
+    const indexes = await indexPlanStatus();
+    return NextResponse.json({
+      slow_query_ms: SLOW_QUERY_MS,
+      shapes,
+      collection_scans: shapes.filter(shape => shape.collection_scan).map(shape => shape.shape),
+      indexes,
+      missing_indexes: indexes.filter(index => !index.present).length
+    });
+  } catch (error) {
+    console.error('Query diagnostics error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to load query diagnostics: ' + errorMessage }, { status: 500 });
+  }
+}
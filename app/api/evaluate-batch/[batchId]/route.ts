@@ -0,0 +1,34 @@
+import { NextRequest, NextResponse, after } from 'next/server';
+import { batchStatus, getBatch, resumeBatch } from '@/lib/batchEvaluation';
+
+export const maxDuration = 300;
+export const dynamic = 'force-dynamic';
+
+interface RouteParams {
+  params: Promise<{ batchId: string }>;
+}
+
+/**
+ * GET - Aggregate progress and per-property status of a batch
+ * Polling an unfinished batch also resumes it, so a batch left behind by a restarted
+ * instance is picked up by whichever instance serves the poll
+ */
+export async function GET(request: NextRequest, { params }: RouteParams) {
+  try {
+    const { batchId } = await params;
+    const batch = await getBatch(batchId);
+    if (!batch) {
+      return NextResponse.json({ detail: 'Batch not found' }, { status: 404 });
+    }
+
+    const { progress, items } = await batchStatus(batch);
+    if (!progress.done) {
+      after(() => resumeBatch(batch));
+    }
+    return NextResponse.json({ ...progress, items });
+  } catch (error) {
+    console.error('Batch status error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to get batch status: ' + errorMessage }, { status: 500 });
+  }
+}
@@ -0,0 +1,30 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { followBatch, getBatch, resumeBatch } from '@/lib/batchEvaluation';
+import { eventStreamResponse } from '@/lib/sse';
+
+export const maxDuration = 300;
+export const dynamic = 'force-dynamic';
+
+interface RouteParams {
+  params: Promise<{ batchId: string }>;
+}
+
+/**
+ * GET - Server-sent events for a batch
+ * Emits `result` for each property as it finishes (with its evaluation), `progress`
+ * whenever the aggregate counts change, then `completed`. Items already finished when
+ * the stream opens are sent first, so a client can reconnect without missing results.
+ */
+export async function GET(request: NextRequest, { params }: RouteParams) {
+  const { batchId } = await params;
+  const batch = await getBatch(batchId);
+  if (!batch) {
+    return NextResponse.json({ detail: 'Batch not found' }, { status: 404 });
+  }
+
+  return eventStreamResponse((send, signal) => {
+    // The open stream keeps the instance alive while the batch makes progress
+    resumeBatch(batch).catch(error => console.log(`[Batch] Resume failed for ${batchId}: ${error}`));
+    return followBatch(batchId, send, signal);
+  });
+}
@@ -0,0 +1,50 @@
+import { NextRequest, NextResponse, after } from 'next/server';
+import { BatchRequestError, createBatch, parseBatchRequest, queueBatch } from '@/lib/batchEvaluation';
+import { DEFAULT_AGENCY_ID, budgetExceededMessage, getBudgetStatus } from '@/lib/llmLedger';
+
+// Queueing and workers keep running after the response is sent
+export const maxDuration = 300;
+export const dynamic = 'force-dynamic';
+
+/**
+ * POST - Evaluate many properties as one batch
+ * Body: { property_ids?: string[], properties?: QuickEvaluationInput[] }.
+ * Saved properties get a full evaluation and inline specs a quick one. Items run on
+ * the batch lane (after any interactive evaluation) with the worker pool's concurrency,
+ * and each suburb's comparable sales are fetched once for the whole batch.
+ * LLM spend is charged to each saved property's agency and, for inline specs, to the
+ * unassigned budget; a spent global budget (or unassigned budget, with specs) is a 429.
+ * Follow progress at /api/evaluate-batch/{batch_id} or stream results from
+ * /api/evaluate-batch/{batch_id}/stream.
+ */
+export async function POST(request: NextRequest) {
+  let batchRequest;
+  try {
+    batchRequest = parseBatchRequest(await request.json());
+  } catch (error) {
+    const errorMessage = error instanceof BatchRequestError ? error.message : 'Invalid request body';
+    return NextResponse.json({ detail: errorMessage }, { status: 400 });
+  }
+
+  try {
+    // Saved properties' agencies are checked as each evaluation runs
+    const budget = await getBudgetStatus(batchRequest.specs.length > 0 ? DEFAULT_AGENCY_ID : null);
+    if (budget.mode === 'blocked') {
+      return NextResponse.json({ detail: budgetExceededMessage(budget), budget }, { status: 429 });
+    }
+
+    const batch = await createBatch(batchRequest);
+    after(() => queueBatch(batch.batch_id));
+    return NextResponse.json({
+      success: true,
+      batch_id: batch.batch_id,
+      total: batch.items.length,
+      status_url: `/api/evaluate-batch/${batch.batch_id}`,
+      stream_url: `/api/evaluate-batch/${batch.batch_id}/stream`
+    }, { status: 202 });
+  } catch (error) {
+    console.error('Queue batch evaluation error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to queue batch: ' + errorMessage }, { status: 500 });
+  }
+}
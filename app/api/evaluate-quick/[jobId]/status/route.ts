@@ -0,0 +1,17 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { jobStatusResponse } from '@/lib/jobStatus';
+
+export const maxDuration = 300;
+export const dynamic = 'force-dynamic';
+
+interface RouteParams {
+  params: Promise<{ jobId: string }>;
+}
+
+/**
+ * GET - Status of a quick evaluation job (result included once completed)
+ */
+export async function GET(request: NextRequest, { params }: RouteParams) {
+  const { jobId } = await params;
+  return jobStatusResponse(jobId);
+}
@@ -0,0 +1,11 @@
+import { NextResponse } from 'next/server';
+import { quickEvaluationCache } from '@/lib/quickEvaluation';
+
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - Quick evaluation result cache counters for this instance
+ */
+export async function GET() {
+  return NextResponse.json(quickEvaluationCache.stats());
+}
@@ -0,0 +1,76 @@
+import { NextRequest, NextResponse, after } from 'next/server';
+import { runWorkers, submitJob } from '@/lib/evaluationJobs';
+import { budgetExceededMessage, getBudgetStatus } from '@/lib/llmLedger';
+import {
+  parseQuickEvaluationInput,
+  quickEvaluationCache,
+  quickEvaluationCacheKey,
+  quickEvaluationKey
+} from '@/lib/quickEvaluation';
+
+// Workers keep running after the response is sent, until the queue drains
+export const maxDuration = 300;
+export const dynamic = 'force-dynamic';
+
+/**
+ * POST - Queue a quick evaluation and return its job id
+ * Poll /api/evaluate-quick/{job_id}/status for the result. Submitting the same
+ * property attributes again returns the existing job while it is queued, running
+ * or recently completed.
+ *
+ * Results are cached by suburb, property type, layout, size, price and features, so a
+ * repeat evaluation completes immediately (`cache_status: "hit"`). Add ?refresh=true
+ * to skip the cache and run a fresh evaluation.
+ *
+ * Quick evaluations have no stored property to take an agency from, so they are charged
+ * to the unassigned budget. Once that (or the global) monthly LLM budget is used up the
+ * request gets a 429 straight away instead of a job that fails later.
+ */
+export async function POST(request: NextRequest) {
+  let input;
+  try {
+    input = parseQuickEvaluationInput(await request.json());
+  } catch (error) {
+    const errorMessage = error instanceof Error ? error.message : 'Invalid request body';
+    return NextResponse.json({ detail: errorMessage }, { status: 400 });
+  }
+
+  try {
+    const cacheKey = await quickEvaluationCacheKey(input);
+    const refresh = request.nextUrl.searchParams.get('refresh') === 'true';
+    const cached = refresh ? undefined : quickEvaluationCache.get(cacheKey);
+
+    if (cached) {
+      const { job } = await submitJob('quick', { ...input, cache_key: cacheKey }, null, {
+        cacheStatus: 'hit',
+        result: cached
+      });
+      console.log(`[Quick Evaluate] Cache hit for job ${job.job_id}`);
+      return NextResponse.json({ success: true, job_id: job.job_id, status: job.status, reused: false, cache_status: 'hit' });
+    }
+
+    const budget = await getBudgetStatus(input.agency_id);
+    if (budget.mode === 'blocked') {
+      return NextResponse.json({ detail: budgetExceededMessage(budget), budget }, { status: 429 });
+    }
+
+    const { job, reused } = await submitJob(
+      'quick',
+      { ...input, cache_key: cacheKey },
+      refresh ? null : await quickEvaluationKey(input),
+      { cacheStatus: refresh ? 'bypass' : 'miss' }
+    );
+    after(() => runWorkers());
+    return NextResponse.json({
+      success: true,
+      job_id: job.job_id,
+      status: job.status,
+      reused,
+      cache_status: job.cache_status
+    });
+  } catch (error) {
+    console.error('Queue quick evaluation error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to queue evaluation: ' + errorMessage }, { status: 500 });
+  }
+}
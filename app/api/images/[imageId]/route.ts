@@ -0,0 +1,76 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { StoredImage, getImage, readImage } from '@/lib/imageStore';
+
+interface RouteParams {
+  params: Promise<{ imageId: string }>;
+}
+
+/**
+ * Parse a single `bytes=` range; null means serve the whole image
+ * Multiple ranges are not supported and fall back to the whole image
+ */
+function parseRange(header: string | null, size: number): { start: number; end: number } | 'unsatisfiable' | null {
+  const match = header?.match(/^bytes=(\d*)-(\d*)$/);
+  if (!match || (!match[1] && !match[2])) return null;
+  let start: number;
+  let end: number;
+  if (!match[1]) {
+    // Suffix range: the last N bytes
+    start = Math.max(0, size - parseInt(match[2], 10));
+    end = size - 1;
+  } else {
+    start = parseInt(match[1], 10);
+    end = match[2] ? Math.min(parseInt(match[2], 10), size - 1) : size - 1;
+  }
+  return start > end || start >= size ? 'unsatisfiable' : { start, end };
+}
+
+function imageHeaders(image: StoredImage): Record<string, string> {
+  return {
+    'Content-Type': image.content_type,
+    'Accept-Ranges': 'bytes',
+    // Content-addressed, so the bytes behind a URL never change
+    'Cache-Control': 'public, max-age=31536000, immutable',
+    ETag: `"${image.id}"`
+  };
+}
+
+async function serveImage(request: NextRequest, { params }: RouteParams, includeBody: boolean) {
+  const { imageId } = await params;
+  const image = await getImage(imageId);
+  if (!image) {
+    return NextResponse.json({ detail: 'Image not found' }, { status: 404 });
+  }
+
+  const headers = imageHeaders(image);
+  if (request.headers.get('if-none-match') === headers.ETag) {
+    return new Response(null, { status: 304, headers });
+  }
+
+  const range = parseRange(request.headers.get('range'), image.size);
+  if (range === 'unsatisfiable') {
+    return new Response(null, { status: 416, headers: { ...headers, 'Content-Range': `bytes */${image.size}` } });
+  }
+
+  const { start, end } = range ?? { start: 0, end: image.size - 1 };
+  const rangeHeaders = {
+    ...headers,
+    'Content-Length': String(end - start + 1),
+    ...(range && { 'Content-Range': `bytes ${start}-${end}/${image.size}` })
+  };
+  return new Response(includeBody ? await readImage(image.id, start, end) : null, {
+    status: range ? 206 : 200,
+    headers: rangeHeaders
+  });
+}
+
+/**
+ * GET - Stored image bytes, with single byte-range support
+ */
+export async function GET(request: NextRequest, context: RouteParams) {
+  return serveImage(request, context, true);
+}
+
+export async function HEAD(request: NextRequest, context: RouteParams) {
+  return serveImage(request, context, false);
+}
@@ -0,0 +1,31 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getBudgetStatus, getLlmUsage } from '@/lib/llmLedger';
+
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - LLM spend for the current month
+ * With ?agency_id= returns that agency's budget status and usage by endpoint/model;
+ * without it, the global budget status plus every agency's budget status and usage
+ */
+export async function GET(request: NextRequest) {
+  try {
+    const agencyId = request.nextUrl.searchParams.get('agency_id');
+    const usage = await getLlmUsage(agencyId);
+
+    if (agencyId) {
+      return NextResponse.json({ budget: await getBudgetStatus(agencyId), usage });
+    }
+
+    const agencyIds = [...new Set(usage.map(row => row.agency_id))];
+    const agencies = await Promise.all(agencyIds.map(async id => ({
+      budget: await getBudgetStatus(id),
+      usage: usage.filter(row => row.agency_id === id)
+    })));
+    return NextResponse.json({ global: await getBudgetStatus(null), agencies });
+  } catch (error) {
+    console.error('LLM usage error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to load LLM usage: ' + errorMessage }, { status: 500 });
+  }
+}
@@ -0,0 +1,36 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getEvaluationTracker } from '@/lib/evaluationProgress';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+
+export const dynamic = 'force-dynamic';
+
+interface RouteParams {
+  params: Promise<{ propertyId: string }>;
+}
+
+/**
+ * GET - Evaluation status with per-stage timings
+ * Served from the in-process tracker while (or shortly after) this instance
+ * runs the evaluation, otherwise falls back to the backend status endpoint.
+ * While the report is being generated, `partial_report` holds the text so far.
+ */
+export async function GET(request: NextRequest, { params }: RouteParams) {
+  const { propertyId } = await params;
+
+  const tracker = getEvaluationTracker(propertyId);
+  if (tracker) {
+    const progress = tracker.snapshot();
+    return NextResponse.json(tracker.finished ? progress : { ...progress, partial_report: tracker.report });
+  }
+
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/properties/${propertyId}/evaluation-status`, { cache: 'no-store' });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error('Evaluation status error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to fetch evaluation status: ' + errorMessage }, { status: 500 });
+  }
+}
@@ -0,0 +1,27 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { evaluationEventPayload, followEvaluation, getEvaluationTracker } from '@/lib/evaluationProgress';
+import { eventStreamResponse } from '@/lib/sse';
+
+export const dynamic = 'force-dynamic';
+
+interface RouteParams {
+  params: Promise<{ propertyId: string }>;
+}
+
+/**
+ * GET - Server-sent events for an evaluation already running on this instance
+ * Emits `stage` on every transition, then `completed` (with the result) or `failed`.
+ * Clients that get a 404 should fall back to polling evaluation-status.
+ */
+export async function GET(request: NextRequest, { params }: RouteParams) {
+  const { propertyId } = await params;
+
+  const tracker = getEvaluationTracker(propertyId);
+  if (!tracker) {
+    return NextResponse.json({ detail: 'No evaluation in progress for this property' }, { status: 404 });
+  }
+
+  return eventStreamResponse((send, signal) =>
+    followEvaluation(tracker, event => send(event.type, evaluationEventPayload(event)), signal)
+  );
+}
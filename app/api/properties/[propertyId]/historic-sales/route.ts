@@ -1,5 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { Property } from '@/lib/types';
+import { SalesArea, areaKey, recordSales } from '@/lib/salesStore';
+import { HomelyListing, HomelyPageError, fetchHomelyListings, homelySalePrice, homelySoldUrl } from '@/lib/comparables';
+import { getHistoricSales, putHistoricSales } from '@/lib/historicSalesCache';
 
 const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
 
@@ -28,6 +31,8 @@ interface SoldProperty {
 
 const GOOGLE_MAPS_API_KEY = process.env.NEXT_PUBLIC_GOOGLE_MAPS_API_KEY;
 
+type ScrapeResult = { properties: SoldProperty[], scrapedUrl: string, debug?: string };
+
 /**
  * Geocode an address using Google Maps API
  */
@@ -117,181 +122,122 @@ function parseLocation(location: string): { suburb: string; state: string; postc
 }
 
 /**
- * Scrape sold properties from Homely.com.au (no caching - returns fresh data)
- * Returns both the properties and the URL that was scraped
- * Uses ScraperAPI proxy if SCRAPER_API_KEY is set (recommended for Vercel deployment)
+ * Map a raw Homely listing to a historic sale, or null when it has no usable price
  */
-async function scrapeHomelyProperties(suburb: string, state: string, postcode: string | null, propertyType: string | null): Promise<{ properties: SoldProperty[], scrapedUrl: string, debug?: string }> {
-  let targetUrl = postcode
-    ? `https://www.homely.com.au/sold-properties/${suburb}-${state}-${postcode}`
-    : `https://www.homely.com.au/sold-properties/${suburb}-${state}`;
-
-  if (propertyType) {
-    targetUrl += `?propertytype=${propertyType}`;
+function toHistoricSale(listing: HomelyListing): SoldProperty | null {
+  const price = homelySalePrice(listing);
+  if (!price) return null;
+
+  const soldOn = listing.saleDetails?.soldDetails?.soldOn;
+  const soldDateRaw = soldOn ? new Date(soldOn) : null;
+  const soldDate = soldDateRaw
+    ? soldDateRaw.toLocaleDateString('en-AU', { day: 'numeric', month: 'short', year: 'numeric' })
+    : 'Recently';
+
+  const propType = listing.statusLabels?.propertyTypeDescription || 'House';
+  // Try multiple possible field names for land area
+  const landArea = listing.features?.landArea ||
+                   listing.features?.landSize ||
+                   listing.features?.land ||
+                   listing.landSize ||
+                   listing.propertyDetails?.landArea ||
+                   listing.propertyDetails?.landSize ||
+                   null;
+
+  // Try to get coordinates from Homely data
+  const lat = listing.address?.coordinate?.lat ||
+              listing.address?.latitude ||
+              listing.coordinate?.lat ||
+              listing.latitude ||
+              null;
+  const lng = listing.address?.coordinate?.lon ||
+              listing.address?.coordinate?.lng ||
+              listing.address?.longitude ||
+              listing.coordinate?.lon ||
+              listing.coordinate?.lng ||
+              listing.longitude ||
+              null;
+
+  // Build Homely URL from listing data
+  // Homely provides: canonicalUri="/homes/3-6-the-esplanade-north-ward-qld-4810/12420942"
+  // Or we can construct from: uri="3-6-the-esplanade-north-ward-qld-4810" and id=12420942
+  let homelyUrl: string | null = null;
+
+  // Best option: use canonicalUri which has the full path
+  if (listing.canonicalUri) {
+    homelyUrl = `https://www.homely.com.au${listing.canonicalUri}`;
   }
 
-  // Use ScraperAPI proxy if available (bypasses IP blocking on Vercel)
-  const scraperApiKey = process.env.SCRAPER_API_KEY;
-  let fetchUrl: string;
-  let fetchOptions: RequestInit;
-
-  if (scraperApiKey) {
-    // Use ScraperAPI proxy
-    fetchUrl = `https://api.scraperapi.com?api_key=${scraperApiKey}&url=${encodeURIComponent(targetUrl)}&render=false&country_code=au`;
-    fetchOptions = {};
-    console.log(`[Historic Sales] Using ScraperAPI proxy for: ${targetUrl}`);
-  } else {
-    // Direct fetch (works locally, may be blocked on Vercel)
-    fetchUrl = targetUrl;
-    fetchOptions = {
-      headers: {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-AU,en;q=0.9',
-        'Cache-Control': 'no-cache',
-      }
-    };
-    console.log(`[Historic Sales] Direct fetch (no proxy): ${targetUrl}`);
+  // Fallback: construct from uri (slug) and id
+  if (!homelyUrl && listing.uri && listing.id) {
+    homelyUrl = `https://www.homely.com.au/homes/${listing.uri}/${listing.id}`;
   }
 
-  try {
-    const response = await fetch(fetchUrl, fetchOptions);
-
-    if (!response.ok) {
-      console.log(`[Historic Sales] HTTP ${response.status}`);
-      return { properties: [], scrapedUrl: targetUrl, debug: `HTTP ${response.status}. ${scraperApiKey ? 'Using ScraperAPI' : 'No proxy - add SCRAPER_API_KEY to bypass Vercel IP blocking'}` };
-    }
-
-    const html = await response.text();
-    console.log(`[Historic Sales] Got ${html.length} bytes`);
-
-    const nextDataMatch = html.match(/<script id="__NEXT_DATA__" type="application\/json">([\s\S]*?)<\/script>/);
-    if (!nextDataMatch) {
-      console.log('[Historic Sales] No __NEXT_DATA__ found');
-      const preview = html.substring(0, 500);
-      const hasBlockedMessage = html.includes('blocked') || html.includes('captcha') || html.includes('robot') || html.includes('Access Denied');
-      return { properties: [], scrapedUrl: targetUrl, debug: `No __NEXT_DATA__. Blocked: ${hasBlockedMessage}. ${scraperApiKey ? 'Using ScraperAPI' : 'No proxy configured - Homely is blocking Vercel IPs. Add SCRAPER_API_KEY env var.'}. Preview: ${preview}` };
-    }
-
-    const nextData = JSON.parse(nextDataMatch[1]);
-    const listings = nextData?.props?.pageProps?.ssrData?.listings || [];
-    console.log(`[Historic Sales] Found ${listings.length} listings`);
-
-    const properties: SoldProperty[] = [];
-
-    for (const listing of listings) {
-      const priceStr = listing.priceDetails?.longDescription ||
-        listing.saleDetails?.soldDetails?.displayPrice?.longDescription || '';
-
-      const cleaned = priceStr.replace(/[$,\s]/g, '');
-      const priceMatch = cleaned.match(/(\d{6,})/);
-      const price = priceMatch ? parseInt(priceMatch[1]) : null;
-
-      if (price && price > 100000) {
-        const soldOn = listing.saleDetails?.soldDetails?.soldOn;
-        const soldDateRaw = soldOn ? new Date(soldOn) : null;
-        const soldDate = soldDateRaw
-          ? soldDateRaw.toLocaleDateString('en-AU', { day: 'numeric', month: 'short', year: 'numeric' })
-          : 'Recently';
-
-        const propType = listing.statusLabels?.propertyTypeDescription || 'House';
-        // Try multiple possible field names for land area
-        const landArea = listing.features?.landArea ||
-                         listing.features?.landSize ||
-                         listing.features?.land ||
-                         listing.landSize ||
-                         listing.propertyDetails?.landArea ||
-                         listing.propertyDetails?.landSize ||
-                         null;
-
-        // Try to get coordinates from Homely data
-        const lat = listing.address?.coordinate?.lat ||
-                    listing.address?.latitude ||
-                    listing.coordinate?.lat ||
-                    listing.latitude ||
-                    null;
-        const lng = listing.address?.coordinate?.lon ||
-                    listing.address?.coordinate?.lng ||
-                    listing.address?.longitude ||
-                    listing.coordinate?.lon ||
-                    listing.coordinate?.lng ||
-                    listing.longitude ||
-                    null;
-
-        // Build Homely URL from listing data
-        // Homely provides: canonicalUri="/homes/3-6-the-esplanade-north-ward-qld-4810/12420942"
-        // Or we can construct from: uri="3-6-the-esplanade-north-ward-qld-4810" and id=12420942
-        let homelyUrl: string | null = null;
-
-        // Best option: use canonicalUri which has the full path
-        if (listing.canonicalUri) {
-          homelyUrl = `https://www.homely.com.au${listing.canonicalUri}`;
-        }
-
-        // Fallback: construct from uri (slug) and id
-        if (!homelyUrl && listing.uri && listing.id) {
-          homelyUrl = `https://www.homely.com.au/homes/${listing.uri}/${listing.id}`;
-        }
-
-        // Log first listing for debugging
-        if (properties.length === 0) {
-          console.log(`[Historic Sales] First listing - id: ${listing.id}, uri: ${listing.uri}, canonicalUri: ${listing.canonicalUri}`);
-          console.log(`[Historic Sales] Generated homelyUrl: ${homelyUrl}`);
-        }
+  return {
+    id: crypto.randomUUID(),
+    address: listing.address?.longAddress || listing.address?.streetAddress || 'Unknown',
+    price,
+    beds: listing.features?.bedrooms || null,
+    baths: listing.features?.bathrooms || null,
+    cars: listing.features?.cars || null,
+    land_area: landArea,
+    property_type: propType,
+    sold_date: soldDate,
+    sold_date_raw: soldDateRaw,
+    source: 'homely.com.au',
+    latitude: lat,
+    longitude: lng,
+    homely_url: homelyUrl
+  };
+}
 
-        properties.push({
-          id: crypto.randomUUID(),
-          address: listing.address?.longAddress || listing.address?.streetAddress || 'Unknown',
-          price,
-          beds: listing.features?.bedrooms || null,
-          baths: listing.features?.bathrooms || null,
-          cars: listing.features?.cars || null,
-          land_area: landArea,
-          property_type: propType,
-          sold_date: soldDate,
-          sold_date_raw: soldDateRaw,
-          source: 'homely.com.au',
-          latitude: lat,
-          longitude: lng,
-          homely_url: homelyUrl
-        });
+/**
+ * Scrape sold properties from Homely.com.au (no caching - returns fresh data)
+ * Returns both the properties and the URL that was scraped
+ * The page is fetched through the comparables scraper, so it shares Homely's circuit breaker,
+ * rate limit and deadline, and joins any scrape of the same area already in flight
+ */
+async function scrapeHomelyProperties(area: SalesArea): Promise<ScrapeResult> {
+  const scrapedUrl = homelySoldUrl(area);
+  const proxyNote = process.env.SCRAPER_API_KEY
+    ? 'Using ScraperAPI'
+    : 'No proxy - add SCRAPER_API_KEY to bypass Vercel IP blocking';
+  const outcome = await fetchHomelyListings(area);
+
+  switch (outcome.status) {
+    case 'done': {
+      const properties = outcome.properties.flatMap(listing => toHistoricSale(listing) ?? []);
+      if (properties.length > 0) {
+        console.log(`[Historic Sales] First listing homelyUrl: ${properties[0].homely_url}`);
       }
+      console.log(`[Historic Sales] Extracted ${properties.length} valid properties from ${outcome.properties.length} listings`);
+      return { properties, scrapedUrl };
     }
-
-    console.log(`[Historic Sales] Extracted ${properties.length} valid properties`);
-    return { properties, scrapedUrl: targetUrl };
-
-  } catch (error: any) {
-    console.log(`[Historic Sales] Error: ${error.message}`);
-    return { properties: [], scrapedUrl: targetUrl };
+    case 'skipped':
+      console.log(`[Historic Sales] Skipping Homely: ${outcome.reason}`);
+      return { properties: [], scrapedUrl, debug: `Homely skipped: ${outcome.reason}, retry in ${Math.ceil(outcome.retry_in_ms / 1000)}s` };
+    case 'timeout':
+      return { properties: [], scrapedUrl, debug: `Homely timed out. ${proxyNote}` };
+    case 'error':
+      if (outcome.cause instanceof HomelyPageError) {
+        return { properties: [], scrapedUrl, debug: `No __NEXT_DATA__. Blocked: ${outcome.cause.blocked}. ${proxyNote}. Preview: ${outcome.cause.preview}` };
+      }
+      return { properties: [], scrapedUrl, debug: `${outcome.error}. ${proxyNote}` };
   }
 }
 
 /**
- * Check backend cache for historic sales data (cached for 7 days)
+ * Check the historic sales cache (in-process L1, then the backend's 7-day store)
  */
 async function checkCache(suburb: string, state: string, postcode: string | null, propertyType: string | null): Promise<any | null> {
   try {
-    const params = new URLSearchParams({
-      suburb: suburb,
-      state: state,
-      ...(postcode && { postcode }),
-      ...(propertyType && { propertyType })
-    });
-
-    const response = await fetch(`${BACKEND_URL}/api/historic-sales-cache?${params}`);
-    if (!response.ok) {
-      console.log(`[Historic Sales] Cache check failed: ${response.status}`);
-      return null;
-    }
-
-    const data = await response.json();
-    if (data.cached) {
-      console.log(`[Historic Sales] Cache HIT: ${data.cache_key}`);
+    const { data, tier } = await getHistoricSales({ suburb, state, postcode, propertyType });
+    if (data) {
+      console.log(`[Historic Sales] Cache HIT (${tier}): ${data.cache_key || areaKey({ suburb, state, postcode, propertyType })}`);
       return data;
     }
 
-    console.log(`[Historic Sales] Cache MISS: ${data.cache_key}`);
+    console.log(`[Historic Sales] Cache MISS: ${areaKey({ suburb, state, postcode, propertyType })}`);
     return null;
   } catch (error) {
     console.log(`[Historic Sales] Cache check error: ${error}`);
@@ -300,28 +246,12 @@ async function checkCache(suburb: string, state: string, postcode: string | null
 }
 
 /**
- * Store scraped results in backend cache
+ * Store scraped results in the historic sales cache
  */
 async function storeInCache(suburb: string, state: string, postcode: string | null, propertyType: string | null, sales: SoldProperty[], scrapedUrl: string): Promise<void> {
   try {
-    const response = await fetch(`${BACKEND_URL}/api/historic-sales-cache`, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({
-        suburb,
-        state,
-        postcode,
-        propertyType,
-        sales,
-        scrapedUrl
-      })
-    });
-
-    if (response.ok) {
-      console.log(`[Historic Sales] Stored ${sales.length} properties in cache`);
-    } else {
-      console.log(`[Historic Sales] Failed to store in cache: ${response.status}`);
-    }
+    await putHistoricSales({ suburb, state, postcode, propertyType }, sales, scrapedUrl);
+    console.log(`[Historic Sales] Stored ${sales.length} properties in cache`);
   } catch (error) {
     console.log(`[Historic Sales] Cache store error: ${error}`);
   }
@@ -369,7 +299,7 @@ async function fetchSuburbSales(
   }
 
   // Scrape fresh data
-  const { properties, scrapedUrl, debug } = await scrapeHomelyProperties(suburb, state, postcode, propertyType);
+  const { properties, scrapedUrl, debug } = await scrapeHomelyProperties({ suburb, state, postcode, propertyType });
 
   // Mark with source suburb and neighbouring flag
   const markedProperties = properties.map(p => ({
@@ -395,6 +325,9 @@ async function fetchSuburbSales(
   // Cache
   if (markedProperties.length > 0) {
     storeInCache(suburb, state, postcode, propertyType, markedProperties, scrapedUrl);
+    recordSales({ suburb, state, postcode, propertyType }, properties).catch(error => {
+      console.log(`[Historic Sales] Sales store update error: ${error}`);
+    });
   }
 
   return { sales: markedProperties, scrapedUrl, cached: false, debug };
@@ -435,24 +368,24 @@ export async function GET(request: NextRequest, { params }: RouteParams) {
 
     console.log(`[Historic Sales] Parsed: suburb=${suburb}, state=${state}, postcode=${postcode}, propertyType=${propertyType}`);
 
-    // Fetch main suburb sales
+    // Fetch main and neighbouring suburb sales concurrently
     const mainSuburbName = suburb.replace(/-/g, ' ');
-    const mainResult = await fetchSuburbSales(suburb, state, postcode, propertyType, mainSuburbName, false, forceFresh);
+    const mainRequest = fetchSuburbSales(suburb, state, postcode, propertyType, mainSuburbName, false, forceFresh);
 
-    let allSales = [...mainResult.sales];
     let neighbouringInfo: { suburb: string; state: string; postcode: string | null; scrapedUrl: string } | null = null;
+    let neighbourRequest: ReturnType<typeof fetchSuburbSales> | null = null;
 
     // Check if neighbouring suburb is configured
     const hasNeighbouringSuburb = property.neighbouring_suburb && property.neighbouring_state;
+    const neighbourSuburbDisplay = property.neighbouring_suburb || '';
+    const neighbourState = (property.neighbouring_state || '').toLowerCase();
+    const neighbourPostcode = property.neighbouring_postcode || null;
     if (hasNeighbouringSuburb) {
-      const neighbourSuburb = property.neighbouring_suburb!.toLowerCase().replace(/\s+/g, '-');
-      const neighbourState = property.neighbouring_state!.toLowerCase();
-      const neighbourPostcode = property.neighbouring_postcode || null;
-      const neighbourSuburbDisplay = property.neighbouring_suburb!;
+      const neighbourSuburb = neighbourSuburbDisplay.toLowerCase().replace(/\s+/g, '-');
 
       console.log(`[Historic Sales] Also searching neighbouring suburb: ${neighbourSuburbDisplay}, ${neighbourState.toUpperCase()} ${neighbourPostcode || ''}`);
 
-      const neighbourResult = await fetchSuburbSales(
+      neighbourRequest = fetchSuburbSales(
         neighbourSuburb,
         neighbourState,
         neighbourPostcode,
@@ -461,7 +394,12 @@ export async function GET(request: NextRequest, { params }: RouteParams) {
         true,
         forceFresh
       );
+    }
+
+    const [mainResult, neighbourResult] = await Promise.all([mainRequest, neighbourRequest]);
+    let allSales = [...mainResult.sales];
 
+    if (neighbourResult) {
       allSales = [...allSales, ...neighbourResult.sales];
       neighbouringInfo = {
         suburb: neighbourSuburbDisplay,
@@ -0,0 +1,64 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { Property, PropertyImage } from '@/lib/types';
+import { dataUrlBytes, getImage, imageIdFromUrl, storeImage } from '@/lib/imageStore';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+
+export const maxDuration = 60;
+
+interface RouteParams {
+  params: Promise<{ propertyId: string }>;
+}
+
+/**
+ * POST - Move a property's base64 photos into the image store
+ * Each embedded data URL is replaced by its stored image URL and the property gets
+ * `image_meta` for every stored photo. External URLs are left as they are.
+ */
+export async function POST(request: NextRequest, { params }: RouteParams) {
+  try {
+    const { propertyId } = await params;
+    const propertyResponse = await fetch(`${BACKEND_URL}/api/properties/${propertyId}`);
+    if (!propertyResponse.ok) {
+      return NextResponse.json({ detail: 'Property not found' }, { status: 404 });
+    }
+    const property: Property = await propertyResponse.json();
+
+    const images: string[] = [];
+    const imageMeta: PropertyImage[] = [];
+    let moved = 0;
+    let bytesRemoved = 0;
+    for (const image of property.images || []) {
+      const bytes = dataUrlBytes(image);
+      if (bytes) {
+        const stored = await storeImage(bytes);
+        images.push(stored.url);
+        imageMeta.push(stored);
+        moved++;
+        bytesRemoved += image.length - stored.url.length;
+        continue;
+      }
+      images.push(image);
+      const storedId = imageIdFromUrl(image);
+      const stored = storedId ? await getImage(storedId) : null;
+      if (stored) imageMeta.push(stored);
+    }
+
+    if (moved > 0) {
+      const patchResponse = await fetch(`${BACKEND_URL}/api/properties/${propertyId}`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ images, image_meta: imageMeta })
+      });
+      if (!patchResponse.ok) {
+        throw new Error(`Backend returned ${patchResponse.status}`);
+      }
+    }
+    console.log(`[Images] Property ${propertyId}: moved ${moved} photos out of the document (${bytesRemoved} bytes)`);
+    return NextResponse.json({ images, image_meta: imageMeta, moved, bytes_removed: bytesRemoved });
+  } catch (error) {
+    console.error('Externalize images error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to move images: ' + errorMessage }, { status: 500 });
+  }
+}
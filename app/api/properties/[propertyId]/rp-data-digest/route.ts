@@ -0,0 +1,66 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { Property } from '@/lib/types';
+import { digestRpReport, isDigestCurrent, saveRpDigest } from '@/lib/rpDigest';
+import { DEFAULT_AGENCY_ID, LlmAdmissionError } from '@/lib/llmLedger';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+
+export const maxDuration = 60;
+
+interface RouteParams {
+  params: Promise<{ propertyId: string }>;
+}
+
+async function fetchProperty(propertyId: string): Promise<Property | null> {
+  const response = await fetch(`${BACKEND_URL}/api/properties/${propertyId}`);
+  return response.ok ? response.json() : null;
+}
+
+/**
+ * GET - Stored RP Data digest and whether it matches the current report
+ */
+export async function GET(request: NextRequest, { params }: RouteParams) {
+  const { propertyId } = await params;
+  const property = await fetchProperty(propertyId);
+  if (!property) {
+    return NextResponse.json({ detail: 'Property not found' }, { status: 404 });
+  }
+
+  const current = !!property.rp_data_report && await isDigestCurrent(property.rp_data_report, property.rp_data_digest);
+  return NextResponse.json({ digest: property.rp_data_digest || null, current });
+}
+
+/**
+ * POST - Digest the property's RP Data report and store it on the property
+ * Called after the report is uploaded; a digest that already matches the report is reused
+ */
+export async function POST(request: NextRequest, { params }: RouteParams) {
+  try {
+    const { propertyId } = await params;
+    const property = await fetchProperty(propertyId);
+    if (!property) {
+      return NextResponse.json({ detail: 'Property not found' }, { status: 404 });
+    }
+    if (!property.rp_data_report) {
+      return NextResponse.json({ detail: 'Property has no RP Data report' }, { status: 400 });
+    }
+
+    if (await isDigestCurrent(property.rp_data_report, property.rp_data_digest)) {
+      return NextResponse.json({ digest: property.rp_data_digest, reused: true });
+    }
+
+    const digest = await digestRpReport(property.rp_data_report, {
+      agency_id: property.agency_id || DEFAULT_AGENCY_ID,
+      endpoint: 'rp-data-digest'
+    });
+    await saveRpDigest(propertyId, digest);
+    return NextResponse.json({ digest, reused: false });
+  } catch (error) {
+    if (error instanceof LlmAdmissionError) {
+      return NextResponse.json({ detail: error.message, budget: error.budget }, { status: error.status });
+    }
+    console.error('RP Data digest error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to digest RP Data report: ' + errorMessage }, { status: 500 });
+  }
+}
@@ -0,0 +1,39 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { sha256Hex } from '@/lib/hash';
+import { ListingQueryError, listProperties, parseListingQuery } from '@/lib/propertyListing';
+
+export const dynamic = 'force-dynamic';
+
+/**
+ * GET - One page of properties with only the requested fields
+ * Query: fields=id,location,price,status; agency_id, status, suburb filters;
+ * sort=-created_at (default) | created_at | location | -location; limit (max 200);
+ * cursor from the previous page's next_cursor.
+ * Responds 304 when If-None-Match matches the page's ETag.
+ */
+export async function GET(request: NextRequest) {
+  try {
+    const query = parseListingQuery(request.nextUrl.searchParams, request.headers.get('x-user-email'));
+    const page = await listProperties(query);
+
+    const body = JSON.stringify(page);
+    const headers = {
+      ETag: `W/"${(await sha256Hex(body)).slice(0, 32)}"`,
+      // Always revalidate; an unchanged page then costs a 304 with no body
+      'Cache-Control': 'private, no-cache',
+      Vary: 'x-user-email'
+    };
+    const ifNoneMatch = request.headers.get('if-none-match');
+    if (ifNoneMatch && ifNoneMatch.split(',').map(tag => tag.trim()).includes(headers.ETag)) {
+      return new Response(null, { status: 304, headers });
+    }
+    return new Response(body, { headers: { ...headers, 'Content-Type': 'application/json' } });
+  } catch (error) {
+    if (error instanceof ListingQueryError) {
+      return NextResponse.json({ detail: error.message }, { status: 400 });
+    }
+    console.error('Property listing error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to list properties: ' + errorMessage }, { status: 500 });
+  }
+}
@@ -0,0 +1,34 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { ImageStoreUnavailableError, storeImage } from '@/lib/imageStore';
+
+export const maxDuration = 60;
+
+/**
+ * POST - Store uploaded photos (multipart field `files`)
+ * Returns the image URLs to keep on the property, plus id/size/dimensions for each
+ */
+export async function POST(request: NextRequest) {
+  let files: File[];
+  try {
+    files = (await request.formData()).getAll('files').filter((value): value is File => value instanceof File);
+  } catch {
+    return NextResponse.json({ error: 'Expected multipart form data' }, { status: 400 });
+  }
+  if (files.length === 0) {
+    return NextResponse.json({ error: 'No files uploaded' }, { status: 400 });
+  }
+
+  try {
+    const images = await Promise.all(files.map(async file => storeImage(new Uint8Array(await file.arrayBuffer()))));
+    return NextResponse.json({ urls: images.map(image => image.url), images });
+  } catch (error) {
+    if (error instanceof ImageStoreUnavailableError) {
+      // A server misconfiguration, not a bad upload: fail loudly instead of returning URLs that break
+      console.error(`[Images] ${error.message}`);
+      return NextResponse.json({ error: error.message }, { status: 500 });
+    }
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    console.log(`[Images] Upload rejected: ${errorMessage}`);
+    return NextResponse.json({ error: errorMessage }, { status: 400 });
+  }
+}
@@ -7,6 +7,7 @@ import axios from "axios";
 import { toast } from "sonner";
 import { Home, Bed, Bath, Car, Building, Edit, Trash2, DollarSign, Search, Upload, CheckCircle, Settings, User, FileText, X, LogOut, Menu, MapPin, List, Filter, ChevronDown, Star, Copy, Download, LayoutTemplate, MessageSquare } from "lucide-react";
 import { API } from "@/lib/config";
+import { thumbnailSrc } from "@/lib/imageUrls";
 import ReportUploadModal from "@/components/ReportUploadModal";
 import { PropertyQuickActions } from "@/components/PropertyActions";
 import PropertyTemplates from "@/components/PropertyTemplates";
@@ -40,7 +41,10 @@ interface Property {
   pricing_type?: string;
   price_upper?: number;
   property_type: string;
-  images: string[];
+  images?: string[];
+  // Listing fields (see lib/propertyListing.ts)
+  thumbnail_url?: string | null;
+  has_evaluation?: boolean;
   features?: string;
   size?: number;
   strata_body_corps?: number;
@@ -72,6 +76,13 @@ interface MarketingPackage {
   inclusions?: Array<{ text: string; price?: number } | string>;
 }
 
+// Fields the property cards, search and filters use
+const LISTING_FIELDS = [
+  "id", "location", "beds", "baths", "carpark", "price", "pricing_type", "price_upper", "property_type",
+  "features", "size", "status", "user_email", "is_favourite", "notes", "evaluation_date",
+  "thumbnail_url", "has_evaluation",
+].join(",");
+
 export default function HomePage() {
   const router = useRouter();
   const { instance, accounts } = useMsal();
@@ -325,8 +336,17 @@ export default function HomePage() {
       if (userEmail) {
         headers['x-user-email'] = userEmail;
       }
-      const response = await axios.get(`${API}/properties`, { headers });
-      const activeProperties = response.data.filter((prop: Property) => prop.status !== "sold");
+      // Card fields only; the full property is loaded when editing
+      const activeProperties: Property[] = [];
+      let cursor: string | null = null;
+      do {
+        const response: { data: { items: Property[]; next_cursor: string | null } } = await axios.get('/api/properties', {
+          headers,
+          params: { status: 'active', fields: LISTING_FIELDS, limit: 200, ...(cursor && { cursor }) }
+        });
+        activeProperties.push(...response.data.items);
+        cursor = response.data.next_cursor;
+      } while (cursor);
       setAllProperties(activeProperties);
       setProperties(activeProperties);
     } catch (error) {
@@ -585,7 +605,7 @@ export default function HomePage() {
     const loadingToast = toast.loading(`Uploading ${files.length} image(s)...`);
 
     try {
-      // Upload to Azure Blob Storage
+      // Upload to the image store (GridFS via /api/upload)
       const formDataUpload = new FormData();
       files.forEach((file) => formDataUpload.append('files', file));
 
@@ -630,7 +650,7 @@ export default function HomePage() {
     }
 
     // Check payload size before saving (Vercel has 4.5MB limit)
-    // Note: Images are now stored as Azure Blob URLs, so only check report text sizes
+    // Note: Images are stored in the image store and kept as short URLs, so only check report text sizes
     const estimatedSize = (rpDataText?.length || 0) + (additionalReportText?.length || 0);
     const maxSize = 4 * 1024 * 1024; // 4MB limit (leaving buffer)
 
@@ -719,7 +739,15 @@ export default function HomePage() {
     }
   };
 
-  const handleEdit = (property: Property) => {
+  const handleEdit = async (listed: Property) => {
+    let property: Property;
+    try {
+      property = (await axios.get(`${API}/properties/${listed.id}`)).data;
+    } catch (error) {
+      console.error("Error loading property:", error);
+      toast.error("Failed to load property");
+      return;
+    }
     setEditingId(property.id);
     setFormData({
       beds: property.beds.toString(),
@@ -1573,7 +1601,7 @@ export default function HomePage() {
                   {formData.images.map((img, index) => (
                     <div key={index} className="relative group">
                       <img
-                        src={img}
+                        src={thumbnailSrc(img)}
                         alt={`Preview ${index + 1}`}
                         className="w-full h-20 object-cover rounded-lg border border-gray-200"
                       />
@@ -1760,9 +1788,9 @@ export default function HomePage() {
                   >
                     {/* Image with Favourite Badge */}
                     <div className="relative">
-                      {property.images && property.images.length > 0 ? (
+                      {property.thumbnail_url ? (
                         <img
-                          src={property.images[0]}
+                          src={property.thumbnail_url}
                           alt={property.location}
                           className="w-full h-40 sm:h-56 object-cover group-hover:scale-105 transition-transform duration-300"
                         />
@@ -1781,7 +1809,7 @@ export default function HomePage() {
                         />
                       </div>
                       {/* Evaluation Badge */}
-                      {property.evaluation_report && (
+                      {property.has_evaluation && (
                         <div className="absolute bottom-2 left-2 bg-emerald-500 text-white text-xs font-semibold px-2 py-1 rounded-full">
                           Evaluated
                         </div>
@@ -279,6 +279,10 @@ export default function PropertyDetailPage() {
         setProperty((prev) => prev ? { ...prev, rp_data_report: data.text } : null);
         toast.success("RP Data report added successfully!");
       }
+      // Digest the report now so evaluations don't have to process the full text
+      axios.post(`/api/properties/${propertyId}/rp-data-digest`).catch((error) => {
+        console.error("Error digesting RP Data report:", error);
+      });
       setShowRpDataModal(false);
     } catch (error: any) {
       toast.error(error.response?.data?.detail || "Failed to upload RP Data");
@@ -295,7 +299,8 @@ export default function PropertyDetailPage() {
       // Use backend's property update endpoint to clear the fields
       await axios.patch(`${API}/properties/${propertyId}`, {
         rp_data_report: null,
-        rp_data_upload_date: null
+        rp_data_upload_date: null,
+        rp_data_digest: null
       });
       setProperty((prev) => prev ? { ...prev, rp_data_report: null, rp_data_upload_date: null } : null);
       toast.success("RP Data report cleared!");
@@ -55,6 +55,7 @@ export default function QuickEvaluationPage() {
   const [loading, setLoading] = useState(false);
   const [stage, setStage] = useState<EvaluationStage>('idle');
   const [result, setResult] = useState<EvaluationResult | null>(null);
+  const [partialReport, setPartialReport] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [uploadedImages, setUploadedImages] = useState<string[]>([]);
   const [saving, setSaving] = useState(false);
@@ -169,7 +170,7 @@ export default function QuickEvaluationPage() {
     const loadingToast = toast.loading(`Uploading ${files.length} image${files.length > 1 ? 's' : ''}...`);
 
     try {
-      // Upload to Azure Blob Storage
+      // Upload to the image store (GridFS via /api/upload)
       const formData = new FormData();
       Array.from(files).forEach((file) => formData.append('files', file));
 
@@ -201,15 +202,16 @@ export default function QuickEvaluationPage() {
   };
 
   const pollForResult = async (jobId: string) => {
-    const maxAttempts = 60; // 2 minutes max
+    const maxAttempts = 200; // 5 minutes max, including time spent queued behind other jobs
     let attempts = 0;
 
     while (attempts < maxAttempts) {
       try {
-        const response = await axios.get(`${API}/evaluate-quick/${jobId}/status`);
-        const { status, stage: currentStage, result: jobResult, error: jobError } = response.data;
+        const response = await axios.get(`/api/evaluate-quick/${jobId}/status`);
+        const { status, stage: currentStage, result: jobResult, error: jobError, partial_report: jobPartial } = response.data;
 
         setStage(currentStage);
+        if (jobPartial) setPartialReport(jobPartial);
 
         if (status === 'completed' && jobResult) {
           setResult(jobResult);
@@ -255,6 +257,7 @@ export default function QuickEvaluationPage() {
     setLoading(true);
     setError(null);
     setResult(null);
+    setPartialReport(null);
     setStage('queued');
 
     try {
@@ -270,7 +273,7 @@ export default function QuickEvaluationPage() {
         images: uploadedImages
       };
 
-      const response = await axios.post(`${API}/evaluate-quick`, payload);
+      const response = await axios.post(`/api/evaluate-quick`, payload);
 
       if (response.data.success && response.data.job_id) {
         toast.info("Evaluation started...");
@@ -604,6 +607,24 @@ export default function QuickEvaluationPage() {
                 </div>
               )}
 
+              {loading && partialReport && (
+                <div style={{
+                  marginBottom: "1rem",
+                  padding: "1rem",
+                  background: "#f8fafc",
+                  borderRadius: "12px",
+                  border: "1px solid #e2e8f0",
+                  whiteSpace: "pre-wrap",
+                  fontSize: "0.9rem",
+                  lineHeight: 1.6,
+                  color: "#334155",
+                  maxHeight: "400px",
+                  overflowY: "auto"
+                }}>
+                  {partialReport}
+                </div>
+              )}
+
               {error && (
                 <div style={{
                   display: "flex",
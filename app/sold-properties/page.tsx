@@ -5,6 +5,7 @@ import { useRouter } from 'next/navigation';
 import Link from 'next/link';
 import { usePageView } from '@/hooks/useAudit';
 import { API } from '@/lib/config';
+import { thumbnailSrc } from '@/lib/imageUrls';
 
 interface SoldProperty {
   id: string;
@@ -340,7 +341,7 @@ export default function SoldPropertiesPage() {
                 <div style={{
                   height: '180px',
                   background: property.images?.[0]
-                    ? `url(${property.images[0]}) center/cover`
+                    ? `url(${thumbnailSrc(property.images[0])}) center/cover`
                     : 'linear-gradient(135deg, #e0e0e0 0%, #c0c0c0 100%)',
                   position: 'relative'
                 }}>
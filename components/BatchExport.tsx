@@ -13,6 +13,11 @@ interface Property {
   price?: number | null;
   evaluation_report?: string | null;
   evaluation_date?: string | null;
+  has_evaluation?: boolean; // Set by the property listing in place of evaluation_report
+}
+
+function isEvaluated(property: Property): boolean {
+  return !!(property.evaluation_report || property.has_evaluation);
 }
 
 interface BatchExportProps {
@@ -22,14 +27,14 @@ interface BatchExportProps {
 
 export default function BatchExport({ properties, onClose }: BatchExportProps) {
   const [selectedIds, setSelectedIds] = useState<string[]>(
-    properties.filter(p => p.evaluation_report).map(p => p.id)
+    properties.filter(isEvaluated).map(p => p.id)
   );
   const [exporting, setExporting] = useState(false);
   const [exportProgress, setExportProgress] = useState(0);
   const [error, setError] = useState<string | null>(null);
 
-  const propertiesWithEval = properties.filter(p => p.evaluation_report);
-  const propertiesWithoutEval = properties.filter(p => !p.evaluation_report);
+  const propertiesWithEval = properties.filter(isEvaluated);
+  const propertiesWithoutEval = properties.filter(p => !isEvaluated(p));
 
   const toggleSelect = (id: string) => {
     setSelectedIds(prev =>
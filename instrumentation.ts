@@ -0,0 +1,9 @@
+// Server startup hook (Next.js instrumentation)
+
+export async function register() {
+  // The index plan needs the Node.js MongoDB driver; builds are not awaited so startup is not held up
+  if (process.env.NEXT_RUNTIME === 'nodejs' && process.env.MONGO_URL) {
+    const { ensureAllIndexes } = await import('@/lib/indexPlan');
+    void ensureAllIndexes();
+  }
+}
@@ -0,0 +1,163 @@
+// Comparable demand per suburb/property type
+// Every comparable fetch records its area and whether it was answered from warm stored
+// sales. Each area keeps a demand score that decays with a half-life, so the prefetch
+// scheduler (lib/prefetchScheduler.ts) favours areas evaluated often and recently.
+// Stored in the `sales_area_demand` MongoDB collection (in-memory when MONGO_URL is not set).
+
+import { Collection } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { SalesArea, areaKey } from '@/lib/salesStore';
+import { envFloat } from '@/lib/env';
+
+const HALF_LIFE_MS = envFloat('PREFETCH_DEMAND_HALF_LIFE_DAYS', 14, 0.01) * 24 * 60 * 60 * 1000;
+
+export interface AreaDemand {
+  area_key: string;
+  suburb: string;
+  state: string;
+  postcode: string | null;
+  property_type: string | null;
+  // Decayed request count as of last_requested_at
+  score: number;
+  requests: number;
+  warm_hits: number;
+  last_requested_at: Date;
+}
+
+export interface CoverageStats {
+  requests: number;
+  warm_hits: number;
+  coverage: number;
+}
+
+/**
+ * Demand score decayed to `now`
+ */
+export function currentScore(demand: AreaDemand, now: number = Date.now()): number {
+  return demand.score * Math.pow(0.5, (now - new Date(demand.last_requested_at).getTime()) / HALF_LIFE_MS);
+}
+
+function coverage(requests: number, warmHits: number): CoverageStats {
+  return { requests, warm_hits: warmHits, coverage: requests > 0 ? Math.round((warmHits / requests) * 1000) / 1000 : 0 };
+}
+
+interface DemandStore {
+  record(area: SalesArea, warm: boolean, now: Date): Promise<void>;
+  // Areas by score as of their last request (callers re-rank with currentScore)
+  top(limit: number): Promise<AreaDemand[]>;
+  totals(): Promise<{ requests: number; warm_hits: number }>;
+}
+
+class MongoDemandStore implements DemandStore {
+  private async collection(): Promise<Collection<AreaDemand>> {
+    const collection = (await getDb()).collection<AreaDemand>('sales_area_demand');
+    await ensureIndexes('sales_area_demand');
+    return collection;
+  }
+
+  async record(area: SalesArea, warm: boolean, now: Date) {
+    // Pipeline update: decay the stored score to now, then count this request
+    const decay = { $pow: [0.5, { $divide: [{ $subtract: [now, { $ifNull: ['$last_requested_at', now] }] }, HALF_LIFE_MS] }] };
+    await (await this.collection()).updateOne(
+      { area_key: areaKey(area) },
+      [{
+        $set: {
+          suburb: area.suburb,
+          state: area.state,
+          postcode: area.postcode,
+          property_type: area.propertyType,
+          score: { $add: [{ $multiply: [{ $ifNull: ['$score', 0] }, decay] }, 1] },
+          requests: { $add: [{ $ifNull: ['$requests', 0] }, 1] },
+          warm_hits: { $add: [{ $ifNull: ['$warm_hits', 0] }, warm ? 1 : 0] },
+          last_requested_at: now
+        }
+      }],
+      { upsert: true }
+    );
+  }
+
+  async top(limit: number) {
+    return (await this.collection()).find({}, { projection: { _id: 0 } }).sort({ score: -1 }).limit(limit).toArray();
+  }
+
+  async totals() {
+    const [row] = await (await this.collection()).aggregate<{ requests: number; warm_hits: number }>([
+      { $group: { _id: null, requests: { $sum: '$requests' }, warm_hits: { $sum: '$warm_hits' } } }
+    ]).toArray();
+    return row ?? { requests: 0, warm_hits: 0 };
+  }
+}
+
+// Local stand-in when MongoDB is not configured (lost on restart)
+class MemoryDemandStore implements DemandStore {
+  private areas = new Map<string, AreaDemand>();
+
+  async record(area: SalesArea, warm: boolean, now: Date) {
+    const key = areaKey(area);
+    const existing = this.areas.get(key);
+    this.areas.set(key, {
+      area_key: key,
+      suburb: area.suburb,
+      state: area.state,
+      postcode: area.postcode,
+      property_type: area.propertyType,
+      score: (existing ? currentScore(existing, now.getTime()) : 0) + 1,
+      requests: (existing?.requests ?? 0) + 1,
+      warm_hits: (existing?.warm_hits ?? 0) + (warm ? 1 : 0),
+      last_requested_at: now
+    });
+  }
+
+  async top(limit: number) {
+    return [...this.areas.values()].sort((a, b) => b.score - a.score).slice(0, limit);
+  }
+
+  async totals() {
+    let requests = 0;
+    let warmHits = 0;
+    for (const area of this.areas.values()) {
+      requests += area.requests;
+      warmHits += area.warm_hits;
+    }
+    return { requests, warm_hits: warmHits };
+  }
+}
+
+const store: DemandStore = isMongoConfigured() ? new MongoDemandStore() : new MemoryDemandStore();
+// Since this instance started
+const instanceTotals = { requests: 0, warm_hits: 0 };
+
+/**
+ * Count a comparable fetch for an area; `warm` when it was answered from stored sales
+ */
+export function recordAreaDemand(area: SalesArea, warm: boolean) {
+  instanceTotals.requests++;
+  if (warm) instanceTotals.warm_hits++;
+  store.record(area, warm, new Date()).catch(error => {
+    console.log(`[Area Demand] Could not record demand for ${areaKey(area)}: ${error}`);
+  });
+}
+
+/**
+ * Areas in order of current (decayed) demand
+ * Over-fetches by stored score, since decay can reorder areas last requested at different times
+ */
+export async function topDemandAreas(limit: number): Promise<AreaDemand[]> {
+  const now = Date.now();
+  return (await store.top(limit * 3))
+    .map(area => ({ ...area, score: currentScore(area, now) }))
+    .sort((a, b) => b.score - a.score)
+    .slice(0, limit);
+}
+
+/**
+ * Fraction of comparable fetches served from warm stored sales, overall and for this instance
+ */
+export async function comparablesCoverage(): Promise<{ overall: CoverageStats; instance: CoverageStats }> {
+  const totals = await store.totals();
+  return {
+    overall: coverage(totals.requests, totals.warm_hits),
+    instance: coverage(instanceTotals.requests, instanceTotals.warm_hits)
+  };
+}
@@ -0,0 +1,396 @@
+// Batch evaluation for portfolios
+// A batch queues one job per property on the `batch` lane, where the worker pool bounds
+// concurrency and interactive evaluations always go first. Items are queued area by
+// area: each suburb's sold sales are warmed in the sales store once, so every evaluation
+// in that suburb reads its comparables from the store instead of scraping again.
+// Batches live in the `evaluation_batches` MongoDB collection (in-memory when
+// MONGO_URL is not set).
+
+import { Collection } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { getJobs, runWorkers, submitJob } from '@/lib/evaluationJobs';
+import type { EvaluationJob, JobStatus } from '@/lib/jobQueue';
+import { getPropertyTypeFilter, parseLocation, warmSalesArea } from '@/lib/comparables';
+import { SalesArea, areaKey } from '@/lib/salesStore';
+import {
+  QuickEvaluationInput,
+  parseQuickEvaluationInput,
+  quickEvaluationCache,
+  quickEvaluationCacheKey,
+  quickEvaluationKey
+} from '@/lib/quickEvaluation';
+import type { SendEvent } from '@/lib/sse';
+import type { Property } from '@/lib/types';
+import { envInt } from '@/lib/env';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+
+export const MAX_BATCH_SIZE = envInt('BATCH_EVALUATION_MAX_SIZE', 500);
+// Areas warmed (and property lookups made) at the same time while queueing
+const QUEUE_CONCURRENCY = envInt('BATCH_QUEUE_CONCURRENCY', 4);
+const STREAM_POLL_MS = 2000;
+
+export interface BatchItem {
+  index: number;
+  kind: 'property' | 'spec';
+  property_id: string | null;
+  spec: QuickEvaluationInput | null;
+  label: string;
+  area_key: string | null;
+  // Null until the item's area has been warmed and its job queued
+  job_id: string | null;
+}
+
+export interface EvaluationBatch {
+  batch_id: string;
+  items: BatchItem[];
+  created_at: Date;
+  queued_at: Date | null;
+}
+
+export type BatchItemStatus = JobStatus | 'waiting';
+
+export interface BatchProgress {
+  batch_id: string;
+  total: number;
+  waiting: number;
+  queued: number;
+  running: number;
+  completed: number;
+  failed: number;
+  percent: number;
+  done: boolean;
+  areas: number;
+  elapsed_ms: number;
+}
+
+export interface BatchItemState {
+  index: number;
+  kind: BatchItem['kind'];
+  property_id: string | null;
+  label: string;
+  job_id: string | null;
+  status: BatchItemStatus;
+  stage: string;
+  error: string | null;
+  cache_status: EvaluationJob['cache_status'];
+}
+
+export class BatchRequestError extends Error {}
+
+interface ItemAssignment {
+  index: number;
+  job_id: string;
+  label: string;
+  area_key: string | null;
+}
+
+interface BatchStore {
+  insert(batch: EvaluationBatch): Promise<void>;
+  get(batchId: string): Promise<EvaluationBatch | null>;
+  assign(batchId: string, assignments: ItemAssignment[]): Promise<void>;
+  markQueued(batchId: string, queuedAt: Date): Promise<void>;
+}
+
+class MongoBatchStore implements BatchStore {
+  private async collection(): Promise<Collection<EvaluationBatch>> {
+    const collection = (await getDb()).collection<EvaluationBatch>('evaluation_batches');
+    await ensureIndexes('evaluation_batches');
+    return collection;
+  }
+
+  async insert(batch: EvaluationBatch) {
+    await (await this.collection()).insertOne({ ...batch });
+  }
+
+  async get(batchId: string) {
+    return (await this.collection()).findOne({ batch_id: batchId }, { projection: { _id: 0 } });
+  }
+
+  async assign(batchId: string, assignments: ItemAssignment[]) {
+    if (assignments.length === 0) return;
+    const set: Record<string, unknown> = {};
+    for (const { index, job_id, label, area_key } of assignments) {
+      set[`items.${index}.job_id`] = job_id;
+      set[`items.${index}.label`] = label;
+      set[`items.${index}.area_key`] = area_key;
+    }
+    await (await this.collection()).updateOne({ batch_id: batchId }, { $set: set });
+  }
+
+  async markQueued(batchId: string, queuedAt: Date) {
+    await (await this.collection()).updateOne({ batch_id: batchId }, { $set: { queued_at: queuedAt } });
+  }
+}
+
+// Local stand-in when MongoDB is not configured (batches do not survive a restart)
+class MemoryBatchStore implements BatchStore {
+  private batches = new Map<string, EvaluationBatch>();
+
+  async insert(batch: EvaluationBatch) {
+    this.batches.set(batch.batch_id, structuredClone(batch));
+  }
+
+  async get(batchId: string) {
+    const batch = this.batches.get(batchId);
+    return batch ? structuredClone(batch) : null;
+  }
+
+  async assign(batchId: string, assignments: ItemAssignment[]) {
+    const batch = this.batches.get(batchId);
+    for (const { index, ...assignment } of assignments) {
+      if (batch?.items[index]) Object.assign(batch.items[index], assignment);
+    }
+  }
+
+  async markQueued(batchId: string, queuedAt: Date) {
+    const batch = this.batches.get(batchId);
+    if (batch) batch.queued_at = queuedAt;
+  }
+}
+
+const store: BatchStore = isMongoConfigured() ? new MongoBatchStore() : new MemoryBatchStore();
+// Batches this instance is currently queueing
+const queueing = new Set<string>();
+
+/**
+ * Normalise a batch request body: `property_ids` (saved properties) and/or
+ * `properties` (inline specs, as for a quick evaluation)
+ * Saved properties are charged to their stored agency and inline specs to the unassigned budget
+ * Throws BatchRequestError when the body is invalid
+ */
+export function parseBatchRequest(body: any): { property_ids: string[]; specs: QuickEvaluationInput[] } {
+  const propertyIds = body?.property_ids ?? [];
+  const specs = body?.properties ?? [];
+  if (!Array.isArray(propertyIds) || !propertyIds.every(id => typeof id === 'string' && id)) {
+    throw new BatchRequestError('property_ids must be a list of property ids');
+  }
+  if (!Array.isArray(specs)) {
+    throw new BatchRequestError('properties must be a list of property specs');
+  }
+  const total = propertyIds.length + specs.length;
+  if (total === 0) throw new BatchRequestError('property_ids or properties is required');
+  if (total > MAX_BATCH_SIZE) throw new BatchRequestError(`A batch can hold at most ${MAX_BATCH_SIZE} properties`);
+
+  return {
+    property_ids: [...new Set(propertyIds as string[])],
+    specs: specs.map((spec: any, i: number) => {
+      try {
+        return parseQuickEvaluationInput(spec);
+      } catch (error) {
+        throw new BatchRequestError(`properties[${i}]: ${error instanceof Error ? error.message : 'invalid'}`);
+      }
+    })
+  };
+}
+
+function salesArea(location: string, propertyType: string | null | undefined): SalesArea {
+  const { suburb, state, postcode } = parseLocation(location);
+  return { suburb, state, postcode, propertyType: propertyType ? getPropertyTypeFilter(propertyType) : null };
+}
+
+export async function createBatch(request: ReturnType<typeof parseBatchRequest>): Promise<EvaluationBatch> {
+  const items: BatchItem[] = [
+    ...request.property_ids.map(propertyId => ({
+      kind: 'property' as const, property_id: propertyId, spec: null, label: propertyId, area_key: null
+    })),
+    ...request.specs.map(spec => ({
+      kind: 'spec' as const, property_id: null, spec, label: spec.location,
+      area_key: areaKey(salesArea(spec.location, spec.property_type))
+    }))
+  ].map((item, index) => ({ ...item, index, job_id: null }));
+
+  const batch: EvaluationBatch = {
+    batch_id: crypto.randomUUID(),
+    items,
+    created_at: new Date(),
+    queued_at: null
+  };
+  await store.insert(batch);
+  console.log(`[Batch] Created batch ${batch.batch_id} with ${items.length} properties`);
+  return batch;
+}
+
+export async function getBatch(batchId: string): Promise<EvaluationBatch | null> {
+  return store.get(batchId);
+}
+
+/**
+ * Run `task` over `items` with at most `limit` in flight
+ */
+async function forEachLimit<T>(items: T[], limit: number, task: (item: T) => Promise<void>) {
+  let next = 0;
+  const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+    while (next < items.length) {
+      await task(items[next++]);
+    }
+  });
+  await Promise.all(workers);
+}
+
+async function submitItem(batch: EvaluationBatch, item: BatchItem): Promise<string> {
+  if (item.property_id) {
+    // Same key as an async single evaluation, so a property already being evaluated is not run twice;
+    // finished evaluations are not reused because the property may have changed since
+    const { job } = await submitJob(
+      'batch', { batch_id: batch.batch_id, property_id: item.property_id }, `full:${item.property_id}`, { reuseCompleted: false }
+    );
+    return job.job_id;
+  }
+
+  const spec = item.spec!;
+  const cacheKey = await quickEvaluationCacheKey(spec);
+  const payload = { batch_id: batch.batch_id, spec, cache_key: cacheKey };
+  const cached = quickEvaluationCache.get(cacheKey);
+  const { job } = cached
+    ? await submitJob('batch', payload, null, { cacheStatus: 'hit', result: cached })
+    : await submitJob('batch', payload, await quickEvaluationKey(spec), { cacheStatus: 'miss' });
+  return job.job_id;
+}
+
+/**
+ * Queue every item that has no job yet, one area at a time, and run the workers
+ * Resolves when the queue drains, so routes can keep the instance alive with after()
+ */
+export async function queueBatch(batchId: string): Promise<void> {
+  if (queueing.has(batchId)) return;
+  queueing.add(batchId);
+  try {
+    const batch = await store.get(batchId);
+    if (!batch) return;
+    const pending = batch.items.filter(item => !item.job_id);
+    if (pending.length === 0) return;
+    const started = performance.now();
+
+    // Saved properties are looked up once to find their area
+    const areas = new Map<string, { area: SalesArea | null; items: { item: BatchItem; label: string }[] }>();
+    await forEachLimit(pending, QUEUE_CONCURRENCY, async item => {
+      let area: SalesArea | null = item.spec ? salesArea(item.spec.location, item.spec.property_type) : null;
+      let label = item.label;
+      if (item.property_id) {
+        try {
+          const response = await fetch(`${BACKEND_URL}/api/properties/${item.property_id}`);
+          if (response.ok) {
+            const property: Property = await response.json();
+            area = salesArea(property.location, property.property_type);
+            label = property.location;
+          }
+        } catch (error) {
+          console.log(`[Batch] Could not look up property ${item.property_id}: ${error}`);
+        }
+      }
+      const key = area ? areaKey(area) : `unknown:${item.index}`;
+      const group = areas.get(key) ?? { area, items: [] };
+      group.items.push({ item, label });
+      areas.set(key, group);
+    });
+
+    let warmed = 0;
+    await forEachLimit([...areas.entries()], QUEUE_CONCURRENCY, async ([key, group]) => {
+      if (group.area) {
+        try {
+          if (await warmSalesArea(group.area) === 'refreshed') warmed++;
+        } catch (error) {
+          // Evaluations in this area fall back to fetching their own comparables
+          console.log(`[Batch] Could not warm ${key}: ${error}`);
+        }
+      }
+      const assignments: ItemAssignment[] = [];
+      for (const { item, label } of group.items) {
+        assignments.push({ index: item.index, job_id: await submitItem(batch, item), label, area_key: group.area ? key : null });
+      }
+      await store.assign(batchId, assignments);
+      // Start on this area while the next ones are warmed
+      void runWorkers();
+    });
+
+    await store.markQueued(batchId, new Date());
+    console.log(
+      `[Batch] Queued ${pending.length} properties in ${areas.size} areas (${warmed} scraped, ` +
+      `${areas.size - warmed} from the sales store) in ${Math.round(performance.now() - started)}ms`
+    );
+  } finally {
+    queueing.delete(batchId);
+  }
+  await runWorkers();
+}
+
+/**
+ * Keep a batch moving: finish queueing items left behind by another instance, or run workers
+ */
+export function resumeBatch(batch: EvaluationBatch): Promise<void> {
+  return batch.items.some(item => !item.job_id) ? queueBatch(batch.batch_id) : runWorkers();
+}
+
+/**
+ * Aggregate progress and per-item state
+ */
+export async function batchStatus(batch: EvaluationBatch): Promise<{ progress: BatchProgress; items: BatchItemState[]; jobs: Map<string, EvaluationJob> }> {
+  const jobs = new Map((await getJobs(batch.items.flatMap(item => item.job_id ?? []))).map(job => [job.job_id, job]));
+  const items = batch.items.map(item => {
+    const job = item.job_id ? jobs.get(item.job_id) : undefined;
+    return {
+      index: item.index,
+      kind: item.kind,
+      property_id: item.property_id,
+      label: item.label,
+      job_id: item.job_id,
+      status: job?.status ?? 'waiting',
+      stage: job?.stage ?? 'waiting',
+      error: job?.error ?? null,
+      cache_status: job?.cache_status ?? null
+    };
+  });
+
+  const count = (status: BatchItemStatus) => items.filter(item => item.status === status).length;
+  const finished = count('completed') + count('failed');
+  return {
+    progress: {
+      batch_id: batch.batch_id,
+      total: items.length,
+      waiting: count('waiting'),
+      queued: count('queued'),
+      running: count('running'),
+      completed: count('completed'),
+      failed: count('failed'),
+      percent: Math.round((finished / items.length) * 100),
+      done: finished === items.length,
+      areas: new Set(batch.items.map(item => item.area_key).filter(Boolean)).size,
+      elapsed_ms: Date.now() - new Date(batch.created_at).getTime()
+    },
+    items,
+    jobs
+  };
+}
+
+/**
+ * Stream `progress` whenever the counts change and a `result` for each item as it finishes,
+ * then `completed` once every item has finished
+ */
+export async function followBatch(batchId: string, send: SendEvent, signal: AbortSignal): Promise<void> {
+  const sent = new Set<number>();
+  let lastProgress = '';
+  while (!signal.aborted) {
+    const batch = await store.get(batchId);
+    if (!batch) throw new Error('Batch not found');
+    const { progress, items, jobs } = await batchStatus(batch);
+
+    for (const item of items) {
+      if (sent.has(item.index) || (item.status !== 'completed' && item.status !== 'failed')) continue;
+      sent.add(item.index);
+      send('result', { ...item, result: item.status === 'completed' ? jobs.get(item.job_id!)?.result ?? null : null });
+    }
+
+    const { elapsed_ms, ...counts } = progress;
+    if (JSON.stringify(counts) !== lastProgress) {
+      lastProgress = JSON.stringify(counts);
+      send('progress', progress);
+    }
+    if (progress.done) {
+      send('completed', progress);
+      return;
+    }
+    await new Promise(resolve => setTimeout(resolve, STREAM_POLL_MS));
+  }
+}
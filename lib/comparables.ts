@@ -0,0 +1,576 @@
+// Comparable sales: location parsing, sourcing, similarity ranking and statistics
+
+import { Property } from '@/lib/types';
+import { SalesArea, areaKey, getSalesNear, getStoredSales, recordSales, saleKey } from '@/lib/salesStore';
+import { haversineKm } from '@/lib/geoIndex';
+import { recordAreaDemand } from '@/lib/areaDemand';
+import { HOMELY_LISTINGS_PATH, extractNextDataArray } from '@/lib/nextData';
+import { SourceGuard, SourceHttpError, isSourceFault, parseRetryAfter, sourceGuard } from '@/lib/sourceGuard';
+import { singleFlight } from '@/lib/singleFlight';
+import { getHistoricSales } from '@/lib/historicSalesCache';
+import { scoreColumns, toColumns, topK } from '@/lib/similarity';
+import { envInt, envFloat } from '@/lib/env';
+
+// Per-source deadlines; a slow source is dropped and the others' results are used
+export const HOMELY_DEADLINE_MS = envInt('COMPARABLES_HOMELY_DEADLINE_MS', 20000);
+const SALES_CACHE_DEADLINE_MS = envInt('COMPARABLES_CACHE_DEADLINE_MS', 5000);
+const STORE_DEADLINE_MS = 2000;
+// Sales within this distance of a geocoded property are candidates regardless of suburb
+const COMPARABLE_RADIUS_KM = envFloat('COMPARABLE_RADIUS_KM', 3);
+// Staleness budget: areas refreshed more recently than this are served from the sales store
+export const STORE_MAX_AGE_MS = envInt('COMPARABLES_MAX_AGE_MS', 3 * 24 * 60 * 60 * 1000);
+
+const HOMELY_SOURCE = 'Homely.com.au (live)';
+// Shared by every Homely scrape in this instance (comparables, prefetch, historic sales)
+export const homelyGuard = sourceGuard(HOMELY_SOURCE, {
+  ratePerMin: envInt('HOMELY_RATE_PER_MIN', 20),
+  burst: envInt('HOMELY_RATE_BURST', 5)
+});
+const salesCacheGuard = sourceGuard('historic-sales-cache');
+const sourceFlights = singleFlight<SourceOutcome<unknown>>('comparable-sources');
+
+// Sold property from scraping
+export interface SoldProperty {
+  id: string;
+  address: string;
+  price: number;
+  beds: number | null;
+  baths: number | null;
+  cars: number | null;
+  land_area: number | null;
+  property_type: string;
+  sold_date: string;
+  sold_date_raw?: Date | null;
+  source: string;
+  latitude?: number | null;
+  longitude?: number | null;
+  distance_km?: number;
+  similarity_score?: number;
+}
+
+// How one comparable source performed during a fetch
+export interface ComparableSourceReport {
+  source: string;
+  // `skipped` when the source's circuit breaker or rate limiter held the request back
+  status: 'ok' | 'empty' | 'timeout' | 'error' | 'skipped';
+  count: number;
+  duration_ms: number;
+  error?: string;
+}
+
+interface ComparableSource<T = SoldProperty> {
+  name: string;
+  deadlineMs: number;
+  fetch: (signal: AbortSignal) => Promise<T[]>;
+  guard?: SourceGuard;
+  // Whether a fetch error counts against the guard (default isSourceFault)
+  isFault?: (error: unknown) => boolean;
+  // Callers with the same key while a fetch is in flight share it
+  flightKey?: string;
+}
+
+// Map property types to Homely filter values (plural form)
+const PROPERTY_TYPE_TO_FILTER: { [key: string]: string } = {
+  'house': 'houses',
+  'unit': 'units',
+  'apartment': 'apartments',
+  'townhouse': 'townhouses',
+  'villa': 'villas',
+  'land': 'land',
+  'acreage': 'acreage',
+  'rural': 'rural',
+  'rural property': 'rural',
+  'block of units': 'block-of-units',
+};
+
+export function getPropertyTypeFilter(propertyType: string): string {
+  const normalized = propertyType.toLowerCase().trim();
+  return PROPERTY_TYPE_TO_FILTER[normalized] || normalized.replace(/\s+/g, '-');
+}
+
+/**
+ * Parse location to extract suburb, state, postcode
+ */
+export function parseLocation(location: string): { suburb: string; state: string; postcode: string | null } {
+  const parts = location.split(',').map(p => p.trim());
+  let suburb = '';
+  let state = 'qld';
+  let postcode: string | null = null;
+
+  const postcodeMatch = location.match(/\b(\d{4})\b/);
+  if (postcodeMatch) {
+    postcode = postcodeMatch[1];
+  }
+
+  for (const s of ['nsw', 'vic', 'qld', 'sa', 'wa', 'tas', 'nt', 'act']) {
+    const stateRegex = new RegExp(`\\b${s}\\b`, 'i');
+    if (stateRegex.test(location)) {
+      state = s;
+      break;
+    }
+  }
+
+  if (parts.length >= 2) {
+    // Has comma - take the second part (suburb)
+    let suburbPart = parts[1];
+    suburbPart = suburbPart
+      .replace(/\b(NSW|VIC|QLD|SA|WA|TAS|NT|ACT)\b/gi, '')
+      .replace(/\b\d{4}\b/g, '')
+      .trim();
+    suburb = suburbPart.toLowerCase().replace(/\s+/g, '-');
+  } else {
+    // No comma - extract suburb by removing street number, state, and postcode
+    let suburbPart = parts[0]
+      .replace(/^\d+[a-zA-Z]?\s+/, '')  // Remove street number (e.g., "123 " or "45A ")
+      .replace(/\b(street|st|road|rd|avenue|ave|drive|dr|court|ct|place|pl|lane|ln|crescent|cr|way|boulevard|blvd)\b.*/i, '')  // Remove street type and after
+      .replace(/\b(NSW|VIC|QLD|SA|WA|TAS|NT|ACT)\b/gi, '')
+      .replace(/\b\d{4}\b/g, '')
+      .trim();
+    suburb = suburbPart.toLowerCase().replace(/\s+/g, '-');
+  }
+
+  suburb = suburb.replace(/^\d+\s*-*/, '').replace(/-+$/, '').replace(/^-+/, '');
+
+  return { suburb, state, postcode };
+}
+
+// Raw listing object from Homely's page data; each caller maps it to its own sale shape
+export type HomelyListing = Record<string, any>;
+
+// Page text that suggests the scrape was blocked rather than the page layout changing
+const BLOCKED_MARKERS = ['blocked', 'captcha', 'robot', 'Access Denied'];
+
+/**
+ * Homely page had no embedded listing data; carries what the page showed instead
+ */
+export class HomelyPageError extends Error {
+  constructor(readonly blocked: boolean, readonly preview: string, bytesRead: number) {
+    super(`No __NEXT_DATA__ found in ${bytesRead} bytes (${blocked ? 'blocked' : 'blocked or page changed'}). Using proxy: ${!!process.env.SCRAPER_API_KEY}`);
+    this.name = 'HomelyPageError';
+  }
+}
+
+/**
+ * Homely sold-properties page for an area
+ */
+export function homelySoldUrl(area: SalesArea): string {
+  const url = area.postcode
+    ? `https://www.homely.com.au/sold-properties/${area.suburb}-${area.state}-${area.postcode}`
+    : `https://www.homely.com.au/sold-properties/${area.suburb}-${area.state}`;
+  return area.propertyType ? `${url}?propertytype=${area.propertyType}` : url;
+}
+
+/**
+ * Scrape the raw sold listings for an area from Homely.com.au (no caching - returns fresh data)
+ * Uses ScraperAPI proxy if SCRAPER_API_KEY is set (recommended for Vercel deployment)
+ * Throws on a blocked or failed page; fetchHomelyListings decides which of those the circuit breaker counts
+ */
+async function scrapeHomelyListings(area: SalesArea, signal?: AbortSignal): Promise<HomelyListing[]> {
+  const targetUrl = homelySoldUrl(area);
+
+  // Use ScraperAPI proxy if available (bypasses IP blocking on Vercel)
+  const scraperApiKey = process.env.SCRAPER_API_KEY;
+  let fetchUrl: string;
+  let fetchOptions: RequestInit;
+
+  if (scraperApiKey) {
+    fetchUrl = `https://api.scraperapi.com?api_key=${scraperApiKey}&url=${encodeURIComponent(targetUrl)}&render=false&country_code=au`;
+    fetchOptions = {};
+    console.log(`[Comparables] Using ScraperAPI proxy for: ${targetUrl}`);
+  } else {
+    fetchUrl = targetUrl;
+    fetchOptions = {
+      headers: {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-AU,en;q=0.9',
+        'Cache-Control': 'no-cache',
+      }
+    };
+    console.log(`[Comparables] Direct fetch (no proxy): ${targetUrl}`);
+  }
+
+  const response = await fetch(fetchUrl, { ...fetchOptions, signal });
+  if (!response.ok) {
+    throw new SourceHttpError(response.status, parseRetryAfter(response.headers.get('retry-after')));
+  }
+
+  const listings: HomelyListing[] = [];
+  const extract = await extractNextDataArray(response.body, HOMELY_LISTINGS_PATH, (listing: HomelyListing) => {
+    listings.push(listing);
+  }, { watchFor: BLOCKED_MARKERS });
+
+  if (!extract.found) {
+    throw new HomelyPageError(extract.matched.length > 0, extract.preview, extract.bytes_read);
+  }
+  console.log(`[Comparables] Found ${extract.items} listings (read ${extract.bytes_read} bytes)`);
+
+  return listings;
+}
+
+/**
+ * Sale price of a listing, or null when it has no usable price
+ */
+export function homelySalePrice(listing: HomelyListing): number | null {
+  const priceStr = listing.priceDetails?.longDescription ||
+    listing.saleDetails?.soldDetails?.displayPrice?.longDescription || '';
+
+  const cleaned = priceStr.replace(/[$,\s]/g, '');
+  const priceMatch = cleaned.match(/(\d{6,})/);
+  const price = priceMatch ? parseInt(priceMatch[1]) : null;
+  return price && price > 100000 ? price : null;
+}
+
+function toComparableSale(listing: HomelyListing): SoldProperty | null {
+  const price = homelySalePrice(listing);
+  if (!price) return null;
+
+  const soldOn = listing.saleDetails?.soldDetails?.soldOn;
+  const soldDateRaw = soldOn ? new Date(soldOn) : null;
+  const soldDate = soldDateRaw
+    ? soldDateRaw.toLocaleDateString('en-AU', { day: 'numeric', month: 'short', year: 'numeric' })
+    : 'Recently';
+
+  const propType = listing.statusLabels?.propertyTypeDescription || 'House';
+  const landArea = listing.features?.landArea || null;
+  const lat = listing.address?.coordinate?.lat || listing.address?.latitude || listing.coordinate?.lat || null;
+  const lng = listing.address?.coordinate?.lon || listing.address?.coordinate?.lng || listing.address?.longitude ||
+    listing.coordinate?.lon || listing.coordinate?.lng || null;
+
+  return {
+    id: crypto.randomUUID(),
+    address: listing.address?.longAddress || listing.address?.streetAddress || 'Unknown',
+    price,
+    beds: listing.features?.bedrooms || null,
+    baths: listing.features?.bathrooms || null,
+    cars: listing.features?.cars || null,
+    land_area: landArea,
+    property_type: propType,
+    sold_date: soldDate,
+    sold_date_raw: soldDateRaw,
+    source: 'homely.com.au',
+    latitude: lat,
+    longitude: lng
+  };
+}
+
+/**
+ * Read sold properties from the historic-sales cache (populated by the historic-sales route)
+ * Served from the in-process L1 when the suburb is hot, otherwise from the backend store
+ */
+export async function fetchCachedSales(
+  suburb: string,
+  state: string,
+  postcode: string | null,
+  propertyType: string | null
+): Promise<SoldProperty[]> {
+  const { data } = await getHistoricSales({ suburb, state, postcode, propertyType });
+  if (!data) return [];
+  return (data.sales || []).map((sale: any) => ({
+    ...sale,
+    sold_date_raw: sale.sold_date_raw ? new Date(sale.sold_date_raw) : null,
+    source: sale.source || 'homely.com.au'
+  }));
+}
+
+// Outcome of one upstream fetch, shared by every caller coalesced onto it
+export type SourceOutcome<T = SoldProperty> =
+  | { status: 'done'; properties: T[] }
+  | { status: 'skipped'; reason: string; retry_in_ms: number }
+  | { status: 'timeout' }
+  | { status: 'error'; error: string; cause: unknown };
+
+/**
+ * One upstream fetch: guard admission, the source's deadline, and the outcome fed back to the guard
+ */
+async function fetchSource<T>(source: ComparableSource<T>): Promise<SourceOutcome<T>> {
+  const admission = source.guard?.admit();
+  if (admission && !admission.ok) {
+    // Skipped without waiting, so the other sources (or stored sales) answer straight away
+    console.log(`[Comparables] Skipping ${source.name}: ${admission.reason} (retry in ${Math.ceil(admission.retry_in_ms / 1000)}s)`);
+    return { status: 'skipped', reason: admission.reason, retry_in_ms: admission.retry_in_ms };
+  }
+
+  const controller = new AbortController();
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  const deadline = new Promise<null>(resolve => {
+    timer = setTimeout(() => {
+      controller.abort();
+      resolve(null);
+    }, source.deadlineMs);
+  });
+
+  try {
+    const properties = await Promise.race([source.fetch(controller.signal), deadline]);
+    if (properties === null) {
+      console.log(`[Comparables] ${source.name} missed its ${source.deadlineMs}ms deadline`);
+      source.guard?.failed();
+      return { status: 'timeout' };
+    }
+    source.guard?.succeeded();
+    return { status: 'done', properties };
+  } catch (error) {
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    console.log(`[Comparables] ${source.name} failed: ${errorMessage}`);
+    if ((source.isFault ?? isSourceFault)(error)) {
+      source.guard?.failed(error);
+    } else {
+      source.guard?.ignored();
+    }
+    return { status: 'error', error: errorMessage, cause: error };
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+/**
+ * Outcome of a source fetch, joining the fetch already in flight for the same source and area
+ */
+function coalescedFetch<T>(source: ComparableSource<T>): Promise<SourceOutcome<T>> {
+  return (source.flightKey
+    ? sourceFlights.run(source.flightKey, () => fetchSource(source))
+    : fetchSource(source)) as Promise<SourceOutcome<T>>;
+}
+
+/**
+ * Raw Homely listings for an area
+ * Comparables, the prefetcher and the historic-sales route all go through here, so concurrent
+ * requests for the same page share one scrape (and one deadline) whoever made them
+ */
+export function fetchHomelyListings(area: SalesArea): Promise<SourceOutcome<HomelyListing>> {
+  return coalescedFetch({
+    name: HOMELY_SOURCE,
+    deadlineMs: HOMELY_DEADLINE_MS,
+    guard: homelyGuard,
+    // A page without listing data only counts when it looked blocked, not when the suburb page changed or is empty
+    isFault: error => error instanceof HomelyPageError ? error.blocked : isSourceFault(error),
+    flightKey: `homely|${areaKey(area)}`,
+    fetch: signal => scrapeHomelyListings(area, signal)
+  });
+}
+
+type SourceResult = { properties: SoldProperty[]; report: ComparableSourceReport };
+
+function sourceResult(name: string, started: number, outcome: SourceOutcome): SourceResult {
+  const report = (status: ComparableSourceReport['status'], count: number, error?: string): ComparableSourceReport => ({
+    source: name,
+    status,
+    count,
+    duration_ms: Math.round(performance.now() - started),
+    ...(error && { error })
+  });
+
+  switch (outcome.status) {
+    case 'done':
+      // Each caller gets its own array; callers may tag or reorder their copy
+      return { properties: [...outcome.properties], report: report(outcome.properties.length > 0 ? 'ok' : 'empty', outcome.properties.length) };
+    case 'skipped':
+      return { properties: [], report: report('skipped', 0, outcome.reason) };
+    case 'timeout':
+      return { properties: [], report: report('timeout', 0) };
+    case 'error':
+      return { properties: [], report: report('error', 0, outcome.error) };
+  }
+}
+
+async function runSource(source: ComparableSource): Promise<SourceResult> {
+  const started = performance.now();
+  // Concurrent callers for the same source and area share one upstream fetch (and its deadline)
+  return sourceResult(source.name, started, await coalescedFetch(source));
+}
+
+async function runHomely(area: SalesArea): Promise<SourceResult> {
+  const started = performance.now();
+  const outcome = await fetchHomelyListings(area);
+  return sourceResult(HOMELY_SOURCE, started, outcome.status === 'done'
+    ? { status: 'done', properties: outcome.properties.flatMap(listing => toComparableSale(listing) ?? []) }
+    : outcome);
+}
+
+function dedupeSales(lists: SoldProperty[][]): SoldProperty[] {
+  const seen = new Set<string>();
+  const properties: SoldProperty[] = [];
+  for (const list of lists) {
+    for (const property of list) {
+      const key = saleKey(property);
+      if (seen.has(key)) continue;
+      seen.add(key);
+      properties.push(property);
+    }
+  }
+  return properties;
+}
+
+/**
+ * Fetch sold properties for comparables
+ * Areas refreshed within the staleness budget are answered from the sales store
+ * without any network scraping. Otherwise every source is queried concurrently,
+ * each with its own deadline, so total latency is bounded by the slowest source
+ * within its deadline; sources that miss it contribute nothing, and sources whose
+ * circuit breaker is open are skipped without being called. A successful
+ * live scrape is merged into the store in the background.
+ * Sales reported by more than one source are kept once (first source wins).
+ */
+export async function fetchComparableSales(
+  suburb: string,
+  state: string,
+  postcode: string | null,
+  propertyType: string | null,
+  maxAgeMs: number = STORE_MAX_AGE_MS
+): Promise<{ properties: SoldProperty[]; sources: ComparableSourceReport[]; fetch_ms: number }> {
+  const started = performance.now();
+  const area: SalesArea = { suburb, state, postcode, propertyType };
+
+  const storeState: { ageMs: number | null } = { ageMs: null };
+  const store = await runSource({
+    name: 'sales-store',
+    deadlineMs: STORE_DEADLINE_MS,
+    fetch: async () => {
+      const stored = await getStoredSales(area);
+      storeState.ageMs = stored.age_ms;
+      return stored.properties;
+    }
+  });
+
+  const finish = (results: { properties: SoldProperty[]; report: ComparableSourceReport }[]) => {
+    const properties = dedupeSales(results.map(r => r.properties));
+    const sourceReports = results.map(r => r.report);
+    const fetchMs = Math.round(performance.now() - started);
+    console.log(`[Comparables] ${properties.length} unique sales in ${fetchMs}ms (${sourceReports.map(r => `${r.source}: ${r.status} ${r.count} in ${r.duration_ms}ms`).join(', ')})`);
+    return { properties, sources: sourceReports, fetch_ms: fetchMs };
+  };
+
+  // Demand and warm coverage feed the prefetch scheduler (lib/prefetchScheduler.ts)
+  const warm = store.properties.length > 0 && storeState.ageMs !== null && storeState.ageMs <= maxAgeMs;
+  recordAreaDemand(area, warm);
+  if (warm) {
+    return finish([store]);
+  }
+
+  const homely = runHomely(area);
+  const cached = runSource({
+    name: 'historic-sales-cache',
+    deadlineMs: SALES_CACHE_DEADLINE_MS,
+    guard: salesCacheGuard,
+    flightKey: `historic-sales-cache|${areaKey(area)}`,
+    fetch: () => fetchCachedSales(suburb, state, postcode, propertyType)
+  });
+  const [homelyResult, cachedResult] = await Promise.all([homely, cached]);
+
+  if (homelyResult.report.status === 'ok') {
+    recordSales(area, dedupeSales([homelyResult.properties, cachedResult.properties])).catch(error => {
+      console.log(`[Comparables] Could not update sales store: ${error}`);
+    });
+  }
+
+  // Stale stored sales still fill in listings that dropped off the first Homely page
+  return finish([homelyResult, cachedResult, ...(store.properties.length > 0 ? [store] : [])]);
+}
+
+/**
+ * Scrape an area and merge newly sold listings into the sales store
+ */
+export async function refreshSalesArea(area: SalesArea): Promise<{ scraped: number; added: number; duration_ms: number }> {
+  const started = performance.now();
+  const { properties, report } = await runHomely(area);
+  if (report.status !== 'ok') {
+    throw new Error(`Scrape ${report.status}${report.error ? ': ' + report.error : ''}`);
+  }
+  const added = await recordSales(area, properties);
+  return { scraped: properties.length, added, duration_ms: Math.round(performance.now() - started) };
+}
+
+/**
+ * Make sure the sales store can answer comparable queries for an area
+ * Scrapes only when the area has no stored sales or they are older than the staleness budget
+ */
+export async function warmSalesArea(area: SalesArea): Promise<'fresh' | 'refreshed'> {
+  const stored = await getStoredSales(area);
+  if (stored.properties.length > 0 && stored.age_ms !== null && stored.age_ms <= STORE_MAX_AGE_MS) {
+    return 'fresh';
+  }
+  await refreshSalesArea(area);
+  return 'refreshed';
+}
+
+/**
+ * Add indexed sales within the comparable radius of a geocoded property
+ * Catches sales just across a suburb boundary, and tags every geocoded candidate with distance_km
+ * `propertyType` is the Homely filter value the per-area fetch used; nearby sales of other types are left out
+ */
+export function withNearbySales(
+  sales: SoldProperty[],
+  latitude: number,
+  longitude: number,
+  propertyType: string | null,
+  radiusKm: number = COMPARABLE_RADIUS_KM
+): SoldProperty[] {
+  const tagged = sales.map(sale => sale.latitude && sale.longitude
+    ? { ...sale, distance_km: Math.round(haversineKm(latitude, longitude, sale.latitude, sale.longitude) * 100) / 100 }
+    : sale);
+  const sameType = propertyType
+    ? (sale: SoldProperty) => getPropertyTypeFilter(sale.property_type || '') === propertyType
+    : undefined;
+  const nearby = getSalesNear(latitude, longitude, radiusKm, sameType);
+  const merged = dedupeSales([tagged, nearby]);
+  if (merged.length > tagged.length) {
+    console.log(`[Comparables] Added ${merged.length - tagged.length} sales within ${radiusKm}km`);
+  }
+  return merged;
+}
+
+/**
+ * Data source label for reports, e.g. "Homely.com.au (live) + historic-sales-cache"
+ */
+export function describeSources(sources: ComparableSourceReport[]): string {
+  return sources.filter(s => s.status === 'ok').map(s => s.source).join(' + ') || 'AI Knowledge';
+}
+
+/**
+ * Find best matching comparable properties
+ * Scores all candidates column-wise and keeps the top `limit` without a full sort
+ */
+export function findBestComparables(
+  targetProperty: Pick<Property, 'beds' | 'baths' | 'size'>,
+  soldProperties: SoldProperty[],
+  limit: number = 10
+): SoldProperty[] {
+  const target = {
+    beds: targetProperty.beds || 3,
+    baths: targetProperty.baths || 2,
+    land_area: targetProperty.size || null
+  };
+
+  const scores = scoreColumns(target, toColumns(soldProperties));
+  return Array.from(topK(scores, limit), i => ({
+    ...soldProperties[i],
+    similarity_score: scores[i]
+  }));
+}
+
+/**
+ * Calculate statistics from comparable properties
+ */
+export function calculateStatistics(properties: SoldProperty[]) {
+  const prices = properties.map(p => p.price).filter(p => p > 0);
+
+  if (prices.length === 0) {
+    return { min: null, max: null, avg: null, median: null };
+  }
+
+  const sorted = [...prices].sort((a, b) => a - b);
+  const median = sorted[Math.floor(sorted.length / 2)];
+  const avg = Math.round(prices.reduce((a, b) => a + b, 0) / prices.length);
+
+  return {
+    min: Math.min(...prices),
+    max: Math.max(...prices),
+    avg,
+    median
+  };
+}
+
+export function formatPrice(price: number | null): string {
+  if (!price) return 'N/A';
+  return '$' + price.toLocaleString();
+}
@@ -0,0 +1,20 @@
+// Numeric settings read from environment variables
+// A missing, non-numeric or out-of-range value falls back to the default instead of
+// becoming NaN, which would silently disable whatever the setting bounds (e.g. a NaN
+// worker count starts no workers at all).
+
+/**
+ * Integer setting, at least `min`
+ */
+export function envInt(name: string, fallback: number, min: number = 1): number {
+  const value = parseInt(process.env[name] || '', 10);
+  return Number.isFinite(value) && value >= min ? value : fallback;
+}
+
+/**
+ * Decimal setting, at least `min`
+ */
+export function envFloat(name: string, fallback: number, min: number = 0): number {
+  const value = parseFloat(process.env[name] || '');
+  return Number.isFinite(value) && value >= min ? value : fallback;
+}
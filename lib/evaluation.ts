@@ -0,0 +1,389 @@
+// Full property evaluation pipeline shared by the evaluate route and the job queue
+
+import type { CompletionUsage } from 'openai/resources/completions';
+import { getOpenAI } from '@/lib/openai';
+import { createDraftWriter, streamReport } from '@/lib/llmStream';
+import { Property, ConfidenceScoring, RpDataDigest, ValuationHistoryEntry } from '@/lib/types';
+import { digestRpReport, formatRpDigest, isDigestCurrent, saveRpDigest } from '@/lib/rpDigest';
+import { EvaluationTracker } from '@/lib/evaluationProgress';
+import { NO_PHOTOS_NOTE, PhotoAnalysis, analysePhotos } from '@/lib/photoAnalysis';
+import { DEFAULT_AGENCY_ID, LlmAdmissionError, LlmCallContext, meteredCall } from '@/lib/llmLedger';
+import { REPORT_MAX_TOKENS, condenseReport, dedupeLines, describePromptBudget, fitPromptSections } from '@/lib/promptBudget';
+import {
+  SoldProperty,
+  calculateStatistics,
+  describeSources,
+  fetchComparableSales,
+  findBestComparables,
+  formatPrice,
+  getPropertyTypeFilter,
+  parseLocation,
+  withNearbySales
+} from '@/lib/comparables';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+
+/**
+ * Calculate confidence scoring
+ */
+export function calculateConfidenceScoring(
+  comparables: SoldProperty[],
+  property: Property
+): ConfidenceScoring {
+  const factors: ConfidenceScoring['factors'] = {
+    comparables_count: { score: 0, weight: 25, description: 'Number of comparables' },
+    data_recency: { score: 80, weight: 20, description: 'Data recency' },
+    location_match: { score: 85, weight: 20, description: 'Location accuracy' },
+    property_similarity: { score: 0, weight: 20, description: 'Property similarity' },
+    price_consistency: { score: 0, weight: 15, description: 'Price consistency' }
+  };
+
+  const recommendations: string[] = [];
+
+  const count = comparables.length;
+  if (count >= 8) factors.comparables_count.score = 100;
+  else if (count >= 5) factors.comparables_count.score = 80;
+  else if (count >= 3) factors.comparables_count.score = 60;
+  else if (count >= 1) factors.comparables_count.score = 40;
+  else {
+    factors.comparables_count.score = 10;
+    recommendations.push('Limited comparable sales data available');
+  }
+
+  if (comparables.length > 0) {
+    const avgSimilarity = comparables.reduce((sum, c) => sum + (c.similarity_score || 0), 0) / comparables.length;
+    factors.property_similarity.score = Math.round(avgSimilarity);
+  }
+
+  const prices = comparables.map(c => c.price);
+  if (prices.length >= 2) {
+    const range = Math.max(...prices) - Math.min(...prices);
+    const avg = prices.reduce((a, b) => a + b, 0) / prices.length;
+    const cv = (range / avg) * 100;
+
+    if (cv < 20) factors.price_consistency.score = 95;
+    else if (cv < 40) factors.price_consistency.score = 75;
+    else if (cv < 60) factors.price_consistency.score = 55;
+    else factors.price_consistency.score = 35;
+  }
+
+  let overallScore = 0;
+  let totalWeight = 0;
+  for (const key of Object.keys(factors) as (keyof typeof factors)[]) {
+    overallScore += factors[key].score * factors[key].weight;
+    totalWeight += factors[key].weight;
+  }
+  overallScore = Math.round(overallScore / totalWeight);
+
+  const level: 'high' | 'medium' | 'low' =
+    overallScore >= 70 ? 'high' : overallScore >= 45 ? 'medium' : 'low';
+
+  return { overall_score: overallScore, level, factors, recommendations };
+}
+
+/**
+ * RP Data prompt section, from the stored digest when it matches the current report
+ * A missing or outdated digest is rebuilt once and saved back to the property;
+ * if digesting fails the report text is used, condensed to its key figures when long
+ */
+async function rpDataPromptSection(
+  propertyId: string,
+  report: string,
+  digest: RpDataDigest | null | undefined,
+  agencyId: string
+): Promise<string> {
+  if (await isDigestCurrent(report, digest)) {
+    console.log(`[Evaluate] Using stored RP Data digest`);
+    return formatRpDigest(digest!);
+  }
+  try {
+    const fresh = await digestRpReport(report, { agency_id: agencyId, endpoint: 'rp-data-digest' });
+    saveRpDigest(propertyId, fresh).catch(error => console.log(`[Evaluate] Could not save RP Data digest: ${error}`));
+    return formatRpDigest(fresh);
+  } catch (error) {
+    if (error instanceof LlmAdmissionError && error.status === 429) throw error;
+    console.log(`[Evaluate] RP Data digest failed, using full report: ${error}`);
+    return `RP DATA PROPERTY REPORT:\n${condenseReport(report, REPORT_MAX_TOKENS)}`;
+  }
+}
+
+/**
+ * Saves the partially generated report on the property as each section starts
+ */
+function draftSaver(propertyId: string): (text: string) => void {
+  return createDraftWriter(async draft => {
+    try {
+      await fetch(`${BACKEND_URL}/api/properties/${propertyId}`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ evaluation_report_draft: draft })
+      });
+    } catch (error) {
+      console.log(`[Evaluate] Could not save report draft: ${error}`);
+    }
+  });
+}
+
+export interface EvaluationOutcome {
+  status: number;
+  body: Record<string, unknown>;
+}
+
+/**
+ * Run the evaluation pipeline, reporting each stage to the tracker
+ */
+export async function runPropertyEvaluation(propertyId: string, tracker: EvaluationTracker): Promise<EvaluationOutcome> {
+  try {
+    // Fetch property from external backend
+    console.log(`[Evaluate] Fetching property ${propertyId} from backend...`);
+    const propertyResponse = await fetch(`${BACKEND_URL}/api/properties/${propertyId}`);
+
+    if (!propertyResponse.ok) {
+      tracker.fail('Property not found');
+      return { status: 404, body: { detail: 'Property not found' } };
+    }
+
+    const property: Property = await propertyResponse.json();
+    console.log(`[Evaluate] Got property: ${property.location}`);
+    const agencyId = property.agency_id || DEFAULT_AGENCY_ID;
+
+    // Photos already analysed (same image bytes) are served from the findings store
+    let photoAnalysis: PhotoAnalysis | null = null;
+    if (property.images && property.images.length > 0) {
+      tracker.startStage('analyzing_photos');
+      photoAnalysis = await analysePhotos(property.images, { agency_id: agencyId, endpoint: 'evaluate-photos' });
+    }
+    const improvementsDetected = photoAnalysis?.improvements_detected ?? NO_PHOTOS_NOTE;
+
+    tracker.startStage('fetching_comparables');
+
+    // Parse location
+    const { suburb, state, postcode } = parseLocation(property.location);
+    const propertyTypeFilter = property.property_type ? getPropertyTypeFilter(property.property_type) : null;
+    console.log(`[Evaluate] Parsed: suburb=${suburb}, state=${state}, postcode=${postcode}, type=${propertyTypeFilter}`);
+
+    // Fetch sold properties from all comparable sources concurrently
+    const fetched = await fetchComparableSales(suburb, state, postcode, propertyTypeFilter);
+    const { sources, fetch_ms } = fetched;
+    const soldProperties = property.latitude && property.longitude
+      ? withNearbySales(fetched.properties, property.latitude, property.longitude, propertyTypeFilter)
+      : fetched.properties;
+
+    // Find best comparables
+    const comparables = findBestComparables(property, soldProperties);
+    console.log(`[Evaluate] Found ${comparables.length} comparable properties`);
+
+    // Calculate statistics
+    const stats = calculateStatistics(comparables);
+    const dataSource = comparables.length > 0 ? describeSources(sources) : 'AI Knowledge';
+
+    // Build comparables text for AI prompt
+    let comparablesText = '';
+    if (comparables.length > 0) {
+      const comparableLines = dedupeLines(comparables.slice(0, 8).map(comp =>
+        `- ${comp.address}: ${formatPrice(comp.price)} | ${comp.beds || 'N/A'} bed, ${comp.baths || 'N/A'} bath${comp.land_area ? ' | ' + comp.land_area + ' m²' : ''} | Sold: ${comp.sold_date} | Similarity: ${comp.similarity_score || 0}%`
+      ));
+      comparablesText = `RECENT COMPARABLE SALES (from ${dataSource}):\n${comparableLines.join('\n')}\n`;
+      comparablesText += `\nMARKET STATISTICS (${comparables.length} comparable properties):\n`;
+      comparablesText += `- Price Range: ${formatPrice(stats.min)} - ${formatPrice(stats.max)}\n`;
+      comparablesText += `- Average Price: ${formatPrice(stats.avg)}\n`;
+      comparablesText += `- Median Price: ${formatPrice(stats.median)}\n`;
+    }
+
+    // Build RP Data report section if available
+    let rpDataSection = '';
+    if (property.rp_data_report) {
+      tracker.startStage('processing_rp_data');
+      rpDataSection = await rpDataPromptSection(propertyId, property.rp_data_report, property.rp_data_digest, agencyId);
+      console.log(`[Evaluate] Including RP Data report`);
+    }
+
+    // Build Additional Report section if available
+    let additionalReportSection = '';
+    if ((property as any).additional_report) {
+      additionalReportSection = `ADDITIONAL PROPERTY REPORT:\n${condenseReport((property as any).additional_report, REPORT_MAX_TOKENS)}`;
+      console.log(`[Evaluate] Including Additional report`);
+    }
+
+    // Build AI prompt
+    const propertyText = `Location: ${property.location}
+Property Type: ${property.property_type || 'Residential'}
+Bedrooms: ${property.beds}
+Bathrooms: ${property.baths}
+Car Parks: ${property.carpark}
+Size: ${property.size ? property.size + ' sqm' : 'Not specified'}
+${(property as any).extra_features ? 'Features: ' + (property as any).extra_features : ''}`;
+
+    const hasRpData = !!property.rp_data_report;
+    const hasAdditionalReport = !!(property as any).additional_report;
+    const hasComparables = comparables.length > 0;
+
+    let dataSourcesNote = '';
+    if (hasRpData || hasAdditionalReport || hasComparables || photoAnalysis) {
+      const sources = [];
+      if (hasComparables) sources.push(`${comparables.length} comparable sales`);
+      if (photoAnalysis) sources.push('photo analysis');
+      if (hasRpData) sources.push('RP Data property report');
+      if (hasAdditionalReport) sources.push('additional property report');
+      dataSourcesNote = `\n\nYou have access to: ${sources.join(', ')}. Use ALL available data to inform your valuation.`;
+    }
+
+    const systemPrompt = `You are an expert Australian property valuer. Analyze the property and provide a professional valuation report.
+
+Based on ALL the data provided (comparable sales, RP Data report, and any additional reports), estimate a fair market value range for this property.${dataSourcesNote}
+
+Format your response as a clear, professional report with:
+1. Property Overview
+2. Market Analysis (using the comparable sales data)
+3. RP Data & Additional Report Insights (if provided - extract key valuation data, land value, improvements value, previous sales, etc.)
+4. Valuation Assessment (synthesizing all available data)
+5. Estimated Value Range (provide specific $ figures based on all available data)
+6. Key Factors Affecting Value
+
+Be specific with dollar amounts. If RP Data or additional reports contain valuation figures, reference and reconcile them with the comparable sales data.`;
+    const userPromptIntro = 'Please provide a valuation report for this property:\n';
+
+    // Uploaded reports are compacted before comparables when the prompt is over budget
+    const { texts: promptTexts, budget: promptBudget } = fitPromptSections([
+      { name: 'instructions', text: systemPrompt + userPromptIntro, priority: 0, fixed: true },
+      { name: 'property', text: propertyText, priority: 0 },
+      { name: 'comparables', text: comparablesText, priority: 1 },
+      { name: 'photos', text: photoAnalysis ? `PHOTO ANALYSIS:\n${improvementsDetected}` : '', priority: 2 },
+      { name: 'rp_data', text: rpDataSection, priority: 2, compact: condenseReport },
+      { name: 'additional_report', text: additionalReportSection, priority: 3, compact: condenseReport }
+    ]);
+    console.log(`[Evaluate] Prompt tokens: ${describePromptBudget(promptBudget)}`);
+    const propertyDesc = '\n' + [promptTexts.property, promptTexts.comparables, promptTexts.photos, promptTexts.rp_data, promptTexts.additional_report]
+      .filter(Boolean)
+      .join('\n\n');
+
+    tracker.startStage('generating_evaluation');
+    const openai = getOpenAI();
+    const saveDraft = draftSaver(propertyId);
+    const llmContext: LlmCallContext = { agency_id: agencyId, endpoint: 'evaluate' };
+    const streamedReport = await meteredCall(llmContext, 'gpt-4o', async model => {
+      let usage: CompletionUsage | null = null;
+      const text = await streamReport(openai, {
+        model,
+        messages: [
+          {
+            role: 'system',
+            content: systemPrompt
+          },
+          {
+            role: 'user',
+            content: `${userPromptIntro}${propertyDesc}`
+          }
+        ],
+        temperature: 0.3,
+        max_tokens: 2500
+      }, {
+        onDelta: delta => tracker.appendReport(delta),
+        onSection: (title, text) => {
+          tracker.reportSection(title);
+          saveDraft(text);
+        },
+        onUsage: reported => { usage = reported; }
+      });
+      return { result: text, usage };
+    });
+
+    const evaluationReport = streamedReport || 'Unable to generate evaluation.';
+
+    // Calculate confidence scoring
+    const confidenceScoring = calculateConfidenceScoring(comparables, property);
+
+    // Prepare valuation history entry
+    const estimatedValue = stats.median || stats.avg || 0;
+    const valueRange = estimatedValue * 0.1;
+    const valuationEntry: ValuationHistoryEntry = {
+      date: new Date().toISOString(),
+      estimated_value: estimatedValue,
+      value_low: Math.round(estimatedValue - valueRange),
+      value_high: Math.round(estimatedValue + valueRange),
+      confidence_score: confidenceScoring.overall_score,
+      confidence_level: confidenceScoring.level,
+      data_source: dataSource,
+      comparables_count: comparables.length,
+      notes: `Based on ${comparables.length} comparable properties in ${suburb.replace(/-/g, ' ')}`
+    };
+
+    // Map comparables to response format
+    const comparablesWithIds = comparables.map(comp => ({
+      id: comp.id,
+      address: comp.address,
+      price: comp.price,
+      beds: comp.beds,
+      baths: comp.baths,
+      carpark: comp.cars,
+      land_area: comp.land_area,
+      property_type: comp.property_type,
+      sold_date: comp.sold_date,
+      source: comp.source,
+      ...(comp.distance_km !== undefined && { distance_km: comp.distance_km }),
+      similarity_score: comp.similarity_score || 0,
+      selected: true
+    }));
+
+    const comparablesData = {
+      comparable_sold: comparablesWithIds,
+      statistics: {
+        total_found: comparables.length,
+        sold_count: comparables.length,
+        price_range: stats,
+        sources,
+        fetch_ms
+      },
+      data_source: dataSource,
+      domain_api_error: comparables.length === 0 ? `No sold properties found for ${suburb.replace(/-/g, ' ')}, ${state.toUpperCase()}${postcode ? ' ' + postcode : ''}` : null
+    };
+
+    // Save evaluation to backend
+    tracker.startStage('saving');
+    try {
+      await fetch(`${BACKEND_URL}/api/properties/${propertyId}/save-evaluation`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          evaluation_report: evaluationReport,
+          improvements_detected: improvementsDetected,
+          comparables_data: comparablesData,
+          confidence_scoring: confidenceScoring,
+          valuation_entry: valuationEntry,
+          stage_timings: tracker.snapshot().stage_timings
+        })
+      });
+    } catch (saveError) {
+      console.log(`[Evaluate] Could not save to backend: ${saveError}`);
+    }
+
+    const result = {
+      evaluation_report: evaluationReport,
+      improvements_detected: improvementsDetected,
+      comparables_data: comparablesData,
+      confidence_scoring: confidenceScoring,
+      valuation_history: [valuationEntry, ...(property.valuation_history || [])].slice(0, 20),
+      success: true
+    };
+    tracker.complete(result);
+
+    const progress = tracker.snapshot();
+    console.log(`[Evaluate] Stage timings (ms): ${progress.stage_timings.map(t => `${t.stage}=${t.duration_ms}`).join(', ')}`);
+
+    return {
+      status: 200,
+      body: { ...result, stage_timings: progress.stage_timings, evaluation_total_ms: progress.total_ms, prompt_budget: promptBudget, photo_analysis: photoAnalysis }
+    };
+
+  } catch (error) {
+    if (error instanceof LlmAdmissionError) {
+      console.log(`[Evaluate] Not admitted: ${error.message}`);
+      tracker.fail(error.message);
+      return { status: error.status, body: { detail: error.message, budget: error.budget } };
+    }
+    console.error('Evaluate property error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    tracker.fail(errorMessage);
+    return { status: 500, body: { detail: 'Failed to evaluate property: ' + errorMessage } };
+  }
+}
@@ -0,0 +1,52 @@
+// Job handlers for the evaluation queue
+// Importing this module registers the quick, full and batch evaluation lanes
+
+import { EvaluationJob, SaveJobDraft, SetJobStage, registerJobHandler } from '@/lib/jobQueue';
+import { createDraftWriter } from '@/lib/llmStream';
+import { startEvaluationTracking } from '@/lib/evaluationProgress';
+import { runPropertyEvaluation } from '@/lib/evaluation';
+import { QuickEvaluationInput, quickEvaluationCache, runQuickEvaluation } from '@/lib/quickEvaluation';
+
+export { runWorkers, submitJob, getJob, getJobs, getQueuePosition } from '@/lib/jobQueue';
+
+async function runQuickJob(payload: EvaluationJob['payload'], setStage: SetJobStage, saveDraft: SaveJobDraft) {
+  const result = await runQuickEvaluation(
+    (payload.spec ?? payload) as unknown as QuickEvaluationInput,
+    setStage,
+    createDraftWriter(saveDraft)
+  );
+  if (typeof payload.cache_key === 'string') {
+    quickEvaluationCache.set(payload.cache_key, result);
+  }
+  return result;
+}
+
+async function runFullJob(propertyId: string, setStage: SetJobStage, saveDraft: SaveJobDraft) {
+  const tracker = startEvaluationTracking(propertyId);
+  // Mirror tracker stages and report drafts onto the job so job status polls follow the pipeline
+  const writeDraft = createDraftWriter(saveDraft);
+  const unsubscribe = tracker.subscribe(event => {
+    if (event.type === 'stage') setStage(event.progress.evaluation_stage).catch(() => {});
+    if (event.type === 'report_section') writeDraft(tracker.report);
+  });
+  try {
+    const { status, body } = await runPropertyEvaluation(propertyId, tracker);
+    if (status !== 200) {
+      throw new Error(String(body.detail || `Evaluation failed with status ${status}`));
+    }
+    return body;
+  } finally {
+    unsubscribe();
+  }
+}
+
+registerJobHandler('quick', (job, setStage, saveDraft) => runQuickJob(job.payload, setStage, saveDraft));
+
+registerJobHandler('full', (job, setStage, saveDraft) => runFullJob(String(job.payload.property_id), setStage, saveDraft));
+
+// Batch items are either saved properties (full evaluation) or inline specs (quick evaluation)
+registerJobHandler('batch', (job, setStage, saveDraft) =>
+  job.payload.property_id
+    ? runFullJob(String(job.payload.property_id), setStage, saveDraft)
+    : runQuickJob(job.payload, setStage, saveDraft)
+);
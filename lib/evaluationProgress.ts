@@ -0,0 +1,240 @@
+// In-process tracking of running property evaluations
+// Records high-resolution start/end times for every pipeline stage so the
+// evaluation-status endpoint can report where an evaluation spends its time
+
+export type EvaluationStage =
+  | 'starting'
+  | 'analyzing_photos'
+  | 'fetching_comparables'
+  | 'processing_rp_data'
+  | 'generating_evaluation'
+  | 'saving'
+  | 'completed'
+  | 'failed';
+
+export interface StageTiming {
+  stage: EvaluationStage;
+  started_at: string;
+  ended_at: string | null;
+  duration_ms: number | null;
+}
+
+export interface EvaluationProgress {
+  property_id: string;
+  evaluation_status: 'in_progress' | 'completed' | 'failed';
+  evaluation_stage: EvaluationStage;
+  started_at: string;
+  total_ms: number | null;
+  stage_timings: StageTiming[];
+  // Length of the report generated so far
+  report_chars: number;
+  error?: string;
+}
+
+export type EvaluationEvent =
+  | { type: 'stage'; progress: EvaluationProgress }
+  | { type: 'report_delta'; delta: string }
+  | { type: 'report_section'; title: string; report_chars: number }
+  | { type: 'completed'; progress: EvaluationProgress; result: unknown }
+  | { type: 'failed'; progress: EvaluationProgress };
+
+type EvaluationListener = (event: EvaluationEvent) => void;
+
+// Finished evaluations stay visible to status polls for this long
+const FINISHED_TTL_MS = 15 * 60 * 1000;
+
+export class EvaluationTracker {
+  readonly propertyId: string;
+  private readonly startedAt = new Date();
+  private readonly startedPerf = performance.now();
+  private readonly timings: StageTiming[] = [];
+  private currentStart = 0;
+  private status: EvaluationProgress['evaluation_status'] = 'in_progress';
+  private stage: EvaluationStage = 'starting';
+  private totalMs: number | null = null;
+  private error: string | undefined;
+  private listeners = new Set<EvaluationListener>();
+  // Report text streamed so far
+  report = '';
+  result: unknown = null;
+  finishedAt: number | null = null;
+
+  constructor(propertyId: string) {
+    this.propertyId = propertyId;
+  }
+
+  /**
+   * Close the current stage (if any) and open the next one
+   */
+  startStage(stage: EvaluationStage) {
+    this.endStage();
+    this.stage = stage;
+    this.currentStart = performance.now();
+    this.timings.push({ stage, started_at: new Date().toISOString(), ended_at: null, duration_ms: null });
+    this.emit({ type: 'stage', progress: this.snapshot() });
+  }
+
+  private endStage() {
+    const open = this.timings[this.timings.length - 1];
+    if (open && open.ended_at === null) {
+      open.ended_at = new Date().toISOString();
+      open.duration_ms = Math.round((performance.now() - this.currentStart) * 10) / 10;
+    }
+  }
+
+  /**
+   * Append streamed report text and forward it to listeners
+   */
+  appendReport(delta: string) {
+    this.report += delta;
+    this.emit({ type: 'report_delta', delta });
+  }
+
+  reportSection(title: string) {
+    this.emit({ type: 'report_section', title, report_chars: this.report.length });
+  }
+
+  complete(result: unknown = null) {
+    this.result = result;
+    this.finish('completed');
+    this.emit({ type: 'completed', progress: this.snapshot(), result });
+  }
+
+  fail(error: string) {
+    this.error = error;
+    this.finish('failed');
+    this.emit({ type: 'failed', progress: this.snapshot() });
+  }
+
+  get finished(): boolean {
+    return this.finishedAt !== null;
+  }
+
+  /**
+   * Listen for stage transitions and the final outcome, returns an unsubscribe function
+   */
+  subscribe(listener: EvaluationListener): () => void {
+    this.listeners.add(listener);
+    return () => this.listeners.delete(listener);
+  }
+
+  private emit(event: EvaluationEvent) {
+    for (const listener of this.listeners) {
+      try {
+        listener(event);
+      } catch (error) {
+        console.log(`[Evaluation Progress] Listener error: ${error}`);
+      }
+    }
+  }
+
+  private finish(stage: 'completed' | 'failed') {
+    this.endStage();
+    this.stage = stage;
+    this.status = stage;
+    this.totalMs = Math.round((performance.now() - this.startedPerf) * 10) / 10;
+    this.finishedAt = Date.now();
+  }
+
+  snapshot(): EvaluationProgress {
+    return {
+      property_id: this.propertyId,
+      evaluation_status: this.status,
+      evaluation_stage: this.stage,
+      started_at: this.startedAt.toISOString(),
+      total_ms: this.totalMs,
+      stage_timings: this.timings.map(t => ({ ...t })),
+      report_chars: this.report.length,
+      ...(this.error && { error: this.error })
+    };
+  }
+}
+
+const trackers = new Map<string, EvaluationTracker>();
+
+function pruneFinished() {
+  const cutoff = Date.now() - FINISHED_TTL_MS;
+  for (const [propertyId, tracker] of trackers) {
+    if (tracker.finishedAt !== null && tracker.finishedAt < cutoff) {
+      trackers.delete(propertyId);
+    }
+  }
+}
+
+/**
+ * Start tracking a new evaluation, replacing any previous run for the property
+ */
+export function startEvaluationTracking(propertyId: string): EvaluationTracker {
+  pruneFinished();
+  const tracker = new EvaluationTracker(propertyId);
+  trackers.set(propertyId, tracker);
+  tracker.startStage('starting');
+  return tracker;
+}
+
+export function getEvaluationProgress(propertyId: string): EvaluationProgress | null {
+  return trackers.get(propertyId)?.snapshot() ?? null;
+}
+
+/**
+ * Wire format for an evaluation event: the progress snapshot (plus the result once
+ * completed), or the streamed report delta / section heading
+ */
+export function evaluationEventPayload(event: EvaluationEvent) {
+  switch (event.type) {
+    case 'completed':
+      return { ...event.progress, result: event.result };
+    case 'report_delta':
+      return { delta: event.delta };
+    case 'report_section':
+      return { title: event.title, report_chars: event.report_chars };
+    default:
+      return event.progress;
+  }
+}
+
+export function getEvaluationTracker(propertyId: string): EvaluationTracker | null {
+  return trackers.get(propertyId) ?? null;
+}
+
+/**
+ * Forward a tracker's events until the evaluation finishes or the signal aborts
+ * The current state (and any report text so far) is sent first so late
+ * subscribers see where the evaluation is
+ */
+export function followEvaluation(
+  tracker: EvaluationTracker,
+  onEvent: (event: EvaluationEvent) => void,
+  signal?: AbortSignal
+): Promise<void> {
+  return new Promise(resolve => {
+    // An already-aborted signal never fires 'abort', so the subscription below would never end
+    if (signal?.aborted) {
+      resolve();
+      return;
+    }
+    const progress = tracker.snapshot();
+    if (tracker.finished) {
+      onEvent(progress.evaluation_status === 'completed'
+        ? { type: 'completed', progress, result: tracker.result }
+        : { type: 'failed', progress });
+      resolve();
+      return;
+    }
+
+    onEvent({ type: 'stage', progress });
+    if (tracker.report) {
+      onEvent({ type: 'report_delta', delta: tracker.report });
+    }
+    const stop = () => {
+      unsubscribe();
+      signal?.removeEventListener('abort', stop);
+      resolve();
+    };
+    const unsubscribe = tracker.subscribe(event => {
+      onEvent(event);
+      if (event.type === 'completed' || event.type === 'failed') stop();
+    });
+    signal?.addEventListener('abort', stop, { once: true });
+  });
+}
@@ -0,0 +1,112 @@
+// Uniform lat/lon grid index for radius and k-nearest searches
+// Points are bucketed into fixed-size cells; a query only visits the cells that
+// overlap its search radius, so cost depends on local density, not index size.
+
+const EARTH_RADIUS_KM = 6371;
+const KM_PER_DEGREE_LAT = 111.32;
+// ~1.1 km cells: a 3 km radius query touches about 7x7 cells
+const DEFAULT_CELL_DEGREES = 0.01;
+
+export interface GeoMatch<T> {
+  item: T;
+  distance_km: number;
+}
+
+/**
+ * Great-circle distance between two points in kilometres
+ */
+export function haversineKm(lat1: number, lon1: number, lat2: number, lon2: number): number {
+  const toRad = Math.PI / 180;
+  const dLat = (lat2 - lat1) * toRad;
+  const dLon = (lon2 - lon1) * toRad;
+  const a = Math.sin(dLat / 2) ** 2 + Math.cos(lat1 * toRad) * Math.cos(lat2 * toRad) * Math.sin(dLon / 2) ** 2;
+  return 2 * EARTH_RADIUS_KM * Math.asin(Math.min(1, Math.sqrt(a)));
+}
+
+interface GeoEntry<T> {
+  id: string;
+  lat: number;
+  lon: number;
+  item: T;
+}
+
+export class GeoIndex<T> {
+  private cells = new Map<string, GeoEntry<T>[]>();
+  private cellOf = new Map<string, string>();
+
+  constructor(private readonly cellDegrees: number = DEFAULT_CELL_DEGREES) {}
+
+  get size(): number {
+    return this.cellOf.size;
+  }
+
+  private cellKey(row: number, col: number): string {
+    return `${row}:${col}`;
+  }
+
+  /**
+   * Add or move an item; `id` identifies it for later updates and removal
+   */
+  insert(id: string, lat: number, lon: number, item: T) {
+    this.remove(id);
+    const key = this.cellKey(Math.floor(lat / this.cellDegrees), Math.floor(lon / this.cellDegrees));
+    let cell = this.cells.get(key);
+    if (!cell) {
+      cell = [];
+      this.cells.set(key, cell);
+    }
+    cell.push({ id, lat, lon, item });
+    this.cellOf.set(id, key);
+  }
+
+  has(id: string): boolean {
+    return this.cellOf.has(id);
+  }
+
+  remove(id: string) {
+    const key = this.cellOf.get(id);
+    if (key === undefined) return;
+    const cell = this.cells.get(key)!;
+    const index = cell.findIndex(entry => entry.id === id);
+    cell.splice(index, 1);
+    if (cell.length === 0) this.cells.delete(key);
+    this.cellOf.delete(id);
+  }
+
+  /**
+   * Every item within `radiusKm`, nearest first
+   */
+  withinRadius(lat: number, lon: number, radiusKm: number, filter?: (item: T) => boolean): GeoMatch<T>[] {
+    const latSpan = radiusKm / KM_PER_DEGREE_LAT;
+    // Longitude degrees shrink towards the poles
+    const lonSpan = radiusKm / (KM_PER_DEGREE_LAT * Math.max(Math.cos(lat * Math.PI / 180), 0.01));
+    const minRow = Math.floor((lat - latSpan) / this.cellDegrees);
+    const maxRow = Math.floor((lat + latSpan) / this.cellDegrees);
+    const minCol = Math.floor((lon - lonSpan) / this.cellDegrees);
+    const maxCol = Math.floor((lon + lonSpan) / this.cellDegrees);
+
+    const matches: GeoMatch<T>[] = [];
+    for (let row = minRow; row <= maxRow; row++) {
+      for (let col = minCol; col <= maxCol; col++) {
+        const cell = this.cells.get(this.cellKey(row, col));
+        if (!cell) continue;
+        for (const entry of cell) {
+          if (filter && !filter(entry.item)) continue;
+          const distance = haversineKm(lat, lon, entry.lat, entry.lon);
+          if (distance <= radiusKm) {
+            matches.push({ item: entry.item, distance_km: distance });
+          }
+        }
+      }
+    }
+    matches.sort((a, b) => a.distance_km - b.distance_km);
+    return matches;
+  }
+
+  /**
+   * The k nearest items within `radiusKm`, nearest first
+   */
+  nearest(lat: number, lon: number, k: number, radiusKm: number, filter?: (item: T) => boolean): GeoMatch<T>[] {
+    return this.withinRadius(lat, lon, radiusKm, filter).slice(0, k);
+  }
+}
@@ -0,0 +1,14 @@
+/**
+ * Hex SHA-256 of a string (Web Crypto, available in both the Node and edge runtimes)
+ */
+export async function sha256Hex(text: string): Promise<string> {
+  return sha256HexBytes(new TextEncoder().encode(text));
+}
+
+/**
+ * Hex SHA-256 of raw bytes
+ */
+export async function sha256HexBytes(bytes: ArrayBuffer | Uint8Array): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', bytes as BufferSource);
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
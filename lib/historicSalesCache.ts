@@ -0,0 +1,168 @@
+// Two-tier cache of scraped historic sales per suburb
+// L1 is a byte-bounded in-process LRU; L2 is the backend's 7-day historic-sales cache
+// (MongoDB behind /api/historic-sales-cache). Hot suburbs are answered from memory. An
+// L1 entry past its fresh window is still served for a while and refreshed from L2 in
+// the background (stale-while-revalidate), so an L1 hit never waits on the network.
+
+import { LRUCache } from '@/lib/lruCache';
+import { singleFlight } from '@/lib/singleFlight';
+import { SalesArea, areaKey } from '@/lib/salesStore';
+import { SourceHttpError, parseRetryAfter } from '@/lib/sourceGuard';
+import { envInt } from '@/lib/env';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+
+const L1_FRESH_MS = envInt('HISTORIC_SALES_L1_FRESH_MS', 10 * 60 * 1000);
+// How long past its fresh window an entry may still be served while it is refreshed
+const L1_STALE_MS = envInt('HISTORIC_SALES_L1_STALE_MS', 60 * 60 * 1000, 0);
+const L1_MAX_ENTRIES = envInt('HISTORIC_SALES_L1_MAX_ENTRIES', 500);
+// Bound on the serialized size of all L1 entries
+const L1_MAX_BYTES = envInt('HISTORIC_SALES_L1_MAX_BYTES', 32 * 1024 * 1024);
+const L2_TIMEOUT_MS = 5000;
+
+// Backend cache document: { cached, cache_key, sales, scraped_url, ... }
+export type HistoricSalesEntry = Record<string, any>;
+
+export type CacheTier = 'l1' | 'l1-stale' | 'l2' | 'miss';
+
+interface L1Entry {
+  data: HistoricSalesEntry;
+  fetchedAt: number;
+}
+
+const l1 = new LRUCache<L1Entry>(
+  L1_MAX_ENTRIES,
+  L1_FRESH_MS + L1_STALE_MS,
+  L1_MAX_BYTES,
+  entry => JSON.stringify(entry.data).length
+);
+// Concurrent L2 reads (misses and background refreshes) for one area share a request
+const l2Reads = singleFlight<HistoricSalesEntry | null>('historic-sales-cache-l2');
+
+const counters = {
+  l1_fresh_hits: 0,
+  l1_stale_hits: 0,
+  l2_hits: 0,
+  l2_misses: 0,
+  l2_errors: 0,
+  revalidations: 0,
+  revalidation_failures: 0
+};
+
+function ratio(part: number, whole: number): number {
+  return whole > 0 ? Math.round((part / whole) * 1000) / 1000 : 0;
+}
+
+/**
+ * Read an area from L2 and refresh (or drop) its L1 entry to match
+ */
+function loadFromL2(area: SalesArea): Promise<HistoricSalesEntry | null> {
+  const key = areaKey(area);
+  return l2Reads.run(key, async () => {
+    const params = new URLSearchParams({
+      suburb: area.suburb,
+      state: area.state,
+      ...(area.postcode && { postcode: area.postcode }),
+      ...(area.propertyType && { propertyType: area.propertyType })
+    });
+    const response = await fetch(`${BACKEND_URL}/api/historic-sales-cache?${params}`, { signal: AbortSignal.timeout(L2_TIMEOUT_MS) });
+    if (!response.ok) {
+      throw new SourceHttpError(response.status, parseRetryAfter(response.headers.get('retry-after')));
+    }
+    const data = await response.json();
+    if (!data.cached) {
+      l1.delete(key);
+      return null;
+    }
+    l1.set(key, { data, fetchedAt: Date.now() });
+    return data;
+  });
+}
+
+function revalidate(area: SalesArea) {
+  counters.revalidations++;
+  loadFromL2(area).catch(error => {
+    counters.revalidation_failures++;
+    console.log(`[Sales Cache] Background refresh failed for ${areaKey(area)}: ${error}`);
+  });
+}
+
+/**
+ * Cached historic sales for an area, and the tier that answered
+ * Throws when L2 has to be read and the backend fails
+ */
+export async function getHistoricSales(area: SalesArea): Promise<{ data: HistoricSalesEntry | null; tier: CacheTier }> {
+  const entry = l1.get(areaKey(area));
+  if (entry) {
+    if (Date.now() - entry.fetchedAt < L1_FRESH_MS) {
+      counters.l1_fresh_hits++;
+      return { data: entry.data, tier: 'l1' };
+    }
+    counters.l1_stale_hits++;
+    revalidate(area);
+    return { data: entry.data, tier: 'l1-stale' };
+  }
+
+  try {
+    const data = await loadFromL2(area);
+    if (data) counters.l2_hits++;
+    else counters.l2_misses++;
+    return { data, tier: data ? 'l2' : 'miss' };
+  } catch (error) {
+    counters.l2_errors++;
+    throw error;
+  }
+}
+
+/**
+ * Store freshly scraped sales in L2 (7 days) and L1
+ */
+export async function putHistoricSales(area: SalesArea, sales: unknown[], scrapedUrl: string): Promise<void> {
+  l1.set(areaKey(area), { data: { cached: true, sales, scraped_url: scrapedUrl }, fetchedAt: Date.now() });
+  const response = await fetch(`${BACKEND_URL}/api/historic-sales-cache`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      suburb: area.suburb,
+      state: area.state,
+      postcode: area.postcode,
+      propertyType: area.propertyType,
+      sales,
+      scrapedUrl
+    })
+  });
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}`);
+  }
+}
+
+/**
+ * Per-tier hit ratios for this instance
+ * Every lookup goes to L1; L1 misses go to L2
+ */
+export function historicSalesCacheStats() {
+  const l1Stats = l1.stats();
+  const lookups = l1Stats.hits + l1Stats.misses;
+  const l2Lookups = counters.l2_hits + counters.l2_misses + counters.l2_errors;
+  return {
+    lookups,
+    l1: {
+      ...l1Stats,
+      fresh_hits: counters.l1_fresh_hits,
+      stale_hits: counters.l1_stale_hits,
+      fresh_ms: L1_FRESH_MS,
+      stale_ms: L1_STALE_MS
+    },
+    l2: {
+      lookups: l2Lookups,
+      hits: counters.l2_hits,
+      misses: counters.l2_misses,
+      errors: counters.l2_errors,
+      hit_ratio: ratio(counters.l2_hits, l2Lookups)
+    },
+    revalidations: counters.revalidations,
+    revalidation_failures: counters.revalidation_failures,
+    // Lookups answered by either tier
+    hit_ratio: ratio(l1Stats.hits + counters.l2_hits, lookups)
+  };
+}
@@ -0,0 +1,221 @@
+// Out-of-band storage for property photos
+// Photo bytes live in the `property_images` GridFS bucket, or in a local directory when
+// MONGO_URL is not set. The local directory defaults to the OS temp dir, which is only
+// fit for development: in production uploads are refused unless MongoDB or a persistent
+// IMAGE_STORAGE_DIR is configured. Property documents keep only the short image URL and its
+// metadata. Images are content-addressed: the id is the SHA-256 of the bytes, so the
+// same photo uploaded twice is stored once and its URL never changes meaning.
+
+import { createReadStream, promises as fs } from 'fs';
+import os from 'os';
+import path from 'path';
+import { Readable } from 'stream';
+import { GridFSBucket } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { sha256HexBytes } from '@/lib/hash';
+import { PropertyImage } from '@/lib/types';
+import { imageUrl, isImageId, thumbnailUrl } from '@/lib/imageUrls';
+import { envInt } from '@/lib/env';
+
+export { imageIdFromUrl } from '@/lib/imageUrls';
+
+export const IMAGE_MAX_BYTES = envInt('IMAGE_MAX_BYTES', 15 * 1024 * 1024);
+const LOCAL_IMAGE_DIR = process.env.IMAGE_STORAGE_DIR || path.join(os.tmpdir(), 'propertyval-images');
+// Serverless temp dirs are wiped between invocations, so stored URLs would break
+const DURABLE_STORAGE = isMongoConfigured() || !!process.env.IMAGE_STORAGE_DIR || process.env.NODE_ENV !== 'production';
+
+export type StoredImage = PropertyImage;
+
+/**
+ * No durable image storage is configured, so stored images would not survive
+ */
+export class ImageStoreUnavailableError extends Error {
+  constructor() {
+    super('Image storage is not configured: set MONGO_URL (GridFS) or IMAGE_STORAGE_DIR on a persistent volume');
+    this.name = 'ImageStoreUnavailableError';
+  }
+}
+
+/**
+ * Image type from the file signature; null when the bytes are not a supported image
+ */
+export function sniffImageType(bytes: Uint8Array): string | null {
+  const starts = (...signature: number[]) => signature.every((byte, i) => bytes[i] === byte);
+  if (starts(0xff, 0xd8, 0xff)) return 'image/jpeg';
+  if (starts(0x89, 0x50, 0x4e, 0x47)) return 'image/png';
+  if (starts(0x47, 0x49, 0x46, 0x38)) return 'image/gif';
+  if (starts(0x52, 0x49, 0x46, 0x46) && String.fromCharCode(...bytes.slice(8, 12)) === 'WEBP') return 'image/webp';
+  return null;
+}
+
+/**
+ * Pixel dimensions read from the image header (JPEG, PNG, GIF, WebP)
+ */
+export function imageDimensions(bytes: Uint8Array, contentType: string): { width: number; height: number } | null {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  try {
+    switch (contentType) {
+      case 'image/png':
+        return { width: view.getUint32(16), height: view.getUint32(20) };
+      case 'image/gif':
+        return { width: view.getUint16(6, true), height: view.getUint16(8, true) };
+      case 'image/webp': {
+        const chunk = String.fromCharCode(...bytes.slice(12, 16));
+        if (chunk === 'VP8 ') return { width: view.getUint16(26, true) & 0x3fff, height: view.getUint16(28, true) & 0x3fff };
+        if (chunk === 'VP8L') {
+          const bits = view.getUint32(21, true);
+          return { width: (bits & 0x3fff) + 1, height: ((bits >> 14) & 0x3fff) + 1 };
+        }
+        if (chunk === 'VP8X') {
+          const width = 1 + (bytes[24] | (bytes[25] << 8) | (bytes[26] << 16));
+          const height = 1 + (bytes[27] | (bytes[28] << 8) | (bytes[29] << 16));
+          return { width, height };
+        }
+        return null;
+      }
+      case 'image/jpeg': {
+        // Walk the marker segments to the first start-of-frame
+        let offset = 2;
+        while (offset + 9 < bytes.length) {
+          if (bytes[offset] !== 0xff) return null;
+          const marker = bytes[offset + 1];
+          const length = view.getUint16(offset + 2);
+          if (marker >= 0xc0 && marker <= 0xcf && ![0xc4, 0xc8, 0xcc].includes(marker)) {
+            return { width: view.getUint16(offset + 7), height: view.getUint16(offset + 5) };
+          }
+          offset += 2 + length;
+        }
+        return null;
+      }
+    }
+  } catch {
+    // Truncated header
+  }
+  return null;
+}
+
+interface ImageBackend {
+  get(id: string): Promise<StoredImage | null>;
+  save(image: StoredImage, bytes: Uint8Array): Promise<void>;
+  // Byte range [start, end] inclusive
+  read(id: string, start: number, end: number): Promise<Readable>;
+}
+
+class GridFSImageBackend implements ImageBackend {
+  private async bucket(): Promise<GridFSBucket> {
+    return new GridFSBucket(await getDb(), { bucketName: 'property_images' });
+  }
+
+  async get(id: string) {
+    const file = await (await this.bucket()).find({ filename: id }).limit(1).next();
+    return (file?.metadata as StoredImage | undefined) ?? null;
+  }
+
+  async save(image: StoredImage, bytes: Uint8Array) {
+    const upload = (await this.bucket()).openUploadStream(image.id, { metadata: image });
+    await new Promise<void>((resolve, reject) => {
+      upload.once('finish', () => resolve());
+      upload.once('error', reject);
+      upload.end(Buffer.from(bytes));
+    });
+  }
+
+  async read(id: string, start: number, end: number) {
+    // GridFS ranges are end-exclusive
+    return (await this.bucket()).openDownloadStreamByName(id, { start, end: end + 1 });
+  }
+}
+
+// Local stand-in when MongoDB is not configured
+class FileImageBackend implements ImageBackend {
+  private file(id: string, extension: string) {
+    return path.join(LOCAL_IMAGE_DIR, `${id}.${extension}`);
+  }
+
+  async get(id: string) {
+    try {
+      return JSON.parse(await fs.readFile(this.file(id, 'json'), 'utf8')) as StoredImage;
+    } catch {
+      return null;
+    }
+  }
+
+  async save(image: StoredImage, bytes: Uint8Array) {
+    await fs.mkdir(LOCAL_IMAGE_DIR, { recursive: true });
+    await fs.writeFile(this.file(image.id, 'bin'), bytes);
+    // Metadata last, so a half-written image is never visible
+    await fs.writeFile(this.file(image.id, 'json'), JSON.stringify(image));
+  }
+
+  async read(id: string, start: number, end: number) {
+    return createReadStream(this.file(id, 'bin'), { start, end });
+  }
+}
+
+const backend: ImageBackend = isMongoConfigured() ? new GridFSImageBackend() : new FileImageBackend();
+
+export async function getImage(id: string): Promise<StoredImage | null> {
+  return isImageId(id) ? backend.get(id) : null;
+}
+
+/**
+ * Stream bytes [start, end] (inclusive) of a stored image
+ */
+export async function readImage(id: string, start: number, end: number): Promise<ReadableStream<Uint8Array>> {
+  return Readable.toWeb(await backend.read(id, start, end)) as ReadableStream<Uint8Array>;
+}
+
+/**
+ * Store an image, returning the existing record when the same bytes were stored before
+ * Throws when the bytes are not a supported image or exceed IMAGE_MAX_BYTES, and
+ * ImageStoreUnavailableError in production without durable storage
+ */
+export async function storeImage(bytes: Uint8Array): Promise<StoredImage> {
+  if (!DURABLE_STORAGE) {
+    throw new ImageStoreUnavailableError();
+  }
+  if (bytes.length > IMAGE_MAX_BYTES) {
+    throw new Error(`Image exceeds ${Math.round(IMAGE_MAX_BYTES / 1024 / 1024)}MB`);
+  }
+  const contentType = sniffImageType(bytes);
+  if (!contentType) {
+    throw new Error('Unsupported image type (JPEG, PNG, GIF or WebP expected)');
+  }
+
+  const id = await sha256HexBytes(bytes);
+  const existing = await backend.get(id);
+  if (existing) return existing;
+
+  const dimensions = imageDimensions(bytes, contentType);
+  const image: StoredImage = {
+    id,
+    url: imageUrl(id),
+    thumbnail_url: thumbnailUrl(id),
+    content_type: contentType,
+    size: bytes.length,
+    width: dimensions?.width ?? null,
+    height: dimensions?.height ?? null
+  };
+  await backend.save(image, bytes);
+  console.log(`[Images] Stored ${id.slice(0, 12)} (${contentType}, ${bytes.length} bytes)`);
+  return image;
+}
+
+/**
+ * Bytes of a base64 data URL, or null if the string is not one
+ */
+export function dataUrlBytes(value: string): Uint8Array | null {
+  const match = value.match(/^data:[^;,]+;base64,(.*)$/s);
+  return match ? Uint8Array.from(Buffer.from(match[1], 'base64')) : null;
+}
+
+/**
+ * Full bytes of a stored image
+ */
+export async function readImageBytes(image: StoredImage): Promise<Uint8Array> {
+  const chunks: Buffer[] = [];
+  for await (const chunk of await backend.read(image.id, 0, image.size - 1)) {
+    chunks.push(Buffer.from(chunk));
+  }
+  return new Uint8Array(Buffer.concat(chunks));
+}
@@ -0,0 +1,35 @@
+// URLs for photos in the image store (see lib/imageStore.ts)
+// Kept free of server imports so pages can build thumbnail URLs too
+
+// Served through the Next.js image optimizer, which resizes and caches server-side
+const THUMBNAIL_WIDTH = 384;
+const IMAGE_URL_PREFIX = '/api/images/';
+
+export function isImageId(value: string): boolean {
+  return /^[a-f0-9]{64}$/.test(value);
+}
+
+export function imageUrl(id: string): string {
+  return `${IMAGE_URL_PREFIX}${id}`;
+}
+
+export function thumbnailUrl(id: string): string {
+  return `/_next/image?url=${encodeURIComponent(imageUrl(id))}&w=${THUMBNAIL_WIDTH}&q=75`;
+}
+
+/**
+ * Id of a stored image from its URL, or null for any other image reference
+ */
+export function imageIdFromUrl(url: string): string | null {
+  if (!url.startsWith(IMAGE_URL_PREFIX)) return null;
+  const id = url.slice(IMAGE_URL_PREFIX.length).split(/[?#]/)[0];
+  return isImageId(id) ? id : null;
+}
+
+/**
+ * Small version of a photo for lists and cards; other image references are returned as-is
+ */
+export function thumbnailSrc(url: string): string {
+  const id = imageIdFromUrl(url);
+  return id ? thumbnailUrl(id) : url;
+}
@@ -0,0 +1,112 @@
+// Declared MongoDB index set
+// Every index this app relies on is listed here with the query it serves. The whole
+// plan is created at server startup (instrumentation.ts); each store also waits for its
+// own collection's indexes before first use, so a cold instance never queries unindexed.
+
+import { CreateIndexesOptions, IndexSpecification } from 'mongodb';
+import { getDb } from '@/lib/mongo';
+
+export interface PlannedIndex {
+  key: IndexSpecification;
+  options?: CreateIndexesOptions;
+  // The query this index serves
+  serves: string;
+}
+
+export const INDEX_PLAN: Record<string, PlannedIndex[]> = {
+  // Owned by the backend; read directly by the property listing (lib/propertyListing.ts)
+  properties: [
+    { key: { id: 1 }, options: { unique: true }, serves: 'Property lookups by id (every /properties/{id} endpoint)' },
+    { key: { agency_id: 1, status: 1, created_at: -1, id: -1 }, serves: 'Agency listing filtered by status, newest first' },
+    { key: { agent_id: 1, created_at: -1 }, serves: 'Properties for one agent' },
+    { key: { user_email: 1, created_at: -1, id: -1 }, serves: 'Properties for the signed-in user, newest first' },
+    { key: { created_at: -1, id: -1 }, serves: 'Unfiltered listing, newest first' },
+    { key: { agency_id: 1, location: 1, id: 1 }, serves: 'Agency listing sorted by location' }
+  ],
+  evaluation_jobs: [
+    { key: { job_id: 1 }, options: { unique: true }, serves: 'Job status polling' },
+    { key: { lane: 1, status: 1, created_at: 1 }, serves: 'Claiming the oldest queued job in a lane; queue position' },
+    { key: { idempotency_key: 1, created_at: -1 }, serves: 'Reusing a recent job for a repeated submission' },
+    { key: { finished_at: 1 }, options: { expireAfterSeconds: 24 * 60 * 60 }, serves: 'Finished jobs are removed after a day' }
+  ],
+  evaluation_batches: [
+    { key: { batch_id: 1 }, options: { unique: true }, serves: 'Batch progress and result streaming' },
+    { key: { created_at: 1 }, options: { expireAfterSeconds: 7 * 24 * 60 * 60 }, serves: 'Batches are removed after a week' }
+  ],
+  llm_calls: [
+    { key: { agency_id: 1, created_at: -1 }, serves: 'Monthly spend per agency' },
+    { key: { created_at: 1 }, options: { expireAfterSeconds: 400 * 24 * 60 * 60 }, serves: 'Call records are kept for about a year; monthly spend across all agencies' }
+  ],
+  sold_listings: [
+    { key: { area_key: 1, sale_key: 1 }, options: { unique: true }, serves: 'Deduplicating merged sales' },
+    { key: { area_key: 1, sold_date_raw: -1 }, serves: 'Most recent sales for an area' }
+  ],
+  sold_listing_areas: [
+    { key: { area_key: 1 }, options: { unique: true }, serves: 'Area refresh lookups' }
+  ],
+  sales_area_demand: [
+    { key: { area_key: 1 }, options: { unique: true }, serves: 'Recording comparable demand per area' },
+    { key: { score: -1 }, serves: 'Most in-demand areas for the prefetch scheduler' }
+  ],
+  photo_findings: [
+    { key: { content_hash: 1 }, options: { unique: true }, serves: 'Cached findings by photo content hash' }
+  ],
+  photo_sources: [
+    { key: { url: 1, validator: 1 }, options: { unique: true }, serves: 'Content hash of a remote photo by URL and ETag/Last-Modified' }
+  ]
+};
+
+const ready = new Map<string, Promise<void>>();
+
+/**
+ * Create the planned indexes for one collection (once per process)
+ * Failures are logged rather than thrown, and retried on the next call
+ */
+export function ensureIndexes(collectionName: string): Promise<void> {
+  let pending = ready.get(collectionName);
+  if (!pending) {
+    pending = (async () => {
+      const collection = (await getDb()).collection(collectionName);
+      await Promise.all((INDEX_PLAN[collectionName] ?? []).map(index => collection.createIndex(index.key, index.options)));
+    })().catch(error => {
+      ready.delete(collectionName);
+      console.log(`[Indexes] Index creation failed for ${collectionName}: ${error}`);
+    });
+    ready.set(collectionName, pending);
+  }
+  return pending;
+}
+
+/**
+ * Create the whole index plan; called at server startup
+ */
+export async function ensureAllIndexes(): Promise<void> {
+  const started = performance.now();
+  await Promise.all(Object.keys(INDEX_PLAN).map(ensureIndexes));
+  console.log(`[Indexes] Index plan checked for ${Object.keys(INDEX_PLAN).length} collections in ${Math.round(performance.now() - started)}ms`);
+}
+
+export interface IndexPlanStatus {
+  collection: string;
+  key: IndexSpecification;
+  serves: string;
+  present: boolean;
+}
+
+/**
+ * Each planned index and whether it exists in the database
+ */
+export async function indexPlanStatus(): Promise<IndexPlanStatus[]> {
+  const db = await getDb();
+  const statuses = await Promise.all(Object.entries(INDEX_PLAN).map(async ([collectionName, indexes]) => {
+    const existing = await db.collection(collectionName).listIndexes().toArray().catch(() => []);
+    const existingKeys = new Set(existing.map(index => JSON.stringify(index.key)));
+    return indexes.map(index => ({
+      collection: collectionName,
+      key: index.key,
+      serves: index.serves,
+      present: existingKeys.has(JSON.stringify(index.key))
+    }));
+  }));
+  return statuses.flat();
+}
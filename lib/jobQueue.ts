@@ -0,0 +1,383 @@
+// Evaluation job subsystem
+// Jobs are persisted in the `evaluation_jobs` MongoDB collection (in-memory when
+// MONGO_URL is not set) and executed by a bounded pool of in-process workers.
+// Running jobs hold a lease that the worker renews while it runs; if an instance dies
+// mid-job the lease expires and any instance that runs workers picks the job up again.
+
+import { Collection } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { envInt } from '@/lib/env';
+
+// Batch jobs (portfolio revaluations) only run when no interactive job is waiting
+export type JobLane = 'quick' | 'full' | 'batch';
+export type JobStatus = 'queued' | 'running' | 'completed' | 'failed';
+export type CacheStatus = 'hit' | 'miss' | 'bypass';
+
+export interface EvaluationJob {
+  job_id: string;
+  lane: JobLane;
+  status: JobStatus;
+  stage: string;
+  payload: Record<string, unknown>;
+  idempotency_key: string | null;
+  result: unknown;
+  // Report text generated so far while the job runs
+  partial_report: string | null;
+  error: string | null;
+  cache_status: CacheStatus | null;
+  attempts: number;
+  created_at: Date;
+  updated_at: Date;
+  started_at: Date | null;
+  finished_at: Date | null;
+  lease_expires_at: Date | null;
+}
+
+export type SetJobStage = (stage: string) => Promise<void>;
+export type SaveJobDraft = (partialReport: string) => Promise<void>;
+export type JobHandler = (job: EvaluationJob, setStage: SetJobStage, saveDraft: SaveJobDraft) => Promise<unknown>;
+
+const WORKER_CONCURRENCY = envInt('EVALUATION_WORKERS', 4);
+const LEASE_MS = 5 * 60 * 1000;
+// Leases are renewed this often while a job runs, as well as on every stage change and draft
+const LEASE_RENEW_MS = 60 * 1000;
+const MAX_ATTEMPTS = 3;
+// Completed jobs with the same idempotency key are reused for this long (unless the submitter opts out)
+const REUSE_WINDOW_MS = 10 * 60 * 1000;
+
+interface JobStore {
+  insert(job: EvaluationJob): Promise<void>;
+  get(jobId: string): Promise<EvaluationJob | null>;
+  getMany(jobIds: string[]): Promise<EvaluationJob[]>;
+  // Queued and running jobs always match; completed ones only when `completedSince` is given
+  findReusable(idempotencyKey: string, completedSince: Date | null): Promise<EvaluationJob | null>;
+  claimNext(lane: JobLane, now: Date): Promise<EvaluationJob | null>;
+  // Moves a still-queued batch job onto an interactive lane
+  promote(jobId: string, lane: JobLane): Promise<boolean>;
+  // Applies the patch only while the job is still running under the given claim (its attempt
+  // number); false means the lease expired and another worker has taken the job over
+  updateLeased(jobId: string, attempt: number, patch: Partial<EvaluationJob>): Promise<boolean>;
+  countAhead(job: EvaluationJob): Promise<number>;
+}
+
+function claimableFilter(lane: JobLane, now: Date) {
+  return {
+    lane,
+    $or: [
+      { status: 'queued' as JobStatus },
+      { status: 'running' as JobStatus, lease_expires_at: { $lt: now } }
+    ]
+  };
+}
+
+class MongoJobStore implements JobStore {
+  private async collection(): Promise<Collection<EvaluationJob>> {
+    const collection = (await getDb()).collection<EvaluationJob>('evaluation_jobs');
+    await ensureIndexes('evaluation_jobs');
+    return collection;
+  }
+
+  async insert(job: EvaluationJob) {
+    await (await this.collection()).insertOne({ ...job });
+  }
+
+  async get(jobId: string) {
+    return (await this.collection()).findOne({ job_id: jobId }, { projection: { _id: 0 } });
+  }
+
+  async getMany(jobIds: string[]) {
+    return (await this.collection()).find({ job_id: { $in: jobIds } }, { projection: { _id: 0 } }).toArray();
+  }
+
+  async findReusable(idempotencyKey: string, completedSince: Date | null) {
+    const pending = { status: { $in: ['queued', 'running'] as JobStatus[] } };
+    return (await this.collection()).findOne(
+      {
+        idempotency_key: idempotencyKey,
+        $or: completedSince
+          ? [pending, { status: 'completed', finished_at: { $gte: completedSince } }]
+          : [pending]
+      },
+      { sort: { created_at: -1 }, projection: { _id: 0 } }
+    );
+  }
+
+  async claimNext(lane: JobLane, now: Date) {
+    return (await this.collection()).findOneAndUpdate(
+      claimableFilter(lane, now),
+      {
+        $set: { status: 'running', started_at: now, updated_at: now, lease_expires_at: new Date(now.getTime() + LEASE_MS) },
+        $inc: { attempts: 1 }
+      },
+      { sort: { created_at: 1 }, returnDocument: 'after', projection: { _id: 0 } }
+    );
+  }
+
+  async promote(jobId: string, lane: JobLane) {
+    const { matchedCount } = await (await this.collection()).updateOne(
+      { job_id: jobId, lane: 'batch', status: 'queued' },
+      { $set: { lane, updated_at: new Date() } }
+    );
+    return matchedCount > 0;
+  }
+
+  async updateLeased(jobId: string, attempt: number, patch: Partial<EvaluationJob>) {
+    const { matchedCount } = await (await this.collection()).updateOne(
+      { job_id: jobId, status: 'running', attempts: attempt },
+      { $set: { ...patch, updated_at: new Date() } }
+    );
+    return matchedCount > 0;
+  }
+
+  async countAhead(job: EvaluationJob) {
+    return (await this.collection()).countDocuments({ lane: job.lane, status: 'queued', created_at: { $lt: job.created_at } });
+  }
+}
+
+// Local stand-in when MongoDB is not configured (jobs do not survive a restart)
+class MemoryJobStore implements JobStore {
+  private jobs = new Map<string, EvaluationJob>();
+
+  async insert(job: EvaluationJob) {
+    this.jobs.set(job.job_id, { ...job });
+    this.prune();
+  }
+
+  async get(jobId: string) {
+    const job = this.jobs.get(jobId);
+    return job ? { ...job } : null;
+  }
+
+  async getMany(jobIds: string[]) {
+    return jobIds.flatMap(jobId => {
+      const job = this.jobs.get(jobId);
+      return job ? [{ ...job }] : [];
+    });
+  }
+
+  async findReusable(idempotencyKey: string, completedSince: Date | null) {
+    let match: EvaluationJob | null = null;
+    for (const job of this.jobs.values()) {
+      if (job.idempotency_key !== idempotencyKey) continue;
+      const reusable = job.status === 'queued' || job.status === 'running' ||
+        (!!completedSince && job.status === 'completed' && !!job.finished_at && job.finished_at >= completedSince);
+      if (reusable && (!match || job.created_at > match.created_at)) match = job;
+    }
+    return match ? { ...match } : null;
+  }
+
+  async claimNext(lane: JobLane, now: Date) {
+    // Map iteration follows insertion order, i.e. oldest first
+    for (const job of this.jobs.values()) {
+      if (job.lane !== lane) continue;
+      const expired = job.status === 'running' && !!job.lease_expires_at && job.lease_expires_at < now;
+      if (job.status === 'queued' || expired) {
+        Object.assign(job, {
+          status: 'running', started_at: now, updated_at: now,
+          lease_expires_at: new Date(now.getTime() + LEASE_MS), attempts: job.attempts + 1
+        });
+        return { ...job };
+      }
+    }
+    return null;
+  }
+
+  async promote(jobId: string, lane: JobLane) {
+    const job = this.jobs.get(jobId);
+    if (!job || job.lane !== 'batch' || job.status !== 'queued') return false;
+    Object.assign(job, { lane, updated_at: new Date() });
+    return true;
+  }
+
+  async updateLeased(jobId: string, attempt: number, patch: Partial<EvaluationJob>) {
+    const job = this.jobs.get(jobId);
+    if (!job || job.status !== 'running' || job.attempts !== attempt) return false;
+    Object.assign(job, patch, { updated_at: new Date() });
+    return true;
+  }
+
+  async countAhead(job: EvaluationJob) {
+    let ahead = 0;
+    for (const other of this.jobs.values()) {
+      if (other.lane === job.lane && other.status === 'queued' && other.created_at < job.created_at) ahead++;
+    }
+    return ahead;
+  }
+
+  private prune() {
+    const cutoff = Date.now() - 24 * 60 * 60 * 1000;
+    for (const [jobId, job] of this.jobs) {
+      if (job.finished_at && job.finished_at.getTime() < cutoff) this.jobs.delete(jobId);
+    }
+  }
+}
+
+const store: JobStore = isMongoConfigured() ? new MongoJobStore() : new MemoryJobStore();
+const handlers: Partial<Record<JobLane, JobHandler>> = {};
+// Worker slots 0..WORKER_CONCURRENCY-1 that have a running loop; a stopped loop's slot is refilled by the next runWorkers()
+const busySlots = new Set<number>();
+let drained: Promise<void> | null = null;
+
+export function registerJobHandler(lane: JobLane, handler: JobHandler) {
+  handlers[lane] = handler;
+}
+
+export interface SubmitOptions {
+  cacheStatus?: CacheStatus;
+  // Record the job as already completed with this result (served from a cache)
+  result?: unknown;
+  // Set to false when the key does not capture everything the result depends on, so only a
+  // queued or running job is reused and a finished one is never returned after its inputs change
+  reuseCompleted?: boolean;
+}
+
+/**
+ * Queue a job, or return the existing one for the same idempotency key
+ */
+export async function submitJob(
+  lane: JobLane,
+  payload: Record<string, unknown>,
+  idempotencyKey: string | null = null,
+  options: SubmitOptions = {}
+): Promise<{ job: EvaluationJob; reused: boolean }> {
+  const precomputed = options.result !== undefined;
+  if (idempotencyKey && !precomputed) {
+    const completedSince = options.reuseCompleted === false ? null : new Date(Date.now() - REUSE_WINDOW_MS);
+    const existing = await store.findReusable(idempotencyKey, completedSince);
+    if (existing) {
+      // A queued batch job would otherwise keep an interactive caller waiting behind every
+      // interactive job and the rest of the batch; batch payloads run under the interactive handlers
+      if (lane !== 'batch' && existing.lane === 'batch' && existing.status === 'queued' && await store.promote(existing.job_id, lane)) {
+        console.log(`[Jobs] Promoted batch job ${existing.job_id} to the ${lane} lane`);
+        existing.lane = lane;
+      }
+      console.log(`[Jobs] Reusing ${existing.status} job ${existing.job_id} for key ${idempotencyKey.slice(0, 12)}`);
+      return { job: existing, reused: true };
+    }
+  }
+
+  const now = new Date();
+  const job: EvaluationJob = {
+    job_id: crypto.randomUUID(),
+    lane,
+    status: precomputed ? 'completed' : 'queued',
+    stage: precomputed ? 'completed' : 'queued',
+    payload,
+    idempotency_key: idempotencyKey,
+    result: precomputed ? options.result : null,
+    partial_report: null,
+    error: null,
+    cache_status: options.cacheStatus ?? null,
+    attempts: 0,
+    created_at: now,
+    updated_at: now,
+    started_at: precomputed ? now : null,
+    finished_at: precomputed ? now : null,
+    lease_expires_at: null
+  };
+  await store.insert(job);
+  console.log(`[Jobs] ${precomputed ? 'Recorded cached' : 'Queued'} ${lane} job ${job.job_id}`);
+  return { job, reused: false };
+}
+
+export async function getJob(jobId: string): Promise<EvaluationJob | null> {
+  return store.get(jobId);
+}
+
+export async function getJobs(jobIds: string[]): Promise<EvaluationJob[]> {
+  return jobIds.length > 0 ? store.getMany(jobIds) : [];
+}
+
+export async function getQueuePosition(job: EvaluationJob): Promise<number | null> {
+  return job.status === 'queued' ? store.countAhead(job) : null;
+}
+
+/**
+ * Claim the next job, checking lanes in priority order
+ * Worker 0 prefers full evaluations so they cannot be starved by a stream of quick ones;
+ * batch jobs come last for every worker
+ */
+async function claimNextJob(workerIndex: number): Promise<EvaluationJob | null> {
+  const lanes: JobLane[] = workerIndex === 0 ? ['full', 'quick', 'batch'] : ['quick', 'full', 'batch'];
+  const now = new Date();
+  for (const lane of lanes) {
+    if (!handlers[lane]) continue;
+    const job = await store.claimNext(lane, now);
+    if (job) return job;
+  }
+  return null;
+}
+
+async function runJob(job: EvaluationJob) {
+  // Every write goes through the lease, so a worker whose lease ran out cannot overwrite the
+  // job once another worker has claimed it
+  const leased = (patch: Partial<EvaluationJob>) =>
+    store.updateLeased(job.job_id, job.attempts, { ...patch, lease_expires_at: new Date(Date.now() + LEASE_MS) });
+  const finish = async (patch: Partial<EvaluationJob>) => {
+    const held = await store.updateLeased(job.job_id, job.attempts, { ...patch, finished_at: new Date(), lease_expires_at: null });
+    if (!held) console.log(`[Jobs] ${job.lane} job ${job.job_id} lost its lease; outcome of attempt ${job.attempts} discarded`);
+    return held;
+  };
+
+  if (job.attempts > MAX_ATTEMPTS) {
+    await finish({ status: 'failed', stage: 'failed', error: `Abandoned after ${MAX_ATTEMPTS} attempts` });
+    return;
+  }
+
+  const handler = handlers[job.lane]!;
+  const setStage: SetJobStage = async stage => {
+    await leased({ stage });
+  };
+  const saveDraft: SaveJobDraft = async partialReport => {
+    await leased({ partial_report: partialReport });
+  };
+  const heartbeat = setInterval(() => {
+    leased({}).catch(error => console.log(`[Jobs] Could not renew lease on job ${job.job_id}: ${error}`));
+  }, LEASE_RENEW_MS);
+  const started = performance.now();
+  try {
+    const result = await handler(job, setStage, saveDraft);
+    if (await finish({ status: 'completed', stage: 'completed', result, partial_report: null })) {
+      console.log(`[Jobs] ${job.lane} job ${job.job_id} completed in ${Math.round(performance.now() - started)}ms`);
+    }
+  } catch (error) {
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    if (await finish({ status: 'failed', stage: 'failed', error: errorMessage })) {
+      console.log(`[Jobs] ${job.lane} job ${job.job_id} failed: ${errorMessage}`);
+    }
+  } finally {
+    clearInterval(heartbeat);
+  }
+}
+
+async function workerLoop(workerIndex: number) {
+  try {
+    for (let job = await claimNextJob(workerIndex); job; job = await claimNextJob(workerIndex)) {
+      await runJob(job);
+    }
+  } catch (error) {
+    console.log(`[Jobs] Worker ${workerIndex} stopped: ${error}`);
+  } finally {
+    busySlots.delete(workerIndex);
+  }
+}
+
+/**
+ * Start a worker in every free slot up to the concurrency limit
+ * Slots are reused rather than numbered by count, so slot 0 (the full-lane worker) is always refilled
+ * Resolves once the queue is drained, so routes can keep the instance alive with after()
+ */
+export function runWorkers(): Promise<void> {
+  const starting: Promise<void>[] = [];
+  for (let slot = 0; slot < WORKER_CONCURRENCY; slot++) {
+    if (busySlots.has(slot)) continue;
+    busySlots.add(slot);
+    starting.push(workerLoop(slot));
+  }
+  if (starting.length > 0) {
+    const previous = drained;
+    drained = Promise.all([previous, ...starting]).then(() => undefined);
+  }
+  return drained ?? Promise.resolve();
+}
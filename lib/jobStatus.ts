@@ -0,0 +1,40 @@
+import { NextResponse, after } from 'next/server';
+import { getJob, getQueuePosition, runWorkers } from '@/lib/evaluationJobs';
+
+/**
+ * Status response shared by the job polling routes
+ * Polling a queued job also starts workers, so jobs left behind by a
+ * restarted instance are picked up by whichever instance serves the poll
+ */
+export async function jobStatusResponse(jobId: string) {
+  try {
+    const job = await getJob(jobId);
+    if (!job) {
+      return NextResponse.json({ detail: 'Job not found' }, { status: 404 });
+    }
+
+    if (job.status === 'queued' || job.status === 'running') {
+      after(() => runWorkers());
+    }
+
+    return NextResponse.json({
+      job_id: job.job_id,
+      lane: job.lane,
+      status: job.status,
+      stage: job.stage,
+      result: job.status === 'completed' ? job.result : null,
+      partial_report: job.status === 'running' ? job.partial_report ?? null : null,
+      error: job.error,
+      cache_status: job.cache_status ?? null,
+      attempts: job.attempts,
+      queue_position: await getQueuePosition(job),
+      created_at: job.created_at,
+      started_at: job.started_at,
+      finished_at: job.finished_at
+    });
+  } catch (error) {
+    console.error('Job status error:', error);
+    const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+    return NextResponse.json({ detail: 'Failed to get job status: ' + errorMessage }, { status: 500 });
+  }
+}
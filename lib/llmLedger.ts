@@ -0,0 +1,344 @@
+// LLM call ledger and budget-aware admission control
+// Every model call is metered (model, tokens, latency, cost) per agency and endpoint
+// in the `llm_calls` MongoDB collection (in-memory when MONGO_URL is not set).
+// Before a call runs, the agency's spend this month decides whether it runs on the
+// requested model, is degraded to a cheaper one, or is refused with a 429 up front
+// instead of failing at the provider. A global monthly ceiling applies on top of every
+// agency's budget, whichever agency a call is charged to. Calls beyond the concurrency
+// limit wait in line.
+
+import { Collection } from 'mongodb';
+import type { CompletionUsage } from 'openai/resources/completions';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { envInt, envFloat } from '@/lib/env';
+
+export const DEFAULT_AGENCY_ID = 'unassigned';
+
+export interface LlmCallContext {
+  agency_id: string;
+  endpoint: string;
+}
+
+export interface LlmCallRecord extends LlmCallContext {
+  model: string;
+  requested_model: string;
+  prompt_tokens: number;
+  completion_tokens: number;
+  latency_ms: number;
+  cost_usd: number;
+  status: 'ok' | 'error';
+  created_at: Date;
+}
+
+export interface LlmUsageRow extends LlmCallContext {
+  model: string;
+  calls: number;
+  errors: number;
+  prompt_tokens: number;
+  completion_tokens: number;
+  cost_usd: number;
+  avg_latency_ms: number;
+}
+
+export type BudgetMode = 'normal' | 'degraded' | 'blocked';
+
+export interface BudgetStatus {
+  // Null for the global budget across all agencies
+  agency_id: string | null;
+  period_start: string;
+  spend_usd: number;
+  budget_usd: number;
+  remaining_usd: number;
+  utilization: number;
+  global_spend_usd: number;
+  global_budget_usd: number;
+  global_utilization: number;
+  // From whichever of the agency and global budgets is closer to running out
+  mode: BudgetMode;
+}
+
+/**
+ * Raised when a call is refused: 429 when the agency's or the global budget is spent,
+ * 503 when no call slot frees up in time
+ */
+export class LlmAdmissionError extends Error {
+  constructor(message: string, readonly status: 429 | 503, readonly budget: BudgetStatus | null = null) {
+    super(message);
+    this.name = 'LlmAdmissionError';
+  }
+}
+
+// USD per million tokens: [prompt, completion]
+const MODEL_PRICES: Record<string, [number, number]> = {
+  'gpt-4o': [2.5, 10],
+  'gpt-4o-mini': [0.15, 0.6]
+};
+// Cheaper model used once an agency passes the degrade threshold
+const DEGRADED_MODEL: Record<string, string> = {
+  'gpt-4o': 'gpt-4o-mini'
+};
+
+const DEFAULT_BUDGET_USD = envFloat('LLM_MONTHLY_BUDGET_USD', 100);
+// Ceiling on the month's spend across all agencies
+const GLOBAL_BUDGET_USD = envFloat('LLM_GLOBAL_MONTHLY_BUDGET_USD', 1000);
+// Per-agency overrides, e.g. {"agency-1": 250}
+const AGENCY_BUDGETS: Record<string, number> = parseAgencyBudgets(process.env.LLM_AGENCY_BUDGETS);
+// Fraction of the budget after which calls are degraded to cheaper models
+const DEGRADE_AT = envFloat('LLM_DEGRADE_AT', 0.8);
+const MAX_CONCURRENT_CALLS = envInt('LLM_MAX_CONCURRENT_CALLS', 8);
+const ADMISSION_WAIT_MS = envInt('LLM_ADMISSION_WAIT_MS', 30000);
+// Spend is re-read from the ledger this often; this instance's calls are added in between
+const SPEND_REFRESH_MS = 30 * 1000;
+
+function parseAgencyBudgets(value: string | undefined): Record<string, number> {
+  if (!value) return {};
+  try {
+    return JSON.parse(value);
+  } catch {
+    console.log('[LLM Ledger] Ignoring invalid LLM_AGENCY_BUDGETS');
+    return {};
+  }
+}
+
+export function callCost(model: string, promptTokens: number, completionTokens: number): number {
+  const [promptPrice, completionPrice] = MODEL_PRICES[model] ?? MODEL_PRICES['gpt-4o'];
+  return (promptTokens * promptPrice + completionTokens * completionPrice) / 1_000_000;
+}
+
+// Budgets run per calendar month (UTC)
+function periodStart(now: Date = new Date()): Date {
+  return new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), 1));
+}
+
+interface LedgerStore {
+  insert(record: LlmCallRecord): Promise<void>;
+  usage(since: Date, agencyId: string | null): Promise<LlmUsageRow[]>;
+}
+
+class MongoLedgerStore implements LedgerStore {
+  private async collection(): Promise<Collection<LlmCallRecord>> {
+    const collection = (await getDb()).collection<LlmCallRecord>('llm_calls');
+    await ensureIndexes('llm_calls');
+    return collection;
+  }
+
+  async insert(record: LlmCallRecord) {
+    await (await this.collection()).insertOne({ ...record });
+  }
+
+  async usage(since: Date, agencyId: string | null) {
+    const rows = await (await this.collection()).aggregate<LlmUsageRow>([
+      { $match: { created_at: { $gte: since }, ...(agencyId && { agency_id: agencyId }) } },
+      {
+        $group: {
+          _id: { agency_id: '$agency_id', endpoint: '$endpoint', model: '$model' },
+          calls: { $sum: 1 },
+          errors: { $sum: { $cond: [{ $eq: ['$status', 'error'] }, 1, 0] } },
+          prompt_tokens: { $sum: '$prompt_tokens' },
+          completion_tokens: { $sum: '$completion_tokens' },
+          cost_usd: { $sum: '$cost_usd' },
+          avg_latency_ms: { $avg: '$latency_ms' }
+        }
+      },
+      {
+        $project: {
+          _id: 0,
+          agency_id: '$_id.agency_id',
+          endpoint: '$_id.endpoint',
+          model: '$_id.model',
+          calls: 1,
+          errors: 1,
+          prompt_tokens: 1,
+          completion_tokens: 1,
+          cost_usd: 1,
+          avg_latency_ms: { $round: ['$avg_latency_ms', 0] }
+        }
+      }
+    ]).toArray();
+    return rows;
+  }
+}
+
+// Local stand-in when MongoDB is not configured (lost on restart)
+class MemoryLedgerStore implements LedgerStore {
+  private records: LlmCallRecord[] = [];
+
+  async insert(record: LlmCallRecord) {
+    // Only the current period is ever queried
+    const since = periodStart();
+    if (this.records.length > 0 && this.records[0].created_at < since) {
+      this.records = this.records.filter(existing => existing.created_at >= since);
+    }
+    this.records.push(record);
+  }
+
+  async usage(since: Date, agencyId: string | null) {
+    const rows = new Map<string, LlmUsageRow & { latency_total: number }>();
+    for (const record of this.records) {
+      if (record.created_at < since || (agencyId && record.agency_id !== agencyId)) continue;
+      const key = `${record.agency_id}|${record.endpoint}|${record.model}`;
+      let row = rows.get(key);
+      if (!row) {
+        row = {
+          agency_id: record.agency_id, endpoint: record.endpoint, model: record.model,
+          calls: 0, errors: 0, prompt_tokens: 0, completion_tokens: 0, cost_usd: 0, avg_latency_ms: 0, latency_total: 0
+        };
+        rows.set(key, row);
+      }
+      row.calls++;
+      if (record.status === 'error') row.errors++;
+      row.prompt_tokens += record.prompt_tokens;
+      row.completion_tokens += record.completion_tokens;
+      row.cost_usd += record.cost_usd;
+      row.latency_total += record.latency_ms;
+    }
+    return [...rows.values()].map(({ latency_total, ...row }) => ({ ...row, avg_latency_ms: Math.round(latency_total / row.calls) }));
+  }
+}
+
+const store: LedgerStore = isMongoConfigured() ? new MongoLedgerStore() : new MemoryLedgerStore();
+// Keyed by agency, with null for the spend across all agencies
+const spendCache = new Map<string | null, { period: number; spend: number; fetched_at: number }>();
+
+async function currentSpend(agencyId: string | null): Promise<number> {
+  const period = periodStart().getTime();
+  const cached = spendCache.get(agencyId);
+  if (cached && cached.period === period && Date.now() - cached.fetched_at < SPEND_REFRESH_MS) {
+    return cached.spend;
+  }
+  const rows = await store.usage(new Date(period), agencyId);
+  const spend = rows.reduce((sum, row) => sum + row.cost_usd, 0);
+  spendCache.set(agencyId, { period, spend, fetched_at: Date.now() });
+  return spend;
+}
+
+function roundUsd(value: number): number {
+  return Math.round(value * 10000) / 10000;
+}
+
+/**
+ * Spend and remaining budget for an agency in the current month, or across all agencies when null
+ */
+export async function getBudgetStatus(agencyId: string | null): Promise<BudgetStatus> {
+  const budget = agencyId === null ? GLOBAL_BUDGET_USD : AGENCY_BUDGETS[agencyId] ?? DEFAULT_BUDGET_USD;
+  const spend = await currentSpend(agencyId);
+  const globalSpend = agencyId === null ? spend : await currentSpend(null);
+  const utilization = budget > 0 ? spend / budget : 1;
+  const globalUtilization = GLOBAL_BUDGET_USD > 0 ? globalSpend / GLOBAL_BUDGET_USD : 1;
+  const limiting = Math.max(utilization, globalUtilization);
+  return {
+    agency_id: agencyId,
+    period_start: periodStart().toISOString(),
+    spend_usd: roundUsd(spend),
+    budget_usd: budget,
+    remaining_usd: roundUsd(Math.max(0, budget - spend)),
+    utilization: Math.round(utilization * 1000) / 1000,
+    global_spend_usd: roundUsd(globalSpend),
+    global_budget_usd: GLOBAL_BUDGET_USD,
+    global_utilization: Math.round(globalUtilization * 1000) / 1000,
+    mode: limiting >= 1 ? 'blocked' : limiting >= DEGRADE_AT ? 'degraded' : 'normal'
+  };
+}
+
+/**
+ * Per agency/endpoint/model usage rows for the current month
+ */
+export async function getLlmUsage(agencyId: string | null = null): Promise<LlmUsageRow[]> {
+  const rows = await store.usage(periodStart(), agencyId);
+  return rows
+    .map(row => ({ ...row, cost_usd: roundUsd(row.cost_usd) }))
+    .sort((a, b) => b.cost_usd - a.cost_usd);
+}
+
+export function budgetExceededMessage(status: BudgetStatus): string {
+  if (status.agency_id === null || status.global_utilization >= 1) {
+    return `LLM budget exhausted across all agencies: $${status.global_spend_usd.toFixed(2)} of $${status.global_budget_usd.toFixed(2)} used this month`;
+  }
+  return `LLM budget exhausted for agency ${status.agency_id}: $${status.spend_usd.toFixed(2)} of $${status.budget_usd.toFixed(2)} used this month`;
+}
+
+// Call slots: callers beyond the limit wait in FIFO order
+let activeCalls = 0;
+const waiting: (() => void)[] = [];
+
+function acquireSlot(): Promise<void> {
+  if (activeCalls < MAX_CONCURRENT_CALLS) {
+    activeCalls++;
+    return Promise.resolve();
+  }
+  return new Promise((resolve, reject) => {
+    const grant = () => {
+      clearTimeout(timer);
+      resolve();
+    };
+    const timer = setTimeout(() => {
+      waiting.splice(waiting.indexOf(grant), 1);
+      reject(new LlmAdmissionError(`LLM capacity busy: no call slot within ${ADMISSION_WAIT_MS}ms`, 503));
+    }, ADMISSION_WAIT_MS);
+    waiting.push(grant);
+  });
+}
+
+function releaseSlot() {
+  const next = waiting.shift();
+  // The slot passes straight to the next waiter
+  if (next) next();
+  else activeCalls--;
+}
+
+async function recordCall(record: LlmCallRecord) {
+  for (const key of [record.agency_id, null]) {
+    const cached = spendCache.get(key);
+    if (cached) cached.spend += record.cost_usd;
+  }
+  await store.insert(record);
+}
+
+/**
+ * Run one model call under admission control and record it in the ledger
+ * `call` receives the model to use (possibly degraded) and returns its result and token usage
+ */
+export async function meteredCall<T>(
+  context: LlmCallContext,
+  model: string,
+  call: (model: string) => Promise<{ result: T; usage?: CompletionUsage | null }>
+): Promise<T> {
+  const budget = await getBudgetStatus(context.agency_id);
+  if (budget.mode === 'blocked') {
+    throw new LlmAdmissionError(budgetExceededMessage(budget), 429, budget);
+  }
+  const admittedModel = budget.mode === 'degraded' ? DEGRADED_MODEL[model] ?? model : model;
+  if (admittedModel !== model) {
+    console.log(
+      `[LLM Ledger] ${context.agency_id} at ${Math.round(budget.utilization * 100)}% of budget ` +
+      `(all agencies at ${Math.round(budget.global_utilization * 100)}%), ${context.endpoint} degraded to ${admittedModel}`
+    );
+  }
+
+  await acquireSlot();
+  const started = performance.now();
+  let usage: CompletionUsage | null | undefined;
+  let status: LlmCallRecord['status'] = 'error';
+  try {
+    const outcome = await call(admittedModel);
+    usage = outcome.usage;
+    status = 'ok';
+    return outcome.result;
+  } finally {
+    releaseSlot();
+    const promptTokens = usage?.prompt_tokens ?? 0;
+    const completionTokens = usage?.completion_tokens ?? 0;
+    recordCall({
+      ...context,
+      model: admittedModel,
+      requested_model: model,
+      prompt_tokens: promptTokens,
+      completion_tokens: completionTokens,
+      latency_ms: Math.round(performance.now() - started),
+      cost_usd: callCost(admittedModel, promptTokens, completionTokens),
+      status,
+      created_at: new Date()
+    }).catch(error => console.log(`[LLM Ledger] Could not record call: ${error}`));
+  }
+}
@@ -0,0 +1,82 @@
+// Streaming chat completions for evaluation reports
+// Forwards tokens as they arrive and reports each section heading once its line
+// is complete, so callers can push partial reports to clients and save drafts.
+
+import type OpenAI from 'openai';
+import type { ChatCompletionCreateParamsNonStreaming } from 'openai/resources/chat/completions';
+import type { CompletionUsage } from 'openai/resources/completions';
+
+// Headings such as "VALUE RANGE", "**PRICING STRATEGY:**", "## 2. Market Analysis"
+const SECTION_HEADING = /^\s*(?:#{1,4}\s*)?(?:\*\*)?\s*(?:\d+\.\s*)?([A-Z][A-Za-z/&' -]{2,60}?)\s*:?\s*(?:\*\*)?\s*:?\s*$/;
+
+export interface ReportStreamHandlers {
+  // Every token batch, with the report so far
+  onDelta?: (delta: string, text: string) => void;
+  // A section heading line has been written; `text` is the report up to and including it
+  onSection?: (title: string, text: string) => void;
+  // Token usage, reported once the stream ends
+  onUsage?: (usage: CompletionUsage) => void;
+}
+
+function matchSectionHeading(line: string): string | null {
+  const match = line.match(SECTION_HEADING);
+  if (!match || /[.!?]$/.test(match[1])) return null;
+  const title = match[1].trim();
+  // Plain short lines only count when they look like headings (marked up, numbered, capitals or a trailing colon)
+  const marked = /^\s*(?:#{1,4}|\*\*|\d+\.)/.test(line) || /:\s*(?:\*\*)?\s*$/.test(line);
+  return marked || title === title.toUpperCase() ? title : null;
+}
+
+/**
+ * Run a chat completion with streaming and return the full text
+ */
+export async function streamReport(
+  openai: OpenAI,
+  params: Omit<ChatCompletionCreateParamsNonStreaming, 'stream'>,
+  handlers: ReportStreamHandlers = {}
+): Promise<string> {
+  const stream = await openai.chat.completions.create({ ...params, stream: true, stream_options: { include_usage: true } });
+  let text = '';
+  let lineStart = 0;
+
+  for await (const chunk of stream) {
+    if (chunk.usage) handlers.onUsage?.(chunk.usage);
+    const delta = chunk.choices[0]?.delta?.content;
+    if (!delta) continue;
+    text += delta;
+    handlers.onDelta?.(delta, text);
+
+    let newline: number;
+    while ((newline = text.indexOf('\n', lineStart)) !== -1) {
+      const title = matchSectionHeading(text.slice(lineStart, newline));
+      lineStart = newline + 1;
+      if (title) handlers.onSection?.(title, text.slice(0, lineStart));
+    }
+  }
+
+  return text;
+}
+
+/**
+ * Wrap a draft save so writes are serialized and only the latest draft is sent
+ * A slow store never has more than one save pending
+ */
+export function createDraftWriter(write: (draft: string) => Promise<void>): (draft: string) => void {
+  let pending: string | null = null;
+  let saving = false;
+
+  const flush = async () => {
+    saving = true;
+    while (pending !== null) {
+      const draft = pending;
+      pending = null;
+      await write(draft).catch(() => {});
+    }
+    saving = false;
+  };
+
+  return draft => {
+    pending = draft;
+    if (!saving) flush();
+  };
+}
@@ -0,0 +1,97 @@
+// Bounded in-process cache with per-entry TTL and least-recently-used eviction
+// Map iteration order is insertion order, so re-inserting on access keeps the
+// least recently used entry first. Optionally also bounded by total size, using a
+// caller-supplied size estimate per value.
+
+export interface CacheStats {
+  entries: number;
+  max_entries: number;
+  bytes: number;
+  max_bytes: number | null;
+  hits: number;
+  misses: number;
+  evictions: number;
+  expirations: number;
+  hit_ratio: number;
+}
+
+interface CacheEntry<V> {
+  value: V;
+  expiresAt: number;
+  bytes: number;
+}
+
+export class LRUCache<V> {
+  private entries = new Map<string, CacheEntry<V>>();
+  private bytes = 0;
+  private hits = 0;
+  private misses = 0;
+  private evictions = 0;
+  private expirations = 0;
+
+  constructor(
+    private readonly maxEntries: number,
+    private readonly ttlMs: number,
+    private readonly maxBytes: number | null = null,
+    private readonly sizeOf: (value: V) => number = () => 0
+  ) {}
+
+  get(key: string): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.misses++;
+      return undefined;
+    }
+    if (entry.expiresAt <= Date.now()) {
+      this.remove(key);
+      this.expirations++;
+      this.misses++;
+      return undefined;
+    }
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.hits++;
+    return entry.value;
+  }
+
+  set(key: string, value: V, ttlMs: number = this.ttlMs) {
+    this.remove(key);
+    const bytes = this.sizeOf(value);
+    // A value larger than the whole cache is not stored at all
+    if (this.maxBytes !== null && bytes > this.maxBytes) return;
+    this.entries.set(key, { value, expiresAt: Date.now() + ttlMs, bytes });
+    this.bytes += bytes;
+    while (this.entries.size > this.maxEntries || (this.maxBytes !== null && this.bytes > this.maxBytes)) {
+      const oldest = this.entries.keys().next().value as string;
+      this.remove(oldest);
+      this.evictions++;
+    }
+  }
+
+  delete(key: string) {
+    this.remove(key);
+  }
+
+  private remove(key: string) {
+    const entry = this.entries.get(key);
+    if (entry) {
+      this.bytes -= entry.bytes;
+      this.entries.delete(key);
+    }
+  }
+
+  stats(): CacheStats {
+    const lookups = this.hits + this.misses;
+    return {
+      entries: this.entries.size,
+      max_entries: this.maxEntries,
+      bytes: this.bytes,
+      max_bytes: this.maxBytes,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      expirations: this.expirations,
+      hit_ratio: lookups > 0 ? Math.round((this.hits / lookups) * 1000) / 1000 : 0
+    };
+  }
+}
@@ -0,0 +1,30 @@
+import { Db, MongoClient } from 'mongodb';
+import { instrumentMongoClient } from '@/lib/queryStats';
+
+let clientPromise: Promise<MongoClient> | null = null;
+
+/**
+ * Whether a MongoDB connection is configured (MONGO_URL)
+ * Modules that persist state fall back to an in-process stand-in when it is not
+ */
+export function isMongoConfigured(): boolean {
+  return !!process.env.MONGO_URL;
+}
+
+export async function getDb(): Promise<Db> {
+  if (!process.env.MONGO_URL) {
+    throw new Error('MONGO_URL environment variable is not set');
+  }
+  if (!clientPromise) {
+    // Command monitoring feeds the query shape stats and slow query log (lib/queryStats.ts)
+    const client = new MongoClient(process.env.MONGO_URL, { monitorCommands: true });
+    instrumentMongoClient(client);
+    clientPromise = client.connect();
+    // Allow a later call to retry if the first connection attempt fails
+    clientPromise.catch(() => {
+      clientPromise = null;
+    });
+  }
+  const client = await clientPromise;
+  return client.db(process.env.DB_NAME || 'propertyval');
+}
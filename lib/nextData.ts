@@ -0,0 +1,277 @@
+// Streaming extraction of embedded Next.js page data from scraped listing pages
+// Listing sites embed their page data as JSON in <script id="__NEXT_DATA__">. Instead of
+// buffering the whole page and JSON.parse-ing the whole blob, the response body is read
+// chunk by chunk: HTML ahead of the script is dropped as it arrives, the JSON is scanned
+// incrementally and only the elements of one array (the listings) are parsed, one at a
+// time. The download is cancelled as soon as that array closes, and malformed JSON
+// aborts it at the chunk where it appears.
+
+import { envInt } from '@/lib/env';
+
+const SCRIPT_OPEN = '<script id="__NEXT_DATA__"';
+const PREVIEW_CHARS = 500;
+// Pages larger than this are abandoned rather than read to the end
+const MAX_PAGE_BYTES = envInt('SCRAPE_MAX_PAGE_BYTES', 8 * 1024 * 1024);
+
+// Where Homely's sold-properties pages keep their listings
+export const HOMELY_LISTINGS_PATH = ['props', 'pageProps', 'ssrData', 'listings'];
+
+export interface NextDataExtract {
+  // Whether the __NEXT_DATA__ script was found
+  found: boolean;
+  // Whether the requested array was present in it
+  array_found: boolean;
+  items: number;
+  bytes_read: number;
+  // Start of the page, for diagnosing blocked or redesigned pages
+  preview: string;
+  // Which of the `watchFor` strings appeared in the page ahead of the embedded data
+  matched: string[];
+}
+
+type Expect = 'value' | 'value-or-end' | 'key' | 'key-or-end' | 'colon' | 'next';
+
+interface Frame {
+  kind: 'root' | 'object' | 'array';
+  path: string;
+  expect: Expect;
+  // Key of the member currently being read (objects)
+  key: string;
+  // The array whose elements are emitted
+  target: boolean;
+}
+
+const WHITESPACE = new Set([' ', '\t', '\n', '\r']);
+const SCALAR_CHAR = /[0-9a-zA-Z+\-.]/;
+
+/**
+ * Incremental JSON scanner that emits the parsed elements of the array at `path`
+ * Text outside that array is only tokenized, never materialized. Throws SyntaxError at
+ * the first structural error.
+ */
+export class JsonArrayScanner {
+  // Root complete or target array closed; further input is ignored
+  done = false;
+  arrayFound = false;
+
+  private readonly targetPath: string;
+  private stack: Frame[] = [{ kind: 'root', path: '', expect: 'value', key: '', target: false }];
+  private mode: 'structure' | 'string' | 'scalar' = 'structure';
+  private stringIsKey = false;
+  private escaped = false;
+  private keyBuffer = '';
+  // Text of the array element being read, carried across chunks
+  private capture: string | null = null;
+  private captureFrom = 0;
+  private offset = 0;
+
+  constructor(path: string[], private readonly onItem: (item: unknown) => void) {
+    this.targetPath = path.map(key => '/' + key).join('');
+  }
+
+  write(text: string) {
+    this.captureFrom = 0;
+    for (let i = 0; i < text.length && !this.done; i++) {
+      const ch = text[i];
+
+      if (this.mode === 'string') {
+        if (this.escaped) {
+          this.escaped = false;
+          if (this.stringIsKey) this.keyBuffer += ch;
+        } else if (ch === '\\') {
+          this.escaped = true;
+          if (this.stringIsKey) this.keyBuffer += ch;
+        } else if (ch === '"') {
+          this.mode = 'structure';
+          if (this.stringIsKey) {
+            const top = this.top();
+            top.key = this.keyBuffer;
+            top.expect = 'colon';
+          } else {
+            this.endValue(text, i + 1);
+          }
+        } else if (this.stringIsKey) {
+          this.keyBuffer += ch;
+        }
+        continue;
+      }
+
+      if (this.mode === 'scalar') {
+        if (SCALAR_CHAR.test(ch)) continue;
+        this.mode = 'structure';
+        this.endValue(text, i);
+        if (this.done) break;
+      }
+
+      if (WHITESPACE.has(ch)) continue;
+      const top = this.top();
+      switch (top.expect) {
+        case 'key-or-end':
+        case 'key':
+          if (ch === '"') {
+            this.mode = 'string';
+            this.stringIsKey = true;
+            this.keyBuffer = '';
+          } else if (ch === '}' && top.expect === 'key-or-end') {
+            this.close(text, i);
+          } else {
+            this.fail(ch, i);
+          }
+          break;
+        case 'colon':
+          if (ch !== ':') this.fail(ch, i);
+          top.expect = 'value';
+          break;
+        case 'value-or-end':
+          if (ch === ']') {
+            this.close(text, i);
+            break;
+          }
+        // falls through
+        case 'value':
+          this.startValue(top, ch, i);
+          break;
+        case 'next':
+          if (ch === ',' && top.kind === 'object') {
+            top.expect = 'key';
+          } else if (ch === ',' && top.kind === 'array') {
+            top.expect = 'value';
+          } else if ((ch === '}' && top.kind === 'object') || (ch === ']' && top.kind === 'array')) {
+            this.close(text, i);
+          } else {
+            this.fail(ch, i);
+          }
+          break;
+      }
+    }
+    if (this.capture !== null) {
+      this.capture += text.slice(this.captureFrom);
+    }
+    this.offset += text.length;
+  }
+
+  private top(): Frame {
+    return this.stack[this.stack.length - 1];
+  }
+
+  private startValue(parent: Frame, ch: string, i: number) {
+    const path = parent.kind === 'object' ? `${parent.path}/${parent.key}` : parent.kind === 'array' ? `${parent.path}/[]` : '';
+    parent.expect = 'next';
+    if (parent.target) {
+      this.capture = '';
+      this.captureFrom = i;
+    }
+    if (ch === '{') {
+      this.stack.push({ kind: 'object', path, expect: 'key-or-end', key: '', target: false });
+    } else if (ch === '[') {
+      const target = path === this.targetPath;
+      if (target) this.arrayFound = true;
+      this.stack.push({ kind: 'array', path, expect: 'value-or-end', key: '', target });
+    } else if (ch === '"') {
+      this.mode = 'string';
+      this.stringIsKey = false;
+    } else if (ch === '-' || (ch >= '0' && ch <= '9') || ch === 't' || ch === 'f' || ch === 'n') {
+      this.mode = 'scalar';
+    } else {
+      this.fail(ch, i);
+    }
+  }
+
+  private close(text: string, i: number) {
+    const closed = this.stack.pop()!;
+    if (closed.target) {
+      this.done = true;
+      return;
+    }
+    this.endValue(text, i + 1);
+  }
+
+  // A value ending at text[end - 1] is complete; the parent frame is on top
+  private endValue(text: string, end: number) {
+    const parent = this.top();
+    if (parent.kind === 'root') {
+      this.done = true;
+    } else if (parent.target && this.capture !== null) {
+      const raw = this.capture + text.slice(this.captureFrom, end);
+      this.capture = null;
+      this.onItem(JSON.parse(raw));
+    }
+  }
+
+  private fail(ch: string, i: number): never {
+    throw new SyntaxError(`Unexpected '${ch}' at offset ${this.offset + i} of embedded JSON`);
+  }
+}
+
+/**
+ * Read a listing page body and pass each element of the embedded array at `path` to `onItem`
+ * Stops reading (and cancels the download) once the array has been read. Throws on
+ * malformed or truncated JSON, or a page over SCRAPE_MAX_PAGE_BYTES.
+ */
+export async function extractNextDataArray(
+  body: ReadableStream<Uint8Array> | null,
+  path: string[],
+  onItem: (item: unknown) => void,
+  options: { watchFor?: string[] } = {}
+): Promise<NextDataExtract> {
+  const watchFor = options.watchFor ?? [];
+  const result: NextDataExtract = { found: false, array_found: false, items: 0, bytes_read: 0, preview: '', matched: [] };
+  if (!body) return result;
+
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  const scanner = new JsonArrayScanner(path, item => {
+    result.items++;
+    onItem(item);
+  });
+  const matched = new Set<string>();
+  // Enough trailing HTML to catch the script tag or a watched string split across chunks
+  const tailChars = Math.max(SCRIPT_OPEN.length, ...watchFor.map(text => text.length)) - 1;
+  let pending = '';
+
+  try {
+    while (!scanner.done) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      result.bytes_read += value.byteLength;
+      if (result.bytes_read > MAX_PAGE_BYTES) {
+        throw new Error(`Page larger than ${MAX_PAGE_BYTES} bytes`);
+      }
+      const text = decoder.decode(value, { stream: true });
+      if (result.preview.length < PREVIEW_CHARS) {
+        result.preview += text.slice(0, PREVIEW_CHARS - result.preview.length);
+      }
+      if (result.found) {
+        scanner.write(text);
+        continue;
+      }
+
+      pending += text;
+      for (const watched of watchFor) {
+        if (pending.includes(watched)) matched.add(watched);
+      }
+      const start = pending.indexOf(SCRIPT_OPEN);
+      if (start === -1) {
+        pending = pending.slice(-tailChars);
+        continue;
+      }
+      const tagEnd = pending.indexOf('>', start);
+      if (tagEnd === -1) {
+        pending = pending.slice(start);
+        continue;
+      }
+      result.found = true;
+      scanner.write(pending.slice(tagEnd + 1));
+      pending = '';
+    }
+    if (result.found && !scanner.done) {
+      throw new SyntaxError('Embedded JSON ended before it was complete');
+    }
+  } finally {
+    await reader.cancel().catch(() => {});
+  }
+
+  result.array_found = scanner.arrayFound;
+  result.matched = [...matched];
+  return result;
+}
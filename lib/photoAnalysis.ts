@@ -0,0 +1,302 @@
+// Photo analysis for property evaluations
+// Each photo is identified by a SHA-256 of its bytes, and the vision model's findings
+// for it are stored in the `photo_findings` MongoDB collection (in-memory when
+// MONGO_URL is not set). Re-evaluating a listing only sends new or changed photos to
+// the model; the per-photo findings are then aggregated into `improvements_detected`.
+// Remote photos are downloaded to be hashed only once per version: their hash is recorded
+// against the URL and its ETag/Last-Modified, which a HEAD request checks next time.
+
+import { Collection } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { getOpenAI } from '@/lib/openai';
+import { sha256HexBytes } from '@/lib/hash';
+import { dataUrlBytes, getImage, imageIdFromUrl, readImageBytes } from '@/lib/imageStore';
+import { LlmAdmissionError, LlmCallContext, meteredCall } from '@/lib/llmLedger';
+
+const VISION_MODEL = 'gpt-4o-mini';
+// Photos beyond this many are not analysed
+const MAX_PHOTOS = 10;
+const PHOTO_FETCH_TIMEOUT_MS = 10000;
+export const NO_PHOTOS_NOTE = 'No photos provided - condition and improvements could not be assessed from images.';
+
+export type PhotoCondition = 'excellent' | 'good' | 'fair' | 'poor' | 'unknown';
+
+export interface PhotoFinding {
+  content_hash: string;
+  room: string;
+  condition: PhotoCondition;
+  improvements: string[];
+  issues: string[];
+  summary: string;
+  model: string;
+  created_at: Date;
+}
+
+export interface PhotoAnalysis {
+  improvements_detected: string;
+  photos: number;
+  analysed: number;
+  cached: number;
+  failed: number;
+}
+
+// Content hash of a remote photo as served under a given ETag/Last-Modified
+interface PhotoSource {
+  url: string;
+  validator: string;
+  content_hash: string;
+  fetched_at: Date;
+}
+
+interface FindingStore {
+  getMany(hashes: string[]): Promise<PhotoFinding[]>;
+  put(finding: PhotoFinding): Promise<void>;
+  getSourceHash(url: string, validator: string): Promise<string | null>;
+  putSource(source: PhotoSource): Promise<void>;
+}
+
+class MongoFindingStore implements FindingStore {
+  private async collection(): Promise<Collection<PhotoFinding>> {
+    const collection = (await getDb()).collection<PhotoFinding>('photo_findings');
+    await ensureIndexes('photo_findings');
+    return collection;
+  }
+
+  async getMany(hashes: string[]) {
+    return (await this.collection()).find({ content_hash: { $in: hashes } }, { projection: { _id: 0 } }).toArray();
+  }
+
+  async put(finding: PhotoFinding) {
+    await (await this.collection()).updateOne({ content_hash: finding.content_hash }, { $set: finding }, { upsert: true });
+  }
+
+  private async sources(): Promise<Collection<PhotoSource>> {
+    const collection = (await getDb()).collection<PhotoSource>('photo_sources');
+    await ensureIndexes('photo_sources');
+    return collection;
+  }
+
+  async getSourceHash(url: string, validator: string) {
+    const source = await (await this.sources()).findOne({ url, validator }, { projection: { _id: 0, content_hash: 1 } });
+    return source?.content_hash ?? null;
+  }
+
+  async putSource(source: PhotoSource) {
+    await (await this.sources()).updateOne({ url: source.url, validator: source.validator }, { $set: source }, { upsert: true });
+  }
+}
+
+// Local stand-in when MongoDB is not configured (lost on restart)
+class MemoryFindingStore implements FindingStore {
+  private findings = new Map<string, PhotoFinding>();
+  // `${validator} ${url}` -> content hash
+  private sources = new Map<string, string>();
+
+  async getMany(hashes: string[]) {
+    return hashes.flatMap(hash => this.findings.get(hash) ?? []);
+  }
+
+  async put(finding: PhotoFinding) {
+    this.findings.set(finding.content_hash, finding);
+  }
+
+  async getSourceHash(url: string, validator: string) {
+    return this.sources.get(`${validator} ${url}`) ?? null;
+  }
+
+  async putSource(source: PhotoSource) {
+    this.sources.set(`${source.validator} ${source.url}`, source.content_hash);
+  }
+}
+
+const store: FindingStore = isMongoConfigured() ? new MongoFindingStore() : new MemoryFindingStore();
+
+/**
+ * Identifies the version of a remote photo, or null when the server sends no validator
+ */
+function photoValidator(response: Response): string | null {
+  const etag = response.headers.get('etag');
+  if (etag) return `etag:${etag}`;
+  const lastModified = response.headers.get('last-modified');
+  return lastModified ? `last-modified:${lastModified}` : null;
+}
+
+/**
+ * Content hash of an http(s) photo
+ * A HEAD request finds the photo's current ETag/Last-Modified; if that version was hashed
+ * before the recorded hash is used, otherwise the photo is downloaded and hashed
+ */
+async function remotePhotoHash(url: string): Promise<string> {
+  try {
+    const head = await fetch(url, { method: 'HEAD', signal: AbortSignal.timeout(PHOTO_FETCH_TIMEOUT_MS) });
+    const validator = head.ok ? photoValidator(head) : null;
+    const known = validator ? await store.getSourceHash(url, validator) : null;
+    if (known) return known;
+  } catch (error) {
+    // Servers that reject HEAD (or a lookup failure) fall back to hashing a full download
+    console.log(`[Photos] Could not check photo version, downloading instead: ${error}`);
+  }
+
+  const response = await fetch(url, { signal: AbortSignal.timeout(PHOTO_FETCH_TIMEOUT_MS) });
+  if (!response.ok) {
+    throw new Error(`Photo fetch returned ${response.status}`);
+  }
+  const contentHash = await sha256HexBytes(await response.arrayBuffer());
+  const validator = photoValidator(response);
+  if (validator) {
+    await store.putSource({ url, validator, content_hash: contentHash, fetched_at: new Date() }).catch(error => {
+      console.log(`[Photos] Could not record photo hash: ${error}`);
+    });
+  }
+  return contentHash;
+}
+
+/**
+ * Content hash of a photo given as a stored image URL, a data URL or an http(s) URL
+ * Stored images are already content-addressed, so their id is the hash
+ */
+async function photoHash(image: string): Promise<string> {
+  const storedId = imageIdFromUrl(image);
+  if (storedId) return storedId;
+  const inline = dataUrlBytes(image);
+  if (inline) return sha256HexBytes(inline);
+  return remotePhotoHash(image);
+}
+
+/**
+ * URL the vision model can read; stored images are sent inline
+ */
+async function visionUrl(image: string): Promise<string> {
+  const storedId = imageIdFromUrl(image);
+  if (!storedId) return image;
+  const stored = await getImage(storedId);
+  if (!stored) throw new Error('Stored image not found');
+  return `data:${stored.content_type};base64,${Buffer.from(await readImageBytes(stored)).toString('base64')}`;
+}
+
+function asCondition(value: unknown): PhotoCondition {
+  const condition = String(value || '').toLowerCase();
+  return ['excellent', 'good', 'fair', 'poor'].includes(condition) ? condition as PhotoCondition : 'unknown';
+}
+
+function asStrings(value: unknown): string[] {
+  return Array.isArray(value) ? value.map(String).filter(Boolean).slice(0, 8) : [];
+}
+
+async function analysePhoto(image: string, contentHash: string, context: LlmCallContext): Promise<PhotoFinding> {
+  const openai = getOpenAI();
+  const url = await visionUrl(image);
+  const completion = await meteredCall(context, VISION_MODEL, async model => {
+    const result = await openai.chat.completions.create({
+      model,
+      response_format: { type: 'json_object' },
+      messages: [
+        {
+          role: 'system',
+          content: `You assess property listing photos for an Australian valuer. Respond with JSON:
+{"room":string,"condition":"excellent"|"good"|"fair"|"poor","improvements":[string],"issues":[string],"summary":string}
+"improvements" are renovations or features that add value (e.g. new kitchen, polished floors); "issues" are defects or dated finishes.
+Keep the summary to one sentence.`
+        },
+        {
+          role: 'user',
+          content: [{ type: 'image_url', image_url: { url, detail: 'low' } }]
+        }
+      ],
+      temperature: 0,
+      max_tokens: 300
+    });
+    return { result, usage: result.usage };
+  });
+
+  const parsed = JSON.parse(completion.choices[0]?.message?.content || '{}');
+  return {
+    content_hash: contentHash,
+    room: String(parsed.room || 'Unknown'),
+    condition: asCondition(parsed.condition),
+    improvements: asStrings(parsed.improvements),
+    issues: asStrings(parsed.issues),
+    summary: String(parsed.summary || ''),
+    model: VISION_MODEL,
+    created_at: new Date()
+  };
+}
+
+/**
+ * Combine per-photo findings into the improvements text shown on the evaluation
+ */
+export function summarizeFindings(findings: PhotoFinding[]): string {
+  if (findings.length === 0) return NO_PHOTOS_NOTE;
+
+  const ranks: PhotoCondition[] = ['poor', 'fair', 'good', 'excellent'];
+  const rated = findings.map(finding => ranks.indexOf(finding.condition)).filter(rank => rank >= 0).sort((a, b) => a - b);
+  const overall = rated.length > 0 ? ranks[rated[Math.floor(rated.length / 2)]] : 'unknown';
+  const unique = (lists: string[][]) => [...new Map(lists.flat().map(item => [item.toLowerCase(), item])).values()];
+  const improvements = unique(findings.map(finding => finding.improvements));
+  const issues = unique(findings.map(finding => finding.issues));
+
+  const lines = [`Overall condition: ${overall} (${findings.length} photo${findings.length === 1 ? '' : 's'} analysed)`];
+  if (improvements.length > 0) lines.push(`Improvements: ${improvements.join('; ')}`);
+  if (issues.length > 0) lines.push(`Issues: ${issues.join('; ')}`);
+  for (const finding of findings) {
+    if (finding.summary) lines.push(`- ${finding.room}: ${finding.summary}`);
+  }
+  return lines.join('\n');
+}
+
+/**
+ * Findings for each photo, from the store where the same image was analysed before
+ * Photos that cannot be fetched or analysed are skipped
+ */
+export async function analysePhotos(images: string[], context: LlmCallContext): Promise<PhotoAnalysis> {
+  const started = performance.now();
+  const photos = images.filter(Boolean).slice(0, MAX_PHOTOS);
+  if (photos.length === 0) {
+    return { improvements_detected: NO_PHOTOS_NOTE, photos: 0, analysed: 0, cached: 0, failed: 0 };
+  }
+
+  const hashed = await Promise.all(photos.map(async image => {
+    try {
+      return { image, hash: await photoHash(image) };
+    } catch (error) {
+      console.log(`[Photos] Could not read photo: ${error}`);
+      return null;
+    }
+  }));
+  const readable = hashed.filter((photo): photo is { image: string; hash: string } => photo !== null);
+  const stored = new Map((await store.getMany(readable.map(photo => photo.hash))).map(finding => [finding.content_hash, finding]));
+
+  // The same image can appear twice in a listing; analyse it once
+  const pending = [...new Map(readable.filter(photo => !stored.has(photo.hash)).map(photo => [photo.hash, photo])).values()];
+  let failed = photos.length - readable.length;
+  const fresh = await Promise.all(pending.map(async photo => {
+    try {
+      const finding = await analysePhoto(photo.image, photo.hash, context);
+      await store.put(finding);
+      return finding;
+    } catch (error) {
+      if (error instanceof LlmAdmissionError && error.status === 429) throw error;
+      console.log(`[Photos] Analysis failed for ${photo.hash.slice(0, 12)}: ${error}`);
+      failed++;
+      return null;
+    }
+  }));
+  for (const finding of fresh) {
+    if (finding) stored.set(finding.content_hash, finding);
+  }
+
+  const findings = [...new Set(readable.map(photo => photo.hash))].flatMap(hash => stored.get(hash) ?? []);
+  const analysed = fresh.filter(Boolean).length;
+  console.log(
+    `[Photos] ${findings.length}/${photos.length} photos: ${analysed} analysed, ${findings.length - analysed} from cache, ` +
+    `${failed} failed in ${Math.round(performance.now() - started)}ms`
+  );
+  return {
+    improvements_detected: findings.length > 0 ? summarizeFindings(findings) : 'Photos provided but could not be analysed.',
+    photos: photos.length,
+    analysed,
+    cached: findings.length - analysed,
+    failed
+  };
+}
@@ -0,0 +1,155 @@
+// Ahead-of-demand refresh of comparable sales
+// Run from a Vercel cron (vercel.json). Each run takes the most in-demand areas
+// (lib/areaDemand.ts) and rescrapes those whose stored sales are close to going stale,
+// so evaluations there are answered from the sales store instead of waiting on a scrape.
+// Scrapes are spaced out per source with random jitter, and a run stops at its per-source
+// cap or its time budget, whichever comes first.
+
+import { HOMELY_DEADLINE_MS, STORE_MAX_AGE_MS, homelyGuard, refreshSalesArea } from '@/lib/comparables';
+import { AreaDemand, topDemandAreas } from '@/lib/areaDemand';
+import { SalesArea, getAreaRefreshedAt } from '@/lib/salesStore';
+import { envInt, envFloat } from '@/lib/env';
+
+// Most in-demand areas considered per run
+const CANDIDATE_AREAS = envInt('PREFETCH_TOP_AREAS', 50);
+// Areas with less decayed demand than this are left to refresh on request
+const MIN_SCORE = envFloat('PREFETCH_MIN_SCORE', 1);
+// Areas are refreshed once their sales reach this fraction of the staleness budget
+const REFRESH_AT = envFloat('PREFETCH_REFRESH_AT', 0.75);
+const RUN_BUDGET_MS = envInt('PREFETCH_RUN_BUDGET_MS', 240000);
+
+interface SourcePoliteness {
+  // Minimum gap between requests to the source, plus up to jitterMs of random delay
+  minIntervalMs: number;
+  jitterMs: number;
+  maxPerRun: number;
+}
+
+// The prefetcher only scrapes Homely; the historic-sales cache is our own backend
+const SOURCE_LIMITS: Record<string, SourcePoliteness> = {
+  homely: {
+    minIntervalMs: envInt('PREFETCH_HOMELY_INTERVAL_MS', 15000),
+    jitterMs: 10000,
+    maxPerRun: envInt('PREFETCH_HOMELY_MAX_PER_RUN', 12)
+  }
+};
+
+export interface PrefetchCandidate extends AreaDemand {
+  refreshed_at: Date | null;
+  age_ms: number | null;
+  // Age at which this area is refreshed ahead of demand
+  refresh_after_ms: number;
+  due: boolean;
+}
+
+export interface PrefetchRun {
+  started_at: Date;
+  duration_ms: number;
+  candidates: number;
+  due: number;
+  refreshed: { area_key: string; scraped: number; added: number; duration_ms: number }[];
+  failed: { area_key: string; error: string }[];
+  // Due areas left for the next run (per-source cap, time budget or the source's circuit breaker)
+  deferred: number;
+}
+
+const lastRequestAt = new Map<string, number>();
+let lastRun: PrefetchRun | null = null;
+let running: Promise<PrefetchRun> | null = null;
+
+// Stable per-area spread of 0.9-1.1, so areas first seen together do not all come due together
+function jitterFactor(key: string): number {
+  let hash = 2166136261;
+  for (let i = 0; i < key.length; i++) {
+    hash = Math.imul(hash ^ key.charCodeAt(i), 16777619);
+  }
+  return 0.9 + ((hash >>> 0) / 0xffffffff) * 0.2;
+}
+
+function toSalesArea(demand: AreaDemand): SalesArea {
+  return { suburb: demand.suburb, state: demand.state, postcode: demand.postcode, propertyType: demand.property_type };
+}
+
+/**
+ * Wait until the source's politeness interval (plus jitter) has passed since its last request
+ */
+async function politeWait(source: string) {
+  const limits = SOURCE_LIMITS[source];
+  const readyAt = (lastRequestAt.get(source) ?? 0) + limits.minIntervalMs + Math.random() * limits.jitterMs;
+  const wait = readyAt - Date.now();
+  if (wait > 0) await new Promise(resolve => setTimeout(resolve, wait));
+  lastRequestAt.set(source, Date.now());
+}
+
+/**
+ * The most in-demand areas and whether each is due for a refresh
+ */
+export async function prefetchCandidates(): Promise<PrefetchCandidate[]> {
+  const now = Date.now();
+  const areas = (await topDemandAreas(CANDIDATE_AREAS)).filter(area => area.score >= MIN_SCORE);
+  return Promise.all(areas.map(async area => {
+    const refreshedAt = await getAreaRefreshedAt(toSalesArea(area));
+    const ageMs = refreshedAt ? now - refreshedAt.getTime() : null;
+    const refreshAfterMs = Math.round(STORE_MAX_AGE_MS * REFRESH_AT * jitterFactor(area.area_key));
+    return { ...area, refreshed_at: refreshedAt, age_ms: ageMs, refresh_after_ms: refreshAfterMs, due: ageMs === null || ageMs >= refreshAfterMs };
+  }));
+}
+
+async function runOnce(): Promise<PrefetchRun> {
+  const startedAt = new Date();
+  const started = performance.now();
+  const limits = SOURCE_LIMITS.homely;
+  const candidates = await prefetchCandidates();
+  const due = candidates.filter(candidate => candidate.due);
+  const run: PrefetchRun = { started_at: startedAt, duration_ms: 0, candidates: candidates.length, due: due.length, refreshed: [], failed: [], deferred: 0 };
+
+  for (const [i, candidate] of due.entries()) {
+    const attempted = run.refreshed.length + run.failed.length;
+    // Leave room for the wait and the scrape itself, which can take up to Homely's deadline
+    const reserveMs = limits.minIntervalMs + limits.jitterMs + HOMELY_DEADLINE_MS;
+    if (attempted >= limits.maxPerRun || performance.now() - started + reserveMs > RUN_BUDGET_MS) {
+      run.deferred = due.length - i;
+      break;
+    }
+    await politeWait('homely');
+    // Blocked or throttled sources are left alone until their breaker or Retry-After allows
+    if (!homelyGuard.available()) {
+      run.deferred = due.length - i;
+      break;
+    }
+    try {
+      const result = await refreshSalesArea(toSalesArea(candidate));
+      run.refreshed.push({ area_key: candidate.area_key, ...result });
+    } catch (error) {
+      run.failed.push({ area_key: candidate.area_key, error: error instanceof Error ? error.message : 'Unknown error' });
+    }
+  }
+
+  run.duration_ms = Math.round(performance.now() - started);
+  console.log(
+    `[Prefetch] ${run.refreshed.length} areas refreshed, ${run.failed.length} failed, ${run.deferred} deferred ` +
+    `(${run.due} due of ${run.candidates} in demand) in ${run.duration_ms}ms`
+  );
+  return run;
+}
+
+/**
+ * Refresh due areas, most in-demand first; overlapping calls share one run
+ */
+export function runPrefetch(): Promise<PrefetchRun> {
+  if (!running) {
+    running = runOnce()
+      .then(run => {
+        lastRun = run;
+        return run;
+      })
+      .finally(() => {
+        running = null;
+      });
+  }
+  return running;
+}
+
+export function lastPrefetchRun(): PrefetchRun | null {
+  return lastRun;
+}
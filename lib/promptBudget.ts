@@ -0,0 +1,122 @@
+// Prompt-size budgeting for evaluation prompts
+// Each prompt section is measured in (estimated) tokens. Long uploaded reports are
+// condensed to their key figures, and sections are compacted lowest-priority first
+// until the whole prompt fits the configured maximum.
+
+import { envInt } from '@/lib/env';
+
+// Upper bound for the whole prompt (system and user messages) of a full evaluation
+export const PROMPT_MAX_TOKENS = envInt('EVALUATION_PROMPT_MAX_TOKENS', 6000);
+// Uploaded reports longer than this are always condensed to their key figures
+export const REPORT_MAX_TOKENS = envInt('EVALUATION_REPORT_MAX_TOKENS', 1500);
+
+// OpenAI tokenizers average about 4 characters per token for English prose
+const CHARS_PER_TOKEN = 4;
+const TRUNCATED_SUFFIX = '\n[...truncated]';
+// Lines that carry figures or valuation terms are kept when a report is condensed
+const KEY_FIGURE = /\$\s?\d|\d\s?%|\d\s?(?:m²|m2|sqm|ha)\b|\b(?:value|valuation|price|median|sold|sale|land|growth|yield|rent|days on market|clearance|estimate)\b/i;
+
+export interface PromptSection {
+  name: string;
+  text: string;
+  // Lower numbers are compacted last
+  priority: number;
+  // Optional section-specific compaction; defaults to truncation
+  compact?: (text: string, maxTokens: number) => string;
+  // Counted against the budget but never compacted (e.g. the system prompt)
+  fixed?: boolean;
+}
+
+export interface PromptSectionUsage {
+  name: string;
+  tokens: number;
+  original_tokens: number;
+  compacted: boolean;
+}
+
+export interface PromptBudget {
+  sections: PromptSectionUsage[];
+  total_tokens: number;
+  max_tokens: number;
+}
+
+export function estimateTokens(text: string): number {
+  return Math.ceil(text.length / CHARS_PER_TOKEN);
+}
+
+/**
+ * Cut text to at most `maxTokens`, including the truncation marker
+ */
+function truncateToTokens(text: string, maxTokens: number): string {
+  if (text.length <= maxTokens * CHARS_PER_TOKEN) return text;
+  const maxChars = maxTokens * CHARS_PER_TOKEN - TRUNCATED_SUFFIX.length;
+  if (maxChars <= 0) return '';
+  const cut = text.lastIndexOf('\n', maxChars);
+  return text.slice(0, cut > maxChars / 2 ? cut : maxChars).trimEnd() + TRUNCATED_SUFFIX;
+}
+
+/**
+ * Remove repeated lines (case and whitespace-insensitive), keeping the first occurrence
+ */
+export function dedupeLines(lines: string[]): string[] {
+  const seen = new Set<string>();
+  return lines.filter(line => {
+    const key = line.toLowerCase().replace(/\s+/g, ' ').trim();
+    if (!key) return true;
+    if (seen.has(key)) return false;
+    seen.add(key);
+    return true;
+  });
+}
+
+/**
+ * Condense a free-text report to the lines that carry figures and valuation terms
+ * The first line (the report title or section heading) is kept, and with the condensing
+ * note and any truncation marker counts toward `maxTokens`
+ */
+export function condenseReport(text: string, maxTokens: number): string {
+  if (estimateTokens(text) <= maxTokens) return text;
+  const [title, ...lines] = dedupeLines(text.split('\n').map(line => line.trim()).filter(Boolean));
+  const note = `[Key figures condensed from a ${text.length.toLocaleString()} character report]`;
+  return truncateToTokens([title, note, ...lines.filter(line => KEY_FIGURE.test(line))].join('\n'), maxTokens);
+}
+
+/**
+ * Fit the sections into `maxTokens`, compacting the lowest-priority sections first
+ * Each compacted section is cut to what remains of the budget after the others; fixed
+ * sections only take their share of it
+ */
+export function fitPromptSections(sections: PromptSection[], maxTokens: number = PROMPT_MAX_TOKENS): { texts: Record<string, string>; budget: PromptBudget } {
+  const texts: Record<string, string> = {};
+  const usage = new Map<string, PromptSectionUsage>();
+  for (const section of sections) {
+    texts[section.name] = section.text;
+    const tokens = estimateTokens(section.text);
+    usage.set(section.name, { name: section.name, tokens, original_tokens: tokens, compacted: false });
+  }
+
+  const total = () => [...usage.values()].reduce((sum, section) => sum + section.tokens, 0);
+  const byPriority = sections.filter(section => !section.fixed).sort((a, b) => b.priority - a.priority);
+  for (const section of byPriority) {
+    const over = total() - maxTokens;
+    if (over <= 0) break;
+    const current = usage.get(section.name)!;
+    const target = Math.max(0, current.tokens - over);
+    const compacted = (section.compact ?? truncateToTokens)(texts[section.name], target);
+    texts[section.name] = compacted;
+    current.tokens = estimateTokens(compacted);
+    current.compacted = true;
+  }
+
+  return {
+    texts,
+    budget: { sections: [...usage.values()], total_tokens: total(), max_tokens: maxTokens }
+  };
+}
+
+export function describePromptBudget(budget: PromptBudget): string {
+  const sections = budget.sections
+    .map(section => `${section.name}=${section.tokens}${section.compacted ? ` (from ${section.original_tokens})` : ''}`)
+    .join(', ');
+  return `${sections}; total=${budget.total_tokens}/${budget.max_tokens}`;
+}
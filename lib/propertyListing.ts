@@ -0,0 +1,252 @@
+// Paginated, projected property listing
+// Lists return only the requested fields (never full photos or reports), one page at a
+// time with a keyset cursor, filtered and sorted on indexed fields. With
+// PROPERTY_LISTING_SOURCE=mongo the backend's `properties` collection is queried
+// directly; otherwise the backend list is fetched and paged here.
+
+import { Collection, Document } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { thumbnailSrc } from '@/lib/imageUrls';
+import type { Property } from '@/lib/types';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+const LISTING_SOURCE = process.env.PROPERTY_LISTING_SOURCE || 'backend';
+
+export const DEFAULT_PAGE_SIZE = 50;
+export const MAX_PAGE_SIZE = 200;
+
+// Computed per property rather than read from a stored field
+const DERIVED_FIELDS = ['thumbnail_url', 'image_count', 'has_evaluation'] as const;
+type DerivedField = typeof DERIVED_FIELDS[number];
+
+// Enough for a property card; photos and reports are only sent when asked for by name
+export const DEFAULT_LISTING_FIELDS = [
+  'id', 'location', 'price', 'price_upper', 'pricing_type', 'beds', 'baths', 'carpark', 'size',
+  'property_type', 'status', 'agency_id', 'user_email', 'created_at', 'is_favourite',
+  'evaluation_date', 'sold_price', 'sale_date', 'thumbnail_url', 'image_count', 'has_evaluation'
+];
+
+export type ListingSortField = 'created_at' | 'location';
+
+export interface ListingQuery {
+  fields: string[];
+  agency_id: string | null;
+  // 'active' also matches properties without a status
+  status: string | null;
+  suburb: string | null;
+  user_email: string | null;
+  sort: ListingSortField;
+  direction: 1 | -1;
+  limit: number;
+  cursor: ListingCursor | null;
+}
+
+interface ListingCursor {
+  value: unknown;
+  id: string;
+}
+
+export interface ListingPage {
+  items: Record<string, unknown>[];
+  next_cursor: string | null;
+  limit: number;
+  sort: string;
+  fields: string[];
+}
+
+export class ListingQueryError extends Error {}
+
+function encodeCursor(item: Record<string, unknown>, sort: ListingSortField): string {
+  const value = item[sort];
+  const cursor = value instanceof Date ? { d: value.toISOString(), id: item.id } : { v: value, id: item.id };
+  return Buffer.from(JSON.stringify(cursor)).toString('base64url');
+}
+
+function decodeCursor(cursor: string): ListingCursor {
+  try {
+    const parsed = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+    if (typeof parsed.id !== 'string') throw new Error('missing id');
+    return { value: 'd' in parsed ? new Date(parsed.d) : parsed.v, id: parsed.id };
+  } catch {
+    throw new ListingQueryError('Invalid cursor');
+  }
+}
+
+/**
+ * Listing query from request parameters; throws ListingQueryError for invalid values
+ * `sort` is `created_at` or `location`, prefixed with `-` for descending (default `-created_at`)
+ */
+export function parseListingQuery(params: URLSearchParams, userEmail: string | null): ListingQuery {
+  const requested = params.get('fields');
+  const fields = requested
+    ? [...new Set(['id', ...requested.split(',').map(field => field.trim()).filter(Boolean)])]
+    : DEFAULT_LISTING_FIELDS;
+  const invalid = fields.find(field => !/^[a-z][a-z0-9_]*$/.test(field));
+  if (invalid) throw new ListingQueryError(`Invalid field: ${invalid}`);
+
+  const sortParam = params.get('sort') || '-created_at';
+  const sort = sortParam.replace(/^-/, '');
+  if (sort !== 'created_at' && sort !== 'location') {
+    throw new ListingQueryError(`Cannot sort by ${sort} (created_at or location)`);
+  }
+
+  const limit = parseInt(params.get('limit') || String(DEFAULT_PAGE_SIZE), 10);
+  if (!Number.isFinite(limit) || limit < 1) throw new ListingQueryError('limit must be a positive integer');
+
+  const cursor = params.get('cursor');
+  return {
+    fields,
+    agency_id: params.get('agency_id'),
+    status: params.get('status'),
+    suburb: params.get('suburb')?.trim() || null,
+    user_email: userEmail,
+    sort,
+    direction: sortParam.startsWith('-') ? -1 : 1,
+    limit: Math.min(limit, MAX_PAGE_SIZE),
+    cursor: cursor ? decodeCursor(cursor) : null
+  };
+}
+
+function escapeRegExp(text: string): string {
+  return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+// Suburbs are part of the free-text location ("12 Smith St, Paddington QLD 4064")
+function suburbPattern(suburb: string): RegExp {
+  return new RegExp(`\\b${escapeRegExp(suburb.replace(/-/g, ' '))}\\b`, 'i');
+}
+
+function isDerived(field: string): field is DerivedField {
+  return (DERIVED_FIELDS as readonly string[]).includes(field);
+}
+
+function deriveField(field: DerivedField, property: Partial<Property>): unknown {
+  switch (field) {
+    case 'thumbnail_url': {
+      const first = property.image_meta?.[0]?.thumbnail_url ?? property.images?.[0];
+      return first ? thumbnailSrc(first) : null;
+    }
+    case 'image_count':
+      return property.images?.length ?? 0;
+    case 'has_evaluation':
+      return !!property.evaluation_report;
+  }
+}
+
+interface ListingSource {
+  page(query: ListingQuery): Promise<Record<string, unknown>[]>;
+}
+
+class MongoListingSource implements ListingSource {
+  private async collection(): Promise<Collection<Property>> {
+    const collection = (await getDb()).collection<Property>('properties');
+    await ensureIndexes('properties');
+    return collection;
+  }
+
+  async page(query: ListingQuery) {
+    const match: Document = {};
+    if (query.agency_id) match.agency_id = query.agency_id;
+    if (query.user_email) match.user_email = query.user_email;
+    if (query.status) match.status = query.status === 'active' ? { $in: ['active', null] } : query.status;
+    if (query.suburb) match.location = { $regex: suburbPattern(query.suburb) };
+    if (query.cursor) {
+      const op = query.direction === -1 ? '$lt' : '$gt';
+      match.$or = [
+        { [query.sort]: { [op]: query.cursor.value } },
+        { [query.sort]: query.cursor.value, id: { [op]: query.cursor.id } }
+      ];
+    }
+
+    // Derived fields are computed in the projection so photos and reports never leave the database
+    const projection: Document = { _id: 0 };
+    for (const field of query.fields) {
+      if (field === 'thumbnail_url') {
+        projection.thumbnail_url = { $ifNull: [{ $arrayElemAt: ['$image_meta.thumbnail_url', 0] }, { $arrayElemAt: ['$images', 0] }] };
+      } else if (field === 'image_count') {
+        projection.image_count = { $size: { $ifNull: ['$images', []] } };
+      } else if (field === 'has_evaluation') {
+        projection.has_evaluation = { $gt: [{ $strLenCP: { $ifNull: ['$evaluation_report', ''] } }, 0] };
+      } else {
+        projection[field] = 1;
+      }
+    }
+    // The sort key is needed for the cursor even when it was not asked for
+    projection[query.sort] = 1;
+
+    const items = await (await this.collection()).aggregate<Record<string, unknown>>([
+      { $match: match },
+      { $sort: { [query.sort]: query.direction, id: query.direction } },
+      { $limit: query.limit + 1 },
+      { $project: projection }
+    ]).toArray();
+    return items.map(item => (typeof item.thumbnail_url === 'string' ? { ...item, thumbnail_url: thumbnailSrc(item.thumbnail_url) } : item));
+  }
+}
+
+// Pages the backend's full list in-process; saves response bytes, not backend work
+class BackendListingSource implements ListingSource {
+  async page(query: ListingQuery) {
+    const headers: Record<string, string> = {};
+    if (query.user_email) headers['x-user-email'] = query.user_email;
+    const response = await fetch(`${BACKEND_URL}/api/properties`, { headers, signal: AbortSignal.timeout(30000) });
+    if (!response.ok) {
+      throw new Error(`Backend returned ${response.status}`);
+    }
+    const properties: Property[] = await response.json();
+
+    const compare = (a: unknown, b: unknown) => (a === b ? 0 : String(a) < String(b) ? -1 : 1);
+    const order = (a: Property, b: Property) =>
+      (compare(a[query.sort], b[query.sort]) || compare(a.id, b.id)) * query.direction;
+    const cursor = query.cursor;
+    const afterCursor = (property: Property) => {
+      if (!cursor) return true;
+      const value = cursor.value instanceof Date ? cursor.value.toISOString() : cursor.value;
+      return (compare(property[query.sort], value) || compare(property.id, cursor.id)) * query.direction > 0;
+    };
+    const suburb = query.suburb ? suburbPattern(query.suburb) : null;
+
+    return properties
+      .filter(property =>
+        (!query.agency_id || property.agency_id === query.agency_id) &&
+        (!query.status || (property.status || 'active') === query.status) &&
+        (!suburb || suburb.test(property.location)) &&
+        afterCursor(property)
+      )
+      .sort(order)
+      .slice(0, query.limit + 1)
+      .map(property => {
+        const item: Record<string, unknown> = { [query.sort]: property[query.sort] };
+        for (const field of query.fields) {
+          item[field] = isDerived(field) ? deriveField(field, property) : (property as unknown as Record<string, unknown>)[field];
+        }
+        return item;
+      });
+  }
+}
+
+const source: ListingSource = LISTING_SOURCE === 'mongo' && isMongoConfigured() ? new MongoListingSource() : new BackendListingSource();
+
+/**
+ * One page of properties; `next_cursor` is null on the last page
+ */
+export async function listProperties(query: ListingQuery): Promise<ListingPage> {
+  const started = performance.now();
+  const rows = await source.page(query);
+  const items = rows.slice(0, query.limit).map(row => {
+    // Drop the sort key again if it was only fetched for the cursor
+    if (query.fields.includes(query.sort)) return row;
+    const { [query.sort]: _sortKey, ...rest } = row;
+    return rest;
+  });
+  const nextCursor = rows.length > query.limit ? encodeCursor(rows[query.limit - 1], query.sort) : null;
+  console.log(`[Listing] ${items.length} properties (${query.fields.length} fields) in ${Math.round(performance.now() - started)}ms`);
+  return {
+    items,
+    next_cursor: nextCursor,
+    limit: query.limit,
+    sort: `${query.direction === -1 ? '-' : ''}${query.sort}`,
+    fields: query.fields
+  };
+}
@@ -0,0 +1,201 @@
+// MongoDB query instrumentation
+// Command monitoring events are grouped into query shapes: the command, the collection
+// and the filter with its values stripped. Each shape accumulates count and time, and a
+// query slower than MONGO_SLOW_QUERY_MS is logged together with its winning plan, so
+// collection scans show up before data volume makes them hurt.
+
+import type { CommandFailedEvent, CommandStartedEvent, CommandSucceededEvent, Document, MongoClient } from 'mongodb';
+import { envInt } from '@/lib/env';
+
+export const SLOW_QUERY_MS = envInt('MONGO_SLOW_QUERY_MS', 100, 0);
+// A shape's plan is explained at most this often
+const EXPLAIN_INTERVAL_MS = 10 * 60 * 1000;
+const MAX_SHAPES = 500;
+
+const TRACKED_COMMANDS = new Set(['find', 'aggregate', 'count', 'distinct', 'findAndModify', 'update', 'delete', 'insert']);
+// Commands the server can explain; the others are only timed
+const EXPLAINABLE_COMMANDS = new Set(['find', 'aggregate', 'count', 'distinct', 'findAndModify', 'update', 'delete']);
+// Session and transport fields that must not be passed to explain
+const DRIVER_FIELDS = ['lsid', '$clusterTime', '$db', 'txnNumber', 'readConcern', 'writeConcern', '$readPreference', 'apiVersion'];
+
+export interface QueryShapeStats {
+  shape: string;
+  command: string;
+  collection: string;
+  count: number;
+  total_ms: number;
+  max_ms: number;
+  slow_count: number;
+  failures: number;
+  // Stages of the winning plan from the last explain, e.g. ["FETCH", "IXSCAN"]
+  plan: string[] | null;
+  collection_scan: boolean | null;
+}
+
+interface PendingCommand {
+  shape: QueryShapeStats;
+  command: Document;
+  databaseName: string;
+}
+
+const shapes = new Map<string, QueryShapeStats>();
+const pending = new Map<number, PendingCommand>();
+const lastExplained = new Map<string, number>();
+
+function isPlainObject(value: unknown): value is Record<string, unknown> {
+  return typeof value === 'object' && value !== null && Object.getPrototypeOf(value) === Object.prototype;
+}
+
+/**
+ * The structure of a filter or pipeline with every value replaced by '?'
+ */
+export function querySkeleton(value: unknown): unknown {
+  if (Array.isArray(value)) {
+    return value.some(isPlainObject) ? value.map(querySkeleton) : '?';
+  }
+  if (isPlainObject(value)) {
+    return Object.fromEntries(Object.entries(value).map(([key, inner]) => [key, querySkeleton(inner)]));
+  }
+  return '?';
+}
+
+// The part of each command that decides which index is used
+function commandFilter(commandName: string, command: Document): unknown {
+  switch (commandName) {
+    case 'find':
+      return { filter: command.filter ?? {}, ...(command.sort && { sort: command.sort }) };
+    case 'aggregate':
+      // Only the leading stages can use an index
+      return (command.pipeline as Document[] | undefined)?.filter(stage => '$match' in stage || '$sort' in stage).slice(0, 2) ?? [];
+    case 'count':
+    case 'distinct':
+      return command.query ?? {};
+    case 'findAndModify':
+      return { query: command.query ?? {}, ...(command.sort && { sort: command.sort }) };
+    case 'update':
+      return command.updates?.[0]?.q ?? {};
+    case 'delete':
+      return command.deletes?.[0]?.q ?? {};
+    default:
+      return null;
+  }
+}
+
+function shapeFor(event: CommandStartedEvent): QueryShapeStats | null {
+  const collection = String(event.command[event.commandName] ?? '');
+  const filter = commandFilter(event.commandName, event.command);
+  const shape = `${event.commandName} ${collection}${filter === null ? '' : ' ' + JSON.stringify(querySkeleton(filter))}`;
+  let stats = shapes.get(shape);
+  if (!stats) {
+    if (shapes.size >= MAX_SHAPES) return null;
+    stats = {
+      shape,
+      command: event.commandName,
+      collection,
+      count: 0,
+      total_ms: 0,
+      max_ms: 0,
+      slow_count: 0,
+      failures: 0,
+      plan: null,
+      collection_scan: null
+    };
+    shapes.set(shape, stats);
+  }
+  return stats;
+}
+
+/**
+ * Stage names of every winning plan in an explain result
+ */
+export function winningPlanStages(explain: unknown): string[] {
+  const stages: string[] = [];
+  const collect = (node: unknown) => {
+    if (Array.isArray(node)) {
+      node.forEach(collect);
+    } else if (isPlainObject(node)) {
+      if (typeof node.stage === 'string') stages.push(node.stage);
+      Object.values(node).forEach(collect);
+    }
+  };
+  const search = (node: unknown) => {
+    if (Array.isArray(node)) {
+      node.forEach(search);
+    } else if (isPlainObject(node)) {
+      for (const [key, value] of Object.entries(node)) {
+        if (key === 'winningPlan') collect(value);
+        else if (key !== 'rejectedPlans') search(value);
+      }
+    }
+  };
+  search(explain);
+  return stages;
+}
+
+async function explainSlowQuery(client: MongoClient, pendingCommand: PendingCommand, durationMs: number) {
+  const { shape, command, databaseName } = pendingCommand;
+  const last = lastExplained.get(shape.shape) ?? 0;
+  if (!EXPLAINABLE_COMMANDS.has(shape.command) || Date.now() - last < EXPLAIN_INTERVAL_MS) {
+    console.log(`[Mongo] Slow query ${durationMs}ms: ${shape.shape}${shape.plan ? ` plan=${shape.plan.join('>')}` : ''}`);
+    return;
+  }
+  lastExplained.set(shape.shape, Date.now());
+
+  try {
+    const explainable = Object.fromEntries(Object.entries(command).filter(([key]) => !DRIVER_FIELDS.includes(key)));
+    const explain = await client.db(databaseName).command({ explain: explainable, verbosity: 'queryPlanner' });
+    shape.plan = winningPlanStages(explain);
+    shape.collection_scan = shape.plan.includes('COLLSCAN');
+  } catch (error) {
+    console.log(`[Mongo] Explain failed for ${shape.shape}: ${error}`);
+  }
+  console.log(
+    `[Mongo] Slow query ${durationMs}ms: ${shape.shape} plan=${shape.plan?.join('>') ?? 'unknown'}` +
+    (shape.collection_scan ? ' (COLLECTION SCAN)' : '')
+  );
+}
+
+/**
+ * Record every tracked command on the client (requires `monitorCommands: true`)
+ */
+export function instrumentMongoClient(client: MongoClient) {
+  client.on('commandStarted', (event: CommandStartedEvent) => {
+    if (!TRACKED_COMMANDS.has(event.commandName)) return;
+    const shape = shapeFor(event);
+    if (shape) pending.set(event.requestId, { shape, command: event.command, databaseName: event.databaseName });
+  });
+
+  client.on('commandSucceeded', (event: CommandSucceededEvent) => {
+    const started = pending.get(event.requestId);
+    if (!started) return;
+    pending.delete(event.requestId);
+    const durationMs = Math.round(event.duration);
+    const { shape } = started;
+    shape.count++;
+    shape.total_ms += durationMs;
+    shape.max_ms = Math.max(shape.max_ms, durationMs);
+    if (durationMs >= SLOW_QUERY_MS) {
+      shape.slow_count++;
+      void explainSlowQuery(client, started, durationMs);
+    }
+  });
+
+  client.on('commandFailed', (event: CommandFailedEvent) => {
+    const started = pending.get(event.requestId);
+    if (!started) return;
+    pending.delete(event.requestId);
+    started.shape.count++;
+    started.shape.failures++;
+    started.shape.total_ms += Math.round(event.duration);
+  });
+}
+
+/**
+ * Query shapes with the most total time first
+ */
+export function topQueryShapes(limit: number = 20): QueryShapeStats[] {
+  return [...shapes.values()]
+    .sort((a, b) => b.total_ms - a.total_ms)
+    .slice(0, limit)
+    .map(shape => ({ ...shape, plan: shape.plan && [...shape.plan] }));
+}
@@ -0,0 +1,254 @@
+// Quick evaluation pipeline for ad-hoc properties (not saved to the backend)
+
+import { getOpenAI } from '@/lib/openai';
+import { ReportSectionResult, ReportSectionSpec, generateSectionReport } from '@/lib/reportSections';
+import {
+  calculateStatistics,
+  describeSources,
+  fetchComparableSales,
+  findBestComparables,
+  formatPrice,
+  getPropertyTypeFilter,
+  parseLocation,
+  SoldProperty
+} from '@/lib/comparables';
+import { LRUCache } from '@/lib/lruCache';
+import { sha256Hex } from '@/lib/hash';
+import { DEFAULT_AGENCY_ID } from '@/lib/llmLedger';
+import { envInt } from '@/lib/env';
+
+export interface QuickEvaluationInput {
+  location: string;
+  beds: number;
+  baths: number;
+  carpark: number;
+  size: number | null;
+  property_type: string;
+  price: number | null;
+  features: string | null;
+  images?: string[];
+  // Agency whose LLM budget the evaluation is charged to
+  agency_id: string;
+}
+
+export interface QuickEvaluationResult {
+  evaluation_report: string;
+  comparables_data: Record<string, unknown>;
+  price_per_sqm?: number;
+  report_sections?: Omit<ReportSectionResult, 'content'>[];
+}
+
+// Results for the same suburb/type/layout/size and asking price are reused for this long
+const RESULT_CACHE_TTL_MS = envInt('QUICK_EVALUATION_CACHE_TTL_MS', 6 * 60 * 60 * 1000);
+const RESULT_CACHE_MAX_ENTRIES = envInt('QUICK_EVALUATION_CACHE_SIZE', 500);
+
+export const quickEvaluationCache = new LRUCache<QuickEvaluationResult>(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL_MS);
+
+
+/**
+ * Normalise a request body into evaluation input
+ * Throws when the required attributes are missing
+ */
+export function parseQuickEvaluationInput(body: any): QuickEvaluationInput {
+  if (!body?.location || typeof body.location !== 'string') {
+    throw new Error('location is required');
+  }
+  const toNumber = (value: unknown) => {
+    const parsed = typeof value === 'number' ? value : parseFloat(String(value ?? ''));
+    return Number.isFinite(parsed) ? parsed : null;
+  };
+  return {
+    location: body.location.trim(),
+    beds: toNumber(body.beds) ?? 0,
+    baths: toNumber(body.baths) ?? 0,
+    carpark: toNumber(body.carpark) ?? 0,
+    size: toNumber(body.size),
+    property_type: body.property_type || 'Property',
+    price: toNumber(body.price),
+    features: body.features || null,
+    images: Array.isArray(body.images) ? body.images : [],
+    // Inline specs have no stored property to take an agency from; a body field would let any caller pick a fresh budget
+    agency_id: DEFAULT_AGENCY_ID
+  };
+}
+
+/**
+ * Key identifying an evaluation by the property attributes that affect its result
+ * Resubmitting the same property reuses the queued/recent job instead of starting another
+ */
+export async function quickEvaluationKey(input: QuickEvaluationInput): Promise<string> {
+  const normalized = [
+    input.location.toLowerCase().replace(/\s+/g, ' '),
+    input.beds,
+    input.baths,
+    input.carpark,
+    input.size ?? '',
+    input.property_type.toLowerCase(),
+    input.price ?? '',
+    (input.features || '').toLowerCase().trim(),
+    (input.images || []).join(',')
+  ].join('|');
+  return sha256Hex(normalized);
+}
+
+/**
+ * Content key for the result cache
+ * Coarser than the job key: the location is reduced to the parsed suburb/state/postcode, so
+ * properties with the same attributes anywhere in a suburb share one evaluation. Size and
+ * asking price are kept exact because the report sections quote them (and price/sqm).
+ */
+export async function quickEvaluationCacheKey(input: QuickEvaluationInput): Promise<string> {
+  const { suburb, state, postcode } = parseLocation(input.location);
+  const features = (input.features || '').toLowerCase().split(/[\s,;]+/).filter(Boolean).sort().join(' ');
+  const tuple = [
+    suburb,
+    state,
+    postcode ?? '',
+    getPropertyTypeFilter(input.property_type),
+    input.beds,
+    input.baths,
+    input.carpark,
+    input.size ?? '',
+    input.price ?? '',
+    features ? (await sha256Hex(features)).slice(0, 16) : ''
+  ].join('|');
+  return `quick:${await sha256Hex(tuple)}`;
+}
+
+/**
+ * Location as the report sections see it
+ * Only the suburb is part of the cache key, so the street address stays out of cached text
+ */
+function areaLabel(location: string): string {
+  const { suburb, state, postcode } = parseLocation(location);
+  const name = suburb.split('-').filter(Boolean).map(word => word[0].toUpperCase() + word.slice(1)).join(' ');
+  return [name, [state.toUpperCase(), postcode].filter(Boolean).join(' ')].filter(Boolean).join(', ');
+}
+
+function pricePerSqm(input: QuickEvaluationInput): number | undefined {
+  return input.price && input.size ? Math.round(input.price / input.size) : undefined;
+}
+
+const VALUER_ROLE = `You are an expert Australian property valuer writing one section of a concise quick evaluation.
+Be specific with dollar amounts and base them on the comparable sales when provided. Do not repeat the section heading.`;
+
+/**
+ * One spec per report section, each with only the context it needs
+ */
+function quickReportSections(
+  input: QuickEvaluationInput,
+  comparables: SoldProperty[],
+  stats: ReturnType<typeof calculateStatistics>,
+  dataSource: string
+): ReportSectionSpec[] {
+  const propertyText = `Location: ${areaLabel(input.location)}
+Property Type: ${input.property_type}
+Bedrooms: ${input.beds}
+Bathrooms: ${input.baths}
+Car Parks: ${input.carpark}
+Size: ${input.size ? input.size + ' sqm' : 'Not specified'}`;
+  const askingText = input.price ? `\nAsking Price: ${formatPrice(input.price)}` : '';
+  const featuresText = input.features ? `\nFeatures: ${input.features}` : '';
+
+  let comparablesText = '\n\nNo comparable sales found - use your knowledge of the local market.';
+  if (comparables.length > 0) {
+    comparablesText = `\n\nRECENT COMPARABLE SALES (from ${dataSource}):\n`;
+    for (const comp of comparables.slice(0, 8)) {
+      const size = comp.land_area ? ` | ${comp.land_area} sqm (${formatPrice(Math.round(comp.price / comp.land_area))}/sqm)` : '';
+      comparablesText += `- ${comp.address}: ${formatPrice(comp.price)} | ${comp.beds || 'N/A'} bed, ${comp.baths || 'N/A'} bath${size} | Sold: ${comp.sold_date}\n`;
+    }
+    comparablesText += `\nMedian: ${formatPrice(stats.median)} | Range: ${formatPrice(stats.min)} - ${formatPrice(stats.max)}\n`;
+  }
+
+  const sixMonthsAgo = Date.now() - 182 * 24 * 60 * 60 * 1000;
+  const recentSales = comparables.filter(comp => comp.sold_date_raw && new Date(comp.sold_date_raw).getTime() >= sixMonthsAgo).length;
+  const marketText = comparables.length > 0
+    ? `\n\nMARKET STATS (${comparables.length} comparable sales from ${dataSource}):
+Median: ${formatPrice(stats.median)} | Average: ${formatPrice(stats.avg)} | Range: ${formatPrice(stats.min)} - ${formatPrice(stats.max)}
+Sales in the last 6 months: ${recentSales}`
+    : '\n\nNo recent sales data - use your knowledge of the local market.';
+
+  return [
+    {
+      title: 'VALUE RANGE',
+      instructions: 'Give a low-high estimated value range and one or two sentences of reasoning.',
+      context: propertyText + askingText + featuresText + comparablesText
+    },
+    {
+      title: 'PRICE/SQM',
+      instructions: 'Give the estimated price per square metre and compare it with the comparable sales.',
+      context: propertyText + askingText + comparablesText
+    },
+    {
+      title: 'MARKET POSITION',
+      instructions: 'Describe where this property sits in the local market (entry, mid or premium) and why.',
+      context: propertyText + featuresText + marketText
+    },
+    {
+      title: 'DAYS TO SELL',
+      instructions: 'Estimate the expected days on market and the factors that would shorten or lengthen it.',
+      context: propertyText + askingText + marketText
+    },
+    {
+      title: 'PRICING STRATEGY',
+      instructions: 'Recommend a listing price or range and a sale method, in two or three short points.',
+      context: propertyText + askingText + featuresText + marketText
+    }
+  ];
+}
+
+export async function runQuickEvaluation(
+  input: QuickEvaluationInput,
+  setStage: (stage: 'fetching_data' | 'generating_evaluation') => Promise<void>,
+  onDraft: (partialReport: string) => void = () => {}
+): Promise<QuickEvaluationResult> {
+  await setStage('fetching_data');
+  const { suburb, state, postcode } = parseLocation(input.location);
+  const propertyTypeFilter = getPropertyTypeFilter(input.property_type);
+  console.log(`[Quick Evaluate] Parsed: suburb=${suburb}, state=${state}, postcode=${postcode}, type=${propertyTypeFilter}`);
+
+  const { properties: soldProperties, sources, fetch_ms } = await fetchComparableSales(suburb, state, postcode, propertyTypeFilter);
+  const comparables = findBestComparables(
+    { beds: input.beds, baths: input.baths, size: input.size },
+    soldProperties
+  );
+  const stats = calculateStatistics(comparables);
+  const dataSource = comparables.length > 0 ? describeSources(sources) : 'AI Knowledge';
+  console.log(`[Quick Evaluate] Found ${comparables.length} comparable properties`);
+
+  await setStage('generating_evaluation');
+  // Drafts are published as each section completes
+  const { report, sections } = await generateSectionReport(
+    getOpenAI(),
+    quickReportSections(input, comparables, stats, dataSource),
+    {
+      model: 'gpt-4o',
+      system: VALUER_ROLE,
+      context: { agency_id: input.agency_id || DEFAULT_AGENCY_ID, endpoint: 'evaluate-quick' },
+      onSection: (section, draft) => onDraft(draft)
+    }
+  );
+
+  return {
+    evaluation_report: report || 'Unable to generate evaluation.',
+    comparables_data: {
+      comparable_sold: comparables.map(comp => ({
+        address: comp.address,
+        price: comp.price,
+        beds: comp.beds,
+        baths: comp.baths,
+        cars: comp.cars,
+        sold_date: comp.sold_date
+      })),
+      statistics: {
+        total_found: comparables.length,
+        price_range: stats,
+        sources,
+        fetch_ms
+      },
+      data_source: dataSource
+    },
+    price_per_sqm: pricePerSqm(input),
+    report_sections: sections.map(({ content, ...section }) => section)
+  };
+}
@@ -0,0 +1,143 @@
+// Section-parallel report generation
+// Each report section is a small, independent completion that only sees the context
+// it needs. Sections run concurrently and are retried individually; the report is
+// assembled in a fixed order, with a placeholder for any section that still fails.
+
+import type OpenAI from 'openai';
+import { LlmAdmissionError, LlmCallContext, meteredCall } from '@/lib/llmLedger';
+import { envInt } from '@/lib/env';
+
+const SECTION_TIMEOUT_MS = envInt('REPORT_SECTION_TIMEOUT_MS', 30000);
+const SECTION_ATTEMPTS = envInt('REPORT_SECTION_ATTEMPTS', 2);
+const RETRY_DELAY_MS = 500;
+const UNAVAILABLE = 'Not available - this section could not be generated. Please re-run the evaluation.';
+
+export interface ReportSectionSpec {
+  title: string;
+  // What the section should contain
+  instructions: string;
+  // Only the data this section needs
+  context: string;
+  maxTokens?: number;
+}
+
+export interface ReportSectionResult {
+  title: string;
+  content: string;
+  status: 'ok' | 'failed';
+  attempts: number;
+  duration_ms: number;
+  error?: string;
+}
+
+export interface SectionReportOptions {
+  model: string;
+  // Shared role/tone instructions, prepended to every section prompt
+  system: string;
+  temperature?: number;
+  // Agency and endpoint the calls are metered against
+  context: LlmCallContext;
+  // Called as each section finishes, with the sections finished so far assembled in order
+  onSection?: (section: ReportSectionResult, draft: string) => void;
+}
+
+function headingLine(title: string): string {
+  return `${title}:`;
+}
+
+/**
+ * Drop a heading the model repeated at the start of its answer
+ */
+function stripRepeatedHeading(title: string, content: string): string {
+  const [first, ...rest] = content.trim().split('\n');
+  const normalized = first.replace(/[#*:]/g, '').trim().toUpperCase();
+  return normalized === title.toUpperCase() ? rest.join('\n').trim() : content.trim();
+}
+
+/**
+ * Sections in spec order; sections without a result yet are left out
+ */
+export function assembleReport(specs: ReportSectionSpec[], results: Map<string, ReportSectionResult>): string {
+  return specs
+    .filter(spec => results.has(spec.title))
+    .map(spec => `${headingLine(spec.title)}\n${results.get(spec.title)!.content}`)
+    .join('\n\n');
+}
+
+async function generateSection(
+  openai: OpenAI,
+  spec: ReportSectionSpec,
+  options: SectionReportOptions
+): Promise<ReportSectionResult> {
+  const started = performance.now();
+  let lastError = 'Unknown error';
+
+  for (let attempt = 1; attempt <= SECTION_ATTEMPTS; attempt++) {
+    try {
+      const completion = await meteredCall(options.context, options.model, async model => {
+        const result = await openai.chat.completions.create(
+          {
+            model,
+            messages: [
+              { role: 'system', content: `${options.system}\nWrite only the ${spec.title} section. ${spec.instructions}` },
+              { role: 'user', content: spec.context }
+            ],
+            temperature: options.temperature ?? 0.3,
+            max_tokens: spec.maxTokens ?? 300
+          },
+          // Retries are per section here, so a slow section does not hold up a fresh attempt
+          { timeout: SECTION_TIMEOUT_MS, maxRetries: 0 }
+        );
+        return { result, usage: result.usage };
+      });
+      const content = stripRepeatedHeading(spec.title, completion.choices[0]?.message?.content || '');
+      if (!content) throw new Error('Empty response');
+      return { title: spec.title, content, status: 'ok', attempts: attempt, duration_ms: Math.round(performance.now() - started) };
+    } catch (error) {
+      // An exhausted budget fails the whole report rather than every section in turn
+      if (error instanceof LlmAdmissionError && error.status === 429) throw error;
+      lastError = error instanceof Error ? error.message : 'Unknown error';
+      console.log(`[Report Sections] ${spec.title} attempt ${attempt}/${SECTION_ATTEMPTS} failed: ${lastError}`);
+      if (attempt < SECTION_ATTEMPTS) {
+        await new Promise(resolve => setTimeout(resolve, RETRY_DELAY_MS * attempt));
+      }
+    }
+  }
+
+  return {
+    title: spec.title,
+    content: UNAVAILABLE,
+    status: 'failed',
+    attempts: SECTION_ATTEMPTS,
+    duration_ms: Math.round(performance.now() - started),
+    error: lastError
+  };
+}
+
+/**
+ * Generate every section concurrently and assemble the report in spec order
+ * Latency is that of the slowest section; a failed section never fails the report
+ */
+export async function generateSectionReport(
+  openai: OpenAI,
+  specs: ReportSectionSpec[],
+  options: SectionReportOptions
+): Promise<{ report: string; sections: ReportSectionResult[] }> {
+  const started = performance.now();
+  const results = new Map<string, ReportSectionResult>();
+
+  const sections = await Promise.all(specs.map(async spec => {
+    const result = await generateSection(openai, spec, options);
+    results.set(spec.title, result);
+    options.onSection?.(result, assembleReport(specs, results));
+    return result;
+  }));
+
+  const failed = sections.filter(section => section.status === 'failed').length;
+  const slowest = Math.max(0, ...sections.map(section => section.duration_ms));
+  console.log(
+    `[Report Sections] ${sections.length - failed}/${sections.length} sections in ${Math.round(performance.now() - started)}ms ` +
+    `(slowest ${slowest}ms, sum ${sections.reduce((sum, section) => sum + section.duration_ms, 0)}ms)`
+  );
+  return { report: assembleReport(specs, results), sections };
+}
@@ -0,0 +1,122 @@
+// RP Data report digest
+// The free-text RP Data report is condensed once (at upload) into structured market
+// data and stored on the property with a hash of the report text. Evaluations use
+// the digest instead of sending the whole report to the model again.
+
+import { getOpenAI } from '@/lib/openai';
+import { RpDataDigest } from '@/lib/types';
+import { sha256Hex } from '@/lib/hash';
+import { LlmCallContext, meteredCall } from '@/lib/llmLedger';
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'https://backend-ts-gamma.vercel.app';
+const DIGEST_MODEL = 'gpt-4o-mini';
+
+/**
+ * Hash of the report text (whitespace-normalized), used to tell whether a stored digest is current
+ */
+export async function rpReportHash(report: string): Promise<string> {
+  return sha256Hex(report.replace(/\s+/g, ' ').trim());
+}
+
+export async function isDigestCurrent(report: string, digest: RpDataDigest | null | undefined): Promise<boolean> {
+  return !!digest && digest.content_hash === await rpReportHash(report);
+}
+
+function numberOrNull(value: unknown): number | null {
+  const parsed = typeof value === 'number' ? value : parseFloat(String(value ?? '').replace(/[$,%\s]/g, ''));
+  return Number.isFinite(parsed) ? parsed : null;
+}
+
+/**
+ * Extract the structured digest from a report with one small-model call
+ */
+export async function digestRpReport(report: string, context: LlmCallContext): Promise<RpDataDigest> {
+  const started = performance.now();
+  const openai = getOpenAI();
+  const completion = await meteredCall(context, DIGEST_MODEL, async model => {
+    const result = await openai.chat.completions.create({
+      model,
+      response_format: { type: 'json_object' },
+      messages: [
+        {
+          role: 'system',
+          content: `Extract market data from an Australian RP Data property report. Respond with JSON:
+{"comparable_sales":[{"address":string,"price":number,"beds":number|null,"baths":number|null,"size_sqm":number|null,"sold_date":string|null}],
+"median_price":number|null,"days_on_market":number|null,"clearance_rate_pct":number|null,"annual_growth_pct":number|null,
+"land_value":number|null,"estimated_value_low":number|null,"estimated_value_high":number|null,
+"key_factors":[string],"summary":string}
+Use null when a figure is not in the report. Prices are whole dollars. Keep the summary under 80 words.`
+        },
+        { role: 'user', content: report }
+      ],
+      temperature: 0,
+      max_tokens: 1200
+    });
+    return { result, usage: result.usage };
+  });
+
+  const parsed = JSON.parse(completion.choices[0]?.message?.content || '{}');
+  const digest: RpDataDigest = {
+    comparable_sales: (Array.isArray(parsed.comparable_sales) ? parsed.comparable_sales : [])
+      .filter((sale: any) => sale?.address && numberOrNull(sale.price))
+      .map((sale: any) => ({
+        address: String(sale.address),
+        price: numberOrNull(sale.price)!,
+        beds: numberOrNull(sale.beds),
+        baths: numberOrNull(sale.baths),
+        size_sqm: numberOrNull(sale.size_sqm),
+        sold_date: sale.sold_date ? String(sale.sold_date) : null
+      })),
+    median_price: numberOrNull(parsed.median_price),
+    days_on_market: numberOrNull(parsed.days_on_market),
+    clearance_rate_pct: numberOrNull(parsed.clearance_rate_pct),
+    annual_growth_pct: numberOrNull(parsed.annual_growth_pct),
+    land_value: numberOrNull(parsed.land_value),
+    estimated_value_low: numberOrNull(parsed.estimated_value_low),
+    estimated_value_high: numberOrNull(parsed.estimated_value_high),
+    key_factors: Array.isArray(parsed.key_factors) ? parsed.key_factors.map(String).slice(0, 10) : [],
+    summary: String(parsed.summary || ''),
+    content_hash: await rpReportHash(report),
+    model: DIGEST_MODEL,
+    created_at: new Date().toISOString()
+  };
+  console.log(`[RP Digest] Digested ${report.length} chars into ${digest.comparable_sales.length} sales in ${Math.round(performance.now() - started)}ms`);
+  return digest;
+}
+
+/**
+ * Compact prompt section for an evaluation
+ */
+export function formatRpDigest(digest: RpDataDigest): string {
+  const money = (value: number | null) => value ? '$' + value.toLocaleString() : 'N/A';
+  const lines = ['RP DATA REPORT (digest):'];
+  for (const sale of digest.comparable_sales) {
+    const layout = [sale.beds && `${sale.beds} bed`, sale.baths && `${sale.baths} bath`, sale.size_sqm && `${sale.size_sqm} m²`].filter(Boolean).join(', ');
+    lines.push(`- ${sale.address}: ${money(sale.price)}${layout ? ' | ' + layout : ''}${sale.sold_date ? ' | Sold: ' + sale.sold_date : ''}`);
+  }
+  lines.push(`Median price: ${money(digest.median_price)}`);
+  if (digest.days_on_market !== null) lines.push(`Days on market: ${digest.days_on_market}`);
+  if (digest.clearance_rate_pct !== null) lines.push(`Clearance rate: ${digest.clearance_rate_pct}%`);
+  if (digest.annual_growth_pct !== null) lines.push(`Annual growth: ${digest.annual_growth_pct}%`);
+  if (digest.land_value !== null) lines.push(`Land value: ${money(digest.land_value)}`);
+  if (digest.estimated_value_low !== null || digest.estimated_value_high !== null) {
+    lines.push(`RP Data estimate: ${money(digest.estimated_value_low)} - ${money(digest.estimated_value_high)}`);
+  }
+  if (digest.key_factors.length > 0) lines.push(`Key factors: ${digest.key_factors.join('; ')}`);
+  if (digest.summary) lines.push(digest.summary);
+  return lines.join('\n');
+}
+
+/**
+ * Store a digest on the property in the backend
+ */
+export async function saveRpDigest(propertyId: string, digest: RpDataDigest): Promise<void> {
+  const response = await fetch(`${BACKEND_URL}/api/properties/${propertyId}`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ rp_data_digest: digest })
+  });
+  if (!response.ok) {
+    throw new Error(`Backend returned ${response.status}`);
+  }
+}
@@ -0,0 +1,276 @@
+// Normalized store of sold listings per suburb/state/postcode/property type
+// Listings are deduplicated on address + sold date, so refreshing a suburb only
+// adds newly sold listings. Each area records when it was last refreshed, which
+// lets comparable queries be answered from the store within a staleness budget.
+
+import { Collection } from 'mongodb';
+import { getDb, isMongoConfigured } from '@/lib/mongo';
+import { ensureIndexes } from '@/lib/indexPlan';
+import { GeoIndex, GeoMatch } from '@/lib/geoIndex';
+import type { SoldProperty } from '@/lib/comparables';
+import { envInt } from '@/lib/env';
+
+export interface SalesArea {
+  suburb: string;
+  state: string;
+  postcode: string | null;
+  propertyType: string | null;
+}
+
+interface StoredSale extends SoldProperty {
+  area_key: string;
+  sale_key: string;
+  first_seen_at: Date;
+  last_seen_at: Date;
+}
+
+interface AreaRefresh {
+  area_key: string;
+  suburb: string;
+  state: string;
+  postcode: string | null;
+  property_type: string | null;
+  refreshed_at: Date;
+  listing_count: number;
+}
+
+export interface StoredSales {
+  properties: SoldProperty[];
+  refreshed_at: Date | null;
+  age_ms: number | null;
+}
+
+// Comparable queries return at most this many of the most recent sales
+const QUERY_LIMIT = 200;
+// Areas kept in the radius-search index; the least recently loaded or refreshed area is dropped first
+const GEO_INDEX_MAX_AREAS = envInt('SALES_GEO_INDEX_MAX_AREAS', 200);
+
+export function areaKey(area: SalesArea): string {
+  return [area.state, area.suburb, area.postcode || '', area.propertyType || 'all'].join('|').toLowerCase();
+}
+
+/**
+ * Identity of a sale: normalized address plus sold date
+ */
+export function saleKey(sale: Pick<SoldProperty, 'address' | 'sold_date' | 'sold_date_raw'>): string {
+  const address = sale.address.toLowerCase().replace(/[^a-z0-9]+/g, ' ').trim();
+  const soldOn = sale.sold_date_raw ? new Date(sale.sold_date_raw).toISOString().slice(0, 10) : sale.sold_date;
+  return `${address}|${soldOn}`;
+}
+
+function toSoldProperty(stored: StoredSale): SoldProperty {
+  const { area_key, sale_key, first_seen_at, last_seen_at, ...sale } = stored;
+  return sale;
+}
+
+interface SalesStoreBackend {
+  query(key: string, limit: number): Promise<SoldProperty[]>;
+  getRefresh(key: string): Promise<AreaRefresh | null>;
+  // Returns the number of listings that were not already stored
+  merge(key: string, sales: SoldProperty[], now: Date): Promise<number>;
+  setRefresh(refresh: AreaRefresh): Promise<void>;
+  count(key: string): Promise<number>;
+}
+
+class MongoSalesStore implements SalesStoreBackend {
+  private async collections(): Promise<{ sales: Collection<StoredSale>; refreshes: Collection<AreaRefresh> }> {
+    const db = await getDb();
+    const sales = db.collection<StoredSale>('sold_listings');
+    const refreshes = db.collection<AreaRefresh>('sold_listing_areas');
+    await Promise.all([ensureIndexes('sold_listings'), ensureIndexes('sold_listing_areas')]);
+    return { sales, refreshes };
+  }
+
+  async query(key: string, limit: number) {
+    const { sales } = await this.collections();
+    const stored = await sales
+      .find({ area_key: key }, { projection: { _id: 0 } })
+      .sort({ sold_date_raw: -1 })
+      .limit(limit)
+      .toArray();
+    return stored.map(toSoldProperty);
+  }
+
+  async getRefresh(key: string) {
+    const { refreshes } = await this.collections();
+    return refreshes.findOne({ area_key: key }, { projection: { _id: 0 } });
+  }
+
+  async merge(key: string, incoming: SoldProperty[], now: Date) {
+    if (incoming.length === 0) return 0;
+    const { sales } = await this.collections();
+    const result = await sales.bulkWrite(
+      incoming.map(sale => {
+        const { similarity_score, distance_km, ...fields } = sale;
+        return {
+          updateOne: {
+            filter: { area_key: key, sale_key: saleKey(sale) },
+            update: {
+              $setOnInsert: { ...fields, area_key: key, sale_key: saleKey(sale), first_seen_at: now },
+              $set: { last_seen_at: now }
+            },
+            upsert: true
+          }
+        };
+      }),
+      { ordered: false }
+    );
+    return result.upsertedCount;
+  }
+
+  async setRefresh(refresh: AreaRefresh) {
+    const { refreshes } = await this.collections();
+    await refreshes.updateOne({ area_key: refresh.area_key }, { $set: refresh }, { upsert: true });
+  }
+
+  async count(key: string) {
+    const { sales } = await this.collections();
+    return sales.countDocuments({ area_key: key });
+  }
+}
+
+// Local stand-in when MongoDB is not configured (lost on restart)
+class MemorySalesStore implements SalesStoreBackend {
+  private areas = new Map<string, Map<string, StoredSale>>();
+  private refreshes = new Map<string, AreaRefresh>();
+
+  async query(key: string, limit: number) {
+    const stored = [...(this.areas.get(key)?.values() ?? [])];
+    stored.sort((a, b) =>
+      (b.sold_date_raw ? new Date(b.sold_date_raw).getTime() : 0) - (a.sold_date_raw ? new Date(a.sold_date_raw).getTime() : 0)
+    );
+    return stored.slice(0, limit).map(toSoldProperty);
+  }
+
+  async getRefresh(key: string) {
+    return this.refreshes.get(key) ?? null;
+  }
+
+  async merge(key: string, incoming: SoldProperty[], now: Date) {
+    let area = this.areas.get(key);
+    if (!area) {
+      area = new Map();
+      this.areas.set(key, area);
+    }
+    let added = 0;
+    for (const sale of incoming) {
+      const id = saleKey(sale);
+      const existing = area.get(id);
+      if (existing) {
+        existing.last_seen_at = now;
+        continue;
+      }
+      const { similarity_score, distance_km, ...fields } = sale;
+      area.set(id, { ...fields, area_key: key, sale_key: id, first_seen_at: now, last_seen_at: now });
+      added++;
+    }
+    return added;
+  }
+
+  async setRefresh(refresh: AreaRefresh) {
+    this.refreshes.set(refresh.area_key, refresh);
+  }
+
+  async count(key: string) {
+    return this.areas.get(key)?.size ?? 0;
+  }
+}
+
+const backend: SalesStoreBackend = isMongoConfigured() ? new MongoSalesStore() : new MemorySalesStore();
+
+// Geocoded sales seen by this instance, for radius searches across suburb boundaries
+const salesGeoIndex = new GeoIndex<SoldProperty>();
+// Indexed sale keys per area, least recently used area first (Map insertion order)
+const indexedAreas = new Map<string, Set<string>>();
+// How many indexed areas hold each sale, so evicting an area keeps sales another area still holds
+const areaRefs = new Map<string, number>();
+
+function indexSales(key: string, sales: SoldProperty[]) {
+  const saleKeys = indexedAreas.get(key) ?? new Set<string>();
+  indexedAreas.delete(key);
+  indexedAreas.set(key, saleKeys);
+  for (const sale of sales) {
+    if (sale.latitude && sale.longitude) {
+      const { similarity_score, distance_km, ...fields } = sale;
+      const id = saleKey(sale);
+      salesGeoIndex.insert(id, sale.latitude, sale.longitude, fields);
+      if (!saleKeys.has(id)) {
+        saleKeys.add(id);
+        areaRefs.set(id, (areaRefs.get(id) ?? 0) + 1);
+      }
+    }
+  }
+
+  while (indexedAreas.size > GEO_INDEX_MAX_AREAS) {
+    const [evicted, evictedKeys] = indexedAreas.entries().next().value!;
+    indexedAreas.delete(evicted);
+    for (const id of evictedKeys) {
+      const refs = (areaRefs.get(id) ?? 1) - 1;
+      if (refs > 0) {
+        areaRefs.set(id, refs);
+      } else {
+        areaRefs.delete(id);
+        salesGeoIndex.remove(id);
+      }
+    }
+  }
+}
+
+/**
+ * Geocoded sales within `radiusKm` of a point, nearest first, tagged with distance_km
+ * Covers the areas this instance has most recently loaded or refreshed, regardless of suburb
+ */
+export function getSalesNear(lat: number, lon: number, radiusKm: number, filter?: (sale: SoldProperty) => boolean): SoldProperty[] {
+  return salesGeoIndex.withinRadius(lat, lon, radiusKm, filter).map(({ item, distance_km }: GeoMatch<SoldProperty>) => ({
+    ...item,
+    distance_km: Math.round(distance_km * 100) / 100
+  }));
+}
+
+export function indexedSalesCount(): number {
+  return salesGeoIndex.size;
+}
+
+/**
+ * Stored sales for an area, most recent first, with the age of the last refresh
+ */
+export async function getStoredSales(area: SalesArea): Promise<StoredSales> {
+  const key = areaKey(area);
+  const [properties, refresh] = await Promise.all([backend.query(key, QUERY_LIMIT), backend.getRefresh(key)]);
+  indexSales(key, properties);
+  return {
+    properties,
+    refreshed_at: refresh?.refreshed_at ?? null,
+    age_ms: refresh ? Date.now() - new Date(refresh.refreshed_at).getTime() : null
+  };
+}
+
+/**
+ * When an area was last refreshed, without loading its sales
+ */
+export async function getAreaRefreshedAt(area: SalesArea): Promise<Date | null> {
+  const refresh = await backend.getRefresh(areaKey(area));
+  return refresh ? new Date(refresh.refreshed_at) : null;
+}
+
+/**
+ * Merge freshly scraped sales into the store and mark the area refreshed
+ * Only listings not already stored (by address + sold date) are added
+ */
+export async function recordSales(area: SalesArea, sales: SoldProperty[]): Promise<number> {
+  const key = areaKey(area);
+  const now = new Date();
+  const added = await backend.merge(key, sales, now);
+  indexSales(key, sales);
+  await backend.setRefresh({
+    area_key: key,
+    suburb: area.suburb,
+    state: area.state,
+    postcode: area.postcode,
+    property_type: area.propertyType,
+    refreshed_at: now,
+    listing_count: await backend.count(key)
+  });
+  console.log(`[Sales Store] ${key}: ${added} new of ${sales.length} scraped`);
+  return added;
+}
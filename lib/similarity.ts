@@ -0,0 +1,117 @@
+// Columnar similarity scoring for comparable ranking
+// Candidates are held as typed-array columns so a suburb's worth of sales is
+// scored in one tight loop, and the top k are chosen with a bounded heap
+// instead of sorting every candidate.
+
+import type { SoldProperty } from '@/lib/comparables';
+
+// Defaults used when a bed/bath count is missing (matches the target defaults)
+const DEFAULT_BEDS = 3;
+const DEFAULT_BATHS = 2;
+
+export interface SimilarityTarget {
+  beds: number;
+  baths: number;
+  land_area?: number | null;
+}
+
+export interface ComparableColumns {
+  length: number;
+  beds: Float64Array;
+  baths: Float64Array;
+  // 0 when unknown
+  landArea: Float64Array;
+}
+
+export function toColumns(properties: SoldProperty[]): ComparableColumns {
+  const length = properties.length;
+  const beds = new Float64Array(length);
+  const baths = new Float64Array(length);
+  const landArea = new Float64Array(length);
+  for (let i = 0; i < length; i++) {
+    const property = properties[i];
+    beds[i] = property.beds || DEFAULT_BEDS;
+    baths[i] = property.baths || DEFAULT_BATHS;
+    landArea[i] = property.land_area || 0;
+  }
+  return { length, beds, baths, landArea };
+}
+
+/**
+ * Similarity score (0-100) for every candidate
+ * Starts at 100 and deducts 15 per bedroom and 10 per bathroom of difference,
+ * plus up to 30 for land area difference when both areas are known
+ */
+export function scoreColumns(target: SimilarityTarget, columns: ComparableColumns): Float64Array {
+  const { length, beds, baths, landArea } = columns;
+  const targetBeds = target.beds || DEFAULT_BEDS;
+  const targetBaths = target.baths || DEFAULT_BATHS;
+  const targetArea = target.land_area || 0;
+  const scores = new Float64Array(length);
+
+  for (let i = 0; i < length; i++) {
+    let score = 100 - Math.abs(targetBeds - beds[i]) * 15 - Math.abs(targetBaths - baths[i]) * 10;
+    if (targetArea > 0 && landArea[i] > 0) {
+      score -= Math.min((Math.abs(targetArea - landArea[i]) / targetArea) * 50, 30);
+    }
+    scores[i] = score > 0 ? score : 0;
+  }
+  return scores;
+}
+
+/**
+ * Indices of the k highest scores, best first
+ * Ties keep input order, matching a stable descending sort. Runs in O(n log k).
+ */
+export function topK(scores: Float64Array, k: number): Int32Array {
+  const size = Math.min(k, scores.length);
+  if (size <= 0) return new Int32Array(0);
+
+  // Min-heap on (score, -index): the root is the weakest candidate kept so far
+  const heap = new Int32Array(size);
+  let count = 0;
+  const weaker = (a: number, b: number) => scores[a] < scores[b] || (scores[a] === scores[b] && a > b);
+
+  const siftUp = (pos: number) => {
+    while (pos > 0) {
+      const parent = (pos - 1) >> 1;
+      if (!weaker(heap[pos], heap[parent])) break;
+      const swap = heap[pos];
+      heap[pos] = heap[parent];
+      heap[parent] = swap;
+      pos = parent;
+    }
+  };
+  const siftDown = (pos: number, end: number) => {
+    for (;;) {
+      const left = pos * 2 + 1;
+      if (left >= end) break;
+      const right = left + 1;
+      const child = right < end && weaker(heap[right], heap[left]) ? right : left;
+      if (!weaker(heap[child], heap[pos])) break;
+      const swap = heap[pos];
+      heap[pos] = heap[child];
+      heap[child] = swap;
+      pos = child;
+    }
+  };
+
+  for (let i = 0; i < scores.length; i++) {
+    if (count < size) {
+      heap[count] = i;
+      siftUp(count++);
+    } else if (weaker(heap[0], i)) {
+      heap[0] = i;
+      siftDown(0, size);
+    }
+  }
+
+  // Pop the weakest to the back to leave the heap ordered best first
+  for (let end = size - 1; end > 0; end--) {
+    const swap = heap[0];
+    heap[0] = heap[end];
+    heap[end] = swap;
+    siftDown(0, end);
+  }
+  return heap;
+}
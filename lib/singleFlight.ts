@@ -0,0 +1,70 @@
+// Single-flight coalescing of identical concurrent upstream fetches
+// Callers asking for a key that is already being fetched share that fetch and all receive
+// its result (or its error). A key is forgotten as soon as its fetch settles, so this never
+// serves an old result; it only removes duplicate concurrent work, e.g. a bulk revaluation
+// where dozens of properties need the same suburb's sales at once.
+
+export interface SingleFlightStats {
+  name: string;
+  calls: number;
+  // Upstream fetches actually made
+  fetches: number;
+  // Calls answered by joining a fetch already in flight (upstream fetches saved)
+  coalesced: number;
+  in_flight: number;
+  saved_ratio: number;
+}
+
+export class SingleFlight<V> {
+  private inFlight = new Map<string, Promise<V>>();
+  private calls = 0;
+  private fetches = 0;
+
+  constructor(readonly name: string) {}
+
+  /**
+   * Result of `fetch` for `key`, joining the fetch already in flight for it if there is one
+   */
+  run(key: string, fetch: () => Promise<V>): Promise<V> {
+    this.calls++;
+    const existing = this.inFlight.get(key);
+    if (existing) return existing;
+
+    this.fetches++;
+    const pending = fetch().finally(() => {
+      this.inFlight.delete(key);
+    });
+    this.inFlight.set(key, pending);
+    return pending;
+  }
+
+  stats(): SingleFlightStats {
+    const coalesced = this.calls - this.fetches;
+    return {
+      name: this.name,
+      calls: this.calls,
+      fetches: this.fetches,
+      coalesced,
+      in_flight: this.inFlight.size,
+      saved_ratio: this.calls > 0 ? Math.round((coalesced / this.calls) * 1000) / 1000 : 0
+    };
+  }
+}
+
+const groups = new Map<string, SingleFlight<unknown>>();
+
+/**
+ * The named coalescing group, created on first use
+ */
+export function singleFlight<V>(name: string): SingleFlight<V> {
+  let group = groups.get(name);
+  if (!group) {
+    group = new SingleFlight<unknown>(name);
+    groups.set(name, group);
+  }
+  return group as SingleFlight<V>;
+}
+
+export function singleFlightStats(): SingleFlightStats[] {
+  return [...groups.values()].map(group => group.stats());
+}
@@ -0,0 +1,277 @@
+// Per-source circuit breaker and adaptive rate limiter for comparable sources
+// A source that keeps failing (blocked, erroring or timing out) is skipped outright while
+// its breaker is open, instead of every evaluation waiting out its deadline. After a
+// cooldown one probe request is let through; success closes the breaker, failure reopens
+// it for longer. Scraped sources also get a token bucket that halves its rate on 429/403
+// responses, pauses for any Retry-After, and recovers gradually on success.
+// State is per server instance.
+
+import { envInt, envFloat } from '@/lib/env';
+
+const WINDOW = envInt('SOURCE_BREAKER_WINDOW', 20);
+const MIN_REQUESTS = envInt('SOURCE_BREAKER_MIN_REQUESTS', 5);
+const FAILURE_RATE = envFloat('SOURCE_BREAKER_FAILURE_RATE', 0.5);
+const OPEN_MS = envInt('SOURCE_BREAKER_OPEN_MS', 60000);
+const MAX_OPEN_MS = 15 * 60 * 1000;
+// Pause applied on a 429/403 without a Retry-After header
+const THROTTLE_PAUSE_MS = 30000;
+
+/**
+ * Non-2xx response from a source, carrying any Retry-After delay
+ */
+export class SourceHttpError extends Error {
+  constructor(readonly status: number, readonly retryAfterMs: number | null) {
+    super(`HTTP ${status}`);
+    this.name = 'SourceHttpError';
+  }
+}
+
+/**
+ * Whether a failed request says the source itself is unhealthy
+ * Server errors, throttling (403/429), timeouts and network errors do; other 4xx responses
+ * (a bad suburb slug's 404) are the caller's problem and must not open the breaker for everyone
+ */
+export function isSourceFault(error: unknown): boolean {
+  if (error instanceof SourceHttpError) {
+    return error.status >= 500 || error.status === 429 || error.status === 403;
+  }
+  return true;
+}
+
+/**
+ * Retry-After header in milliseconds (delta-seconds or HTTP-date form)
+ */
+export function parseRetryAfter(header: string | null): number | null {
+  if (!header) return null;
+  const seconds = Number(header);
+  if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+  const date = Date.parse(header);
+  return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+}
+
+export type BreakerState = 'closed' | 'open' | 'half_open';
+
+export interface SourceGuardStatus {
+  source: string;
+  state: BreakerState;
+  failure_rate: number;
+  recent_requests: number;
+  // Time until the next probe is allowed (open breakers)
+  retry_in_ms: number | null;
+  rate_per_min: number | null;
+  paused_for_ms: number | null;
+  skipped: number;
+}
+
+export type Admission = { ok: true } | { ok: false; reason: string; retry_in_ms: number };
+
+class CircuitBreaker {
+  state: BreakerState = 'closed';
+  private outcomes: boolean[] = [];
+  private openedAt = 0;
+  private openMs = OPEN_MS;
+  private probing = false;
+
+  constructor(private readonly source: string) {}
+
+  admit(now: number): Admission {
+    if (this.state === 'open') {
+      const retryIn = this.openedAt + this.openMs - now;
+      if (retryIn > 0) return { ok: false, reason: 'circuit open', retry_in_ms: retryIn };
+      this.state = 'half_open';
+    }
+    if (this.state === 'half_open') {
+      if (this.probing) return { ok: false, reason: 'circuit half-open, probe in flight', retry_in_ms: 0 };
+      this.probing = true;
+    }
+    return { ok: true };
+  }
+
+  record(success: boolean, now: number) {
+    if (this.state === 'half_open') {
+      this.probing = false;
+      if (success) {
+        this.state = 'closed';
+        this.outcomes = [];
+        this.openMs = OPEN_MS;
+      } else {
+        this.open(now, Math.min(this.openMs * 2, MAX_OPEN_MS));
+      }
+      return;
+    }
+    this.outcomes.push(success);
+    if (this.outcomes.length > WINDOW) this.outcomes.shift();
+    if (this.state === 'closed' && this.outcomes.length >= MIN_REQUESTS && this.failureRate() >= FAILURE_RATE) {
+      this.open(now, OPEN_MS);
+    }
+  }
+
+  // An admitted probe that was not sent after all
+  releaseProbe() {
+    this.probing = false;
+  }
+
+  failureRate(): number {
+    if (this.outcomes.length === 0) return 0;
+    return this.outcomes.filter(ok => !ok).length / this.outcomes.length;
+  }
+
+  retryIn(now: number): number | null {
+    return this.state === 'open' ? Math.max(0, this.openedAt + this.openMs - now) : null;
+  }
+
+  recentRequests(): number {
+    return this.outcomes.length;
+  }
+
+  private open(now: number, openMs: number) {
+    this.state = 'open';
+    this.openedAt = now;
+    this.openMs = openMs;
+    this.outcomes = [];
+    console.log(`[Source Guard] ${this.source} circuit opened for ${Math.round(openMs / 1000)}s`);
+  }
+}
+
+class AdaptiveTokenBucket {
+  private rate: number;
+  private tokens: number;
+  private refilledAt = Date.now();
+  private pausedUntil = 0;
+
+  // `ratePerMin` is both the starting rate and the ceiling it recovers to
+  constructor(private readonly ratePerMin: number, private readonly burst: number) {
+    this.rate = ratePerMin;
+    this.tokens = burst;
+  }
+
+  take(now: number): Admission {
+    if (now < this.pausedUntil) {
+      return { ok: false, reason: 'rate limited by source', retry_in_ms: this.pausedUntil - now };
+    }
+    this.tokens = Math.min(this.burst, this.tokens + ((now - this.refilledAt) / 60000) * this.rate);
+    this.refilledAt = now;
+    if (this.tokens < 1) {
+      return { ok: false, reason: 'rate limit', retry_in_ms: Math.ceil(((1 - this.tokens) / this.rate) * 60000) };
+    }
+    this.tokens -= 1;
+    return { ok: true };
+  }
+
+  // Additive increase back toward the configured rate
+  succeeded() {
+    this.rate = Math.min(this.ratePerMin, this.rate + this.ratePerMin / 10);
+  }
+
+  // Multiplicative decrease, and no requests until the source's Retry-After has passed
+  throttled(now: number, retryAfterMs: number | null) {
+    this.rate = Math.max(this.ratePerMin / 16, this.rate / 2);
+    this.tokens = 0;
+    this.pausedUntil = Math.max(this.pausedUntil, now + (retryAfterMs ?? THROTTLE_PAUSE_MS));
+  }
+
+  ratePerMinNow(): number {
+    return Math.round(this.rate * 100) / 100;
+  }
+
+  pausedFor(now: number): number | null {
+    return this.pausedUntil > now ? this.pausedUntil - now : null;
+  }
+}
+
+export class SourceGuard {
+  private breaker: CircuitBreaker;
+  private limiter: AdaptiveTokenBucket | null;
+  private skipped = 0;
+
+  constructor(readonly source: string, rateLimit?: { ratePerMin: number; burst: number }) {
+    this.breaker = new CircuitBreaker(source);
+    this.limiter = rateLimit ? new AdaptiveTokenBucket(rateLimit.ratePerMin, rateLimit.burst) : null;
+  }
+
+  /**
+   * Whether a request may go to the source now; an admitted request must be followed by succeeded(), failed() or ignored()
+   */
+  admit(): Admission {
+    const now = Date.now();
+    // Checked before the breaker so a rate-limited call never takes the half-open probe slot
+    const paused = this.limiter?.pausedFor(now);
+    if (paused) {
+      this.skipped++;
+      return { ok: false, reason: 'rate limited by source', retry_in_ms: paused };
+    }
+    const admission = this.breaker.admit(now);
+    if (!admission.ok) {
+      this.skipped++;
+      return admission;
+    }
+    const token: Admission = this.limiter?.take(now) ?? { ok: true };
+    if (!token.ok) {
+      this.skipped++;
+      this.breaker.releaseProbe();
+      return token;
+    }
+    return { ok: true };
+  }
+
+  /**
+   * Cheap check for callers deciding whether to attempt the source at all
+   */
+  available(): boolean {
+    const now = Date.now();
+    return !this.limiter?.pausedFor(now) && (this.breaker.retryIn(now) ?? 0) === 0;
+  }
+
+  succeeded() {
+    this.breaker.record(true, Date.now());
+    this.limiter?.succeeded();
+  }
+
+  failed(error?: unknown) {
+    const now = Date.now();
+    this.breaker.record(false, now);
+    if (error instanceof SourceHttpError && (error.status === 429 || error.status === 403)) {
+      this.limiter?.throttled(now, error.retryAfterMs);
+    }
+  }
+
+  /**
+   * An admitted request that failed for reasons of its own, not the source's
+   * Frees the half-open probe slot without feeding the failure window
+   */
+  ignored() {
+    this.breaker.releaseProbe();
+  }
+
+  status(): SourceGuardStatus {
+    const now = Date.now();
+    return {
+      source: this.source,
+      state: this.breaker.state,
+      failure_rate: Math.round(this.breaker.failureRate() * 1000) / 1000,
+      recent_requests: this.breaker.recentRequests(),
+      retry_in_ms: this.breaker.retryIn(now),
+      rate_per_min: this.limiter?.ratePerMinNow() ?? null,
+      paused_for_ms: this.limiter?.pausedFor(now) ?? null,
+      skipped: this.skipped
+    };
+  }
+}
+
+const guards = new Map<string, SourceGuard>();
+
+/**
+ * The guard for a source, created on first use (the rate limit applies only when first created)
+ */
+export function sourceGuard(source: string, rateLimit?: { ratePerMin: number; burst: number }): SourceGuard {
+  let guard = guards.get(source);
+  if (!guard) {
+    guard = new SourceGuard(source, rateLimit);
+    guards.set(source, guard);
+  }
+  return guard;
+}
+
+export function sourceGuardStatus(): SourceGuardStatus[] {
+  return [...guards.values()].map(guard => guard.status());
+}
@@ -0,0 +1,58 @@
+// Server-sent events helper for streaming route handlers
+
+export type SendEvent = (event: string, data: unknown) => void;
+
+const encoder = new TextEncoder();
+const KEEP_ALIVE_MS = 15000;
+
+/**
+ * Build a text/event-stream response fed by `producer`
+ * The stream closes when the producer resolves; `signal` aborts when the client disconnects
+ */
+export function eventStreamResponse(producer: (send: SendEvent, signal: AbortSignal) => Promise<void>): Response {
+  const abort = new AbortController();
+  let closed = false;
+  let keepAlive: ReturnType<typeof setInterval> | undefined;
+
+  const stream = new ReadableStream<Uint8Array>({
+    start(controller) {
+      const send: SendEvent = (event, data) => {
+        if (!closed) {
+          controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`));
+        }
+      };
+
+      // Comment lines keep proxies from closing an idle connection during long stages
+      keepAlive = setInterval(() => {
+        if (!closed) controller.enqueue(encoder.encode(': keep-alive\n\n'));
+      }, KEEP_ALIVE_MS);
+
+      producer(send, abort.signal)
+        .catch(error => {
+          const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+          send('error', { detail: errorMessage });
+        })
+        .finally(() => {
+          clearInterval(keepAlive);
+          if (!closed) {
+            closed = true;
+            controller.close();
+          }
+        });
+    },
+    cancel() {
+      closed = true;
+      clearInterval(keepAlive);
+      abort.abort();
+    }
+  });
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache, no-transform',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    }
+  });
+}
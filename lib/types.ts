@@ -35,6 +35,41 @@ export interface ComparableProperty {
   building_size?: number | null;
 }
 
+// Photo stored out of band (see lib/imageStore.ts); the id is the SHA-256 of the bytes
+export interface PropertyImage {
+  id: string;
+  url: string;
+  thumbnail_url: string;
+  content_type: string;
+  size: number;
+  width: number | null;
+  height: number | null;
+}
+
+// Structured summary of an RP Data report, keyed by a hash of the report text
+export interface RpDataDigest {
+  comparable_sales: Array<{
+    address: string;
+    price: number;
+    beds: number | null;
+    baths: number | null;
+    size_sqm: number | null;
+    sold_date: string | null;
+  }>;
+  median_price: number | null;
+  days_on_market: number | null;
+  clearance_rate_pct: number | null;
+  annual_growth_pct: number | null;
+  land_value: number | null;
+  estimated_value_low: number | null;
+  estimated_value_high: number | null;
+  key_factors: string[];
+  summary: string;
+  content_hash: string;
+  model: string;
+  created_at: string;
+}
+
 // Confidence scoring breakdown
 export interface ConfidenceScoring {
   overall_score: number; // 0-100
@@ -87,6 +122,7 @@ export interface Property {
   strata_body_corps?: number | null;
   council_rates?: number | null;
   images: string[];
+  image_meta?: PropertyImage[] | null; // Stored photos referenced by `images`
   pitch?: string | null;
   agent1_name?: string | null;
   agent1_phone?: string | null;
@@ -107,6 +143,7 @@ export interface Property {
   rp_data_report?: string | null;
   rp_data_upload_date?: string | null;
   rp_data_filename?: string | null;
+  rp_data_digest?: RpDataDigest | null; // Structured summary, see lib/rpDigest.ts
   additional_report?: string | null;
   agent_id?: string | null;
   agent_name?: string | null;
@@ -3,10 +3,13 @@ import json
 import sys
 import os
 
+from api_client import get_client
+
 class LLMBudgetTester:
     def __init__(self, base_url="https://aiagent-estate.preview.emergentagent.com"):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
+        self.client = get_client(base_url)
         self.tests_run = 0
         self.tests_passed = 0
         self.property_id = None
@@ -25,16 +28,10 @@ class LLMBudgetTester:
     
     def make_request(self, method, endpoint, data=None, timeout=60):
         """Make API request and return response details"""
-        url = f"{self.api_url}/{endpoint}"
-        headers = {'Content-Type': 'application/json'}
-        
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=timeout)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=timeout)
-            else:
+            if method not in ('GET', 'POST'):
                 raise ValueError(f"Unsupported method: {method}")
+            response = self.client.request(method, endpoint, json=data, timeout=timeout)
             
             try:
                 response_data = response.json()
@@ -105,12 +102,29 @@ class LLMBudgetTester:
             self.log_test("LLM Budget Check", True, "502 Bad Gateway - Likely budget/quota exceeded")
             return True
         elif status_code == 429:
-            self.log_test("LLM Budget Check", True, "429 Rate Limited - Budget constraints")
+            # Refused by admission control: the response says why and carries the budget
+            budget = data.get("budget") or {}
+            if budget:
+                print(f"   Spend: ${budget.get('spend_usd')} of ${budget.get('budget_usd')} ({budget.get('mode')})")
+            self.log_test("LLM Budget Check", True, f"429 Budget exhausted - {data.get('detail', 'Rate limited')}")
             return True
         elif status_code == 200:
             # Success - budget is OK
             evaluation_length = len(data.get("evaluation_report", ""))
             self.log_test("LLM Budget Check", True, f"Budget OK - Evaluation completed ({evaluation_length} chars)")
+            
+            # Prompt tokens per section, after compaction
+            prompt_budget = data.get("prompt_budget")
+            if prompt_budget:
+                for section in prompt_budget.get("sections", []):
+                    compacted = f" (compacted from {section.get('original_tokens')})" if section.get("compacted") else ""
+                    print(f"   Prompt section {section.get('name')}: {section.get('tokens')} tokens{compacted}")
+                total = prompt_budget.get("total_tokens", 0)
+                limit = prompt_budget.get("max_tokens", 0)
+                print(f"   Prompt total: {total}/{limit} tokens")
+                if limit and total > limit:
+                    self.log_test("Prompt Budget", False, f"Prompt exceeds budget: {total} > {limit} tokens")
+                    return False
             return True
         elif status_code == 500:
             # Check if error message indicates budget issues
@@ -180,7 +194,7 @@ class LLMBudgetTester:
             "images": []  # No photos
         }
         
-        response = self.make_request("POST", "evaluate-quick", property_data, timeout=90)
+        response = self.make_request("POST", "evaluate-quick", property_data)
         
         status_code = response["status_code"]
         data = response["data"]
@@ -207,6 +221,38 @@ class LLMBudgetTester:
             self.log_test("Quick Evaluation (No Photos)", False, f"Status {status_code}: {error_detail}")
             return False
     
+    def test_llm_usage_endpoint(self):
+        """Test the LLM ledger reports spend and remaining budget"""
+        print("\n🔍 Testing LLM usage endpoint...")
+        
+        response = self.make_request("GET", "llm/usage")
+        if not response["success"]:
+            self.log_test("LLM Usage Endpoint", False, f"Status {response['status_code']}: {response['data']}")
+            return False
+        
+        agencies = response["data"].get("agencies", [])
+        required = ["spend_usd", "budget_usd", "remaining_usd", "utilization", "mode"]
+        global_budget = response["data"].get("global") or {}
+        missing = [field for field in required if field not in global_budget]
+        if missing:
+            self.log_test("LLM Usage Endpoint", False, f"Global budget missing fields: {', '.join(missing)}")
+            return False
+        print(f"   All agencies: ${global_budget['spend_usd']} of ${global_budget['budget_usd']} ({global_budget['mode']})")
+        for agency in agencies:
+            budget = agency.get("budget", {})
+            missing = [field for field in required if field not in budget]
+            if missing:
+                self.log_test("LLM Usage Endpoint", False, f"Budget missing fields: {', '.join(missing)}")
+                return False
+            print(f"   {budget['agency_id']}: ${budget['spend_usd']} of ${budget['budget_usd']} ({budget['mode']})")
+            for row in agency.get("usage", []):
+                print(f"     {row.get('endpoint')} / {row.get('model')}: {row.get('calls')} calls, "
+                      f"{row.get('prompt_tokens')}+{row.get('completion_tokens')} tokens, ${row.get('cost_usd')}, "
+                      f"avg {row.get('avg_latency_ms')}ms")
+        
+        self.log_test("LLM Usage Endpoint", True, f"{len(agencies)} agencies with LLM spend this month")
+        return True
+    
     def test_error_response_format(self):
         """Test that error responses are properly formatted JSON"""
         print("\n🔍 Testing error response format...")
@@ -275,6 +321,9 @@ class LLMBudgetTester:
         # Test quick evaluation
         self.test_quick_evaluation_no_photos()
         
+        # Ledger of the calls made above
+        self.test_llm_usage_endpoint()
+        
         # Test error handling
         self.test_error_response_format()
         
@@ -4,6 +4,10 @@ const nextConfig: NextConfig = {
   env: {
     DOMAIN_API_KEY: process.env.DOMAIN_API_KEY,
   },
+  images: {
+    // Thumbnails of stored photos are resized by the image optimizer
+    localPatterns: [{ pathname: "/api/images/**" }],
+  },
   async headers() {
     return [
       {
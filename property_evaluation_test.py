@@ -4,15 +4,17 @@ Comprehensive End-to-End Test for Property Evaluation System
 Tests the complete flow: Create Property → Quick Evaluation → Full Evaluation → Retrieve
 """
 
-import requests
 import time
 import json
 from datetime import datetime
 
+from api_client import get_client, iter_sse_events
+
 class PropertyEvaluationTester:
     def __init__(self, base_url="http://localhost:8001"):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
+        self.client = get_client(base_url)
         self.property_id = None
         self.quick_eval_job_id = None
         self.test_results = []
@@ -60,11 +62,9 @@ class PropertyEvaluationTester:
         
         start = time.time()
         try:
-            response = requests.post(
-                f"{self.api_url}/properties",
-                json=property_data,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
+            response = self.client.post(
+                "properties",
+                json=property_data
             )
             duration = time.time() - start
             
@@ -127,10 +127,9 @@ class PropertyEvaluationTester:
         start = time.time()
         try:
             # Step 1: Submit quick evaluation
-            response = requests.post(
-                f"{self.api_url}/evaluate-quick",
+            response = self.client.post(
+                "evaluate-quick",
                 json=property_data,
-                headers={'Content-Type': 'application/json'},
                 timeout=30
             )
             
@@ -162,14 +161,13 @@ class PropertyEvaluationTester:
             print("   Polling status...")
             max_polls = 40  # 80 seconds max (jobs complete in ~40s)
             poll_interval = 2
+            first_partial_at = None
             
             for i in range(max_polls):
                 time.sleep(poll_interval)
                 
-                status_response = requests.get(
-                    f"{self.api_url}/evaluate-quick/{job_id}/status",
-                    headers={'Content-Type': 'application/json'},
-                    timeout=30  # Increased timeout for status poll
+                status_response = self.client.get(
+                    f"evaluate-quick/{job_id}/status"
                 )
                 
                 if status_response.status_code != 200:
@@ -180,13 +178,27 @@ class PropertyEvaluationTester:
                 
                 print(f"   Poll {i+1}: Status = {status}")
                 
+                if first_partial_at is None and status_data.get('partial_report'):
+                    first_partial_at = time.time() - start
+                    print(f"   First partial report after {first_partial_at:.1f}s")
+                
                 if status == 'completed':
                     duration = time.time() - start
+                    if first_partial_at is not None:
+                        print(f"   Time to first partial report: {first_partial_at:.1f}s of {duration:.1f}s total")
                     
                     # Verify evaluation report - it's in result object
                     result = status_data.get('result', {})
                     evaluation = result.get('evaluation_report', '')
                     
+                    # Sections are generated concurrently: latency should track the slowest one
+                    report_sections = result.get('report_sections') or []
+                    for section in report_sections:
+                        print(f"   Section {section.get('title')}: {section.get('status')} in {section.get('duration_ms')}ms ({section.get('attempts')} attempts)")
+                    if report_sections:
+                        durations = [section.get('duration_ms') or 0 for section in report_sections]
+                        print(f"   Slowest section: {max(durations)}ms, sum of sections: {sum(durations)}ms")
+                    
                     # Check for required sections
                     required_sections = [
                         'VALUE RANGE',
@@ -264,9 +276,8 @@ class PropertyEvaluationTester:
         start = time.time()
         try:
             # Submit evaluation
-            response = requests.post(
-                f"{self.api_url}/properties/{self.property_id}/evaluate",
-                headers={'Content-Type': 'application/json'},
+            response = self.client.post(
+                f"properties/{self.property_id}/evaluate",
                 timeout=120  # Increased timeout - evaluation can take 60-90s
             )
             
@@ -288,10 +299,8 @@ class PropertyEvaluationTester:
             for i in range(max_polls):
                 time.sleep(poll_interval)
                 
-                status_response = requests.get(
-                    f"{self.api_url}/properties/{self.property_id}/evaluation-status",
-                    headers={'Content-Type': 'application/json'},
-                    timeout=30  # Increased timeout for status poll
+                status_response = self.client.get(
+                    f"properties/{self.property_id}/evaluation-status"
                 )
                 
                 if status_response.status_code != 200:
@@ -307,9 +316,8 @@ class PropertyEvaluationTester:
                     duration = time.time() - start
                     
                     # Get property to verify evaluation_report
-                    prop_response = requests.get(
-                        f"{self.api_url}/properties/{self.property_id}",
-                        headers={'Content-Type': 'application/json'},
+                    prop_response = self.client.get(
+                        f"properties/{self.property_id}",
                         timeout=10
                     )
                     
@@ -366,6 +374,245 @@ class PropertyEvaluationTester:
                 duration
             )
     
+    def test_3_full_evaluation_stream(self):
+        """Test 3 (stream mode): Full Property Evaluation over server-sent events"""
+        print("\n" + "="*70)
+        print("TEST 3: Full Property Evaluation (Stream)")
+        print("="*70)
+        
+        if not self.property_id:
+            return self.log_result(
+                "Full Property Evaluation",
+                False,
+                "Skipped - No property ID available from Test 1",
+                0
+            )
+        
+        print(f"Evaluating property: {self.property_id}")
+        print("Expected: Stage events pushed as they happen, final result on the stream")
+        
+        start = time.time()
+        first_event_at = None
+        initial_stage = None
+        first_transition_at = None
+        first_content_at = None
+        first_section_at = None
+        sections = []
+        try:
+            response = self.client.post(
+                f"properties/{self.property_id}/evaluate?stream=true",
+                headers={'Accept': 'text/event-stream'},
+                stream=True,
+                timeout=150
+            )
+            
+            if response.status_code != 200:
+                duration = time.time() - start
+                return self.log_result(
+                    "Full Property Evaluation - Submit",
+                    False,
+                    f"Failed to open stream: status {response.status_code}, {response.text[:200]}",
+                    duration
+                )
+            
+            with response:
+                for event, data in iter_sse_events(response):
+                    elapsed = time.time() - start
+                    if first_event_at is None:
+                        # The stream opens with a snapshot of the current stage, so this is connection setup
+                        first_event_at = elapsed
+                        initial_stage = data.get('evaluation_stage')
+                        print(f"   Time to stream open (initial snapshot): {first_event_at:.2f}s")
+                    
+                    if event == 'stage':
+                        stage = data.get('evaluation_stage')
+                        if first_transition_at is None and stage != initial_stage:
+                            first_transition_at = elapsed
+                            print(f"   Time to first stage transition: {first_transition_at:.2f}s")
+                        print(f"   {elapsed:6.2f}s Stage = {stage}")
+                    
+                    elif event == 'report_delta':
+                        if first_content_at is None:
+                            first_content_at = elapsed
+                            print(f"   {elapsed:6.2f}s First report content")
+                    
+                    elif event == 'report_section':
+                        sections.append(data.get('title'))
+                        if first_section_at is None:
+                            first_section_at = elapsed
+                        print(f"   {elapsed:6.2f}s Section: {data.get('title')}")
+                    
+                    elif event == 'completed':
+                        duration = time.time() - start
+                        evaluation = (data.get('result') or {}).get('evaluation_report', '')
+                        timings = ", ".join(
+                            f"{t['stage']}={t['duration_ms'] / 1000:.1f}s"
+                            for t in data.get('stage_timings', []) if t.get('duration_ms') is not None
+                        )
+                        if timings:
+                            print(f"   Stage timings: {timings}")
+                        if first_section_at is not None:
+                            print(f"   Time to first section: {first_section_at:.2f}s of {duration:.2f}s total "
+                                  f"({len(sections)} sections streamed)")
+                        elif first_content_at is None:
+                            print("   ⚠️  Report was not streamed (no report_delta events)")
+                        
+                        if evaluation and len(evaluation) > 100:
+                            return self.log_result(
+                                "Full Property Evaluation",
+                                True,
+                                f"Completed successfully. Report length: {len(evaluation)} chars, stream open after {first_event_at:.2f}s"
+                                + (f", first stage transition after {first_transition_at:.2f}s" if first_transition_at is not None else ""),
+                                duration
+                            )
+                        return self.log_result(
+                            "Full Property Evaluation",
+                            False,
+                            "Completed but evaluation_report is empty or too short",
+                            duration
+                        )
+                    
+                    elif event in ('failed', 'error'):
+                        duration = time.time() - start
+                        return self.log_result(
+                            "Full Property Evaluation",
+                            False,
+                            f"Evaluation failed at stage {data.get('evaluation_stage', 'unknown')}: {data.get('error') or data.get('detail')}",
+                            duration
+                        )
+            
+            duration = time.time() - start
+            return self.log_result(
+                "Full Property Evaluation",
+                False,
+                "Stream closed before a completed event",
+                duration
+            )
+            
+        except Exception as e:
+            duration = time.time() - start
+            return self.log_result(
+                "Full Property Evaluation",
+                False,
+                f"Exception: {str(e)}",
+                duration
+            )
+    
+    def test_5_batch_evaluation(self):
+        """Test 5: Batch evaluation of a saved property plus inline specs in the same suburb"""
+        print("\n" + "="*70)
+        print("TEST 5: Batch Evaluation (Stream)")
+        print("="*70)
+        
+        specs = [
+            {"location": "Bondi, NSW 2026", "beds": beds, "baths": 2, "carpark": 1, "property_type": "house", "size": 400}
+            for beds in (2, 3, 4)
+        ]
+        payload = {"properties": specs, **({"property_ids": [self.property_id]} if self.property_id else {})}
+        print(f"Submitting {len(specs) + (1 if self.property_id else 0)} properties")
+        print("Expected: Comparables fetched once per suburb, results streamed as each property finishes")
+        
+        start = time.time()
+        try:
+            response = self.client.post("evaluate-batch", json=payload)
+            if response.status_code != 202:
+                return self.log_result(
+                    "Batch Evaluation",
+                    False,
+                    f"Submit failed: status {response.status_code}, {response.text[:200]}",
+                    time.time() - start
+                )
+            batch_id = response.json()["batch_id"]
+            print(f"   Batch ID: {batch_id}")
+            
+            stream = self.client.get(f"evaluate-batch/{batch_id}/stream", headers={'Accept': 'text/event-stream'}, stream=True, timeout=600)
+            with stream:
+                for event, data in iter_sse_events(stream):
+                    elapsed = time.time() - start
+                    if event == 'result':
+                        detail = data.get('error') or f"cache {data.get('cache_status') or 'n/a'}"
+                        print(f"   {elapsed:6.2f}s {data['status']:<9} {data['label'][:50]} ({detail})")
+                    elif event == 'progress':
+                        print(f"   {elapsed:6.2f}s Progress {data['percent']}%: {data['completed']} done, "
+                              f"{data['running']} running, {data['queued'] + data['waiting']} waiting ({data['areas']} areas)")
+                    elif event == 'completed':
+                        duration = time.time() - start
+                        return self.log_result(
+                            "Batch Evaluation",
+                            data['failed'] == 0,
+                            f"{data['completed']}/{data['total']} evaluated, {data['failed']} failed, "
+                            f"{duration / data['total']:.1f}s per property",
+                            duration
+                        )
+                    elif event == 'error':
+                        return self.log_result("Batch Evaluation", False, f"Stream error: {data.get('detail')}", time.time() - start)
+            
+            return self.log_result("Batch Evaluation", False, "Stream closed before a completed event", time.time() - start)
+        except Exception as e:
+            return self.log_result("Batch Evaluation", False, f"Exception: {str(e)}", time.time() - start)
+    
+    def test_6_remote_photo_reuse(self, photo_url):
+        """Test 6: Evaluating a property with a remote photo twice reuses the recorded hash and findings"""
+        print("\n" + "="*70)
+        print("TEST 6: Remote Photo Reuse")
+        print("="*70)
+
+        property_data = {
+            "location": "123 George Street, Sydney, NSW 2000",
+            "property_type": "Apartment",
+            "beds": 2,
+            "baths": 2,
+            "carpark": 1,
+            "size": 90,
+            "price": 850000,
+            "features": "Modern kitchen, balcony, city views",
+            "images": [photo_url]
+        }
+        print(f"Photo: {photo_url}")
+        print("Expected: First evaluation analyses the photo, second one serves it from cache")
+
+        start = time.time()
+        try:
+            response = self.client.post("properties", json=property_data)
+            if response.status_code != 200:
+                return self.log_result(
+                    "Remote Photo Reuse",
+                    False,
+                    f"Create failed: status {response.status_code}, {response.text[:200]}",
+                    time.time() - start
+                )
+            property_id = response.json().get('id')
+
+            runs = []
+            for run in (1, 2):
+                response = self.client.post(f"properties/{property_id}/evaluate", timeout=150)
+                if response.status_code != 200:
+                    return self.log_result(
+                        "Remote Photo Reuse",
+                        False,
+                        f"Evaluation {run} failed: status {response.status_code}, {response.text[:200]}",
+                        time.time() - start
+                    )
+                photos = response.json().get('photo_analysis') or {}
+                print(f"   Run {run}: {photos.get('photos')} photos, {photos.get('analysed')} analysed, "
+                      f"{photos.get('cached')} cached, {photos.get('failed')} failed")
+                runs.append(photos)
+
+            first, second = runs
+            duration = time.time() - start
+            if first.get('failed') or second.get('failed'):
+                return self.log_result("Remote Photo Reuse", False, "Photo could not be fetched or analysed", duration)
+            if second.get('analysed') != 0 or second.get('cached') != second.get('photos'):
+                return self.log_result(
+                    "Remote Photo Reuse",
+                    False,
+                    f"Second evaluation re-analysed {second.get('analysed')} photo(s) instead of reusing findings",
+                    duration
+                )
+            return self.log_result("Remote Photo Reuse", True, "Second evaluation reused the photo findings", duration)
+        except Exception as e:
+            return self.log_result("Remote Photo Reuse", False, f"Exception: {str(e)}", time.time() - start)
+
     def test_4_retrieve_property(self):
         """Test 4: Retrieve Property with Evaluation"""
         print("\n" + "="*70)
@@ -384,10 +631,8 @@ class PropertyEvaluationTester:
         
         start = time.time()
         try:
-            response = requests.get(
-                f"{self.api_url}/properties/{self.property_id}",
-                headers={'Content-Type': 'application/json'},
-                timeout=30
+            response = self.client.get(
+                f"properties/{self.property_id}"
             )
             duration = time.time() - start
             
@@ -486,7 +731,7 @@ class PropertyEvaluationTester:
         except Exception as e:
             print(f"⚠️  Could not check backend logs: {str(e)}")
     
-    def run_all_tests(self):
+    def run_all_tests(self, stream=False, batch=False, photo_url=None):
         """Run all tests in sequence"""
         print("\n" + "="*70)
         print("PROPERTY EVALUATION SYSTEM - COMPREHENSIVE E2E TEST")
@@ -499,8 +744,12 @@ class PropertyEvaluationTester:
         # Run tests in sequence
         test1_pass = self.test_1_create_property()
         test2_pass = self.test_2_quick_evaluation()
-        test3_pass = self.test_3_full_evaluation()
+        test3_pass = self.test_3_full_evaluation_stream() if stream else self.test_3_full_evaluation()
         test4_pass = self.test_4_retrieve_property()
+        if batch:
+            self.test_5_batch_evaluation()
+        if photo_url:
+            self.test_6_remote_photo_reuse(photo_url)
         
         # Check backend logs
         self.check_backend_logs()
@@ -553,8 +802,16 @@ class PropertyEvaluationTester:
             return 1
 
 def main():
-    tester = PropertyEvaluationTester()
-    return tester.run_all_tests()
+    import argparse
+    parser = argparse.ArgumentParser(description="Property evaluation E2E test")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--stream", action="store_true", help="Consume the evaluation event stream instead of polling evaluation-status")
+    parser.add_argument("--batch", action="store_true", help="Also run a small batch evaluation and stream its results")
+    parser.add_argument("--photo-url", help="Also evaluate a property with this http(s) photo twice and check the second run reuses it")
+    args = parser.parse_args()
+    
+    tester = PropertyEvaluationTester(args.base_url)
+    return tester.run_all_tests(stream=args.stream, batch=args.batch, photo_url=args.photo_url)
 
 if __name__ == "__main__":
     import sys
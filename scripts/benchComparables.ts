@@ -0,0 +1,78 @@
+// Benchmark: columnar comparable ranking vs the previous per-object implementation
+// Usage: npx tsx scripts/benchComparables.ts [candidates...]
+// Reports rankings per second for each candidate count and checks both rankings agree.
+
+import type { SoldProperty } from '@/lib/comparables';
+import { scoreColumns, toColumns, topK } from '@/lib/similarity';
+
+const LIMIT = 10;
+const MIN_BENCH_MS = 500;
+
+// Previous implementation: score each object, full sort, slice
+function legacyFindBest(target: { beds: number; baths: number; land_area: number | null }, sold: SoldProperty[]) {
+  const similarity = (comparable: SoldProperty) => {
+    let score = 100;
+    score -= Math.abs((target.beds || 3) - (comparable.beds || 3)) * 15;
+    score -= Math.abs((target.baths || 2) - (comparable.baths || 2)) * 10;
+    if (target.land_area && comparable.land_area) {
+      score -= Math.min((Math.abs(target.land_area - comparable.land_area) / target.land_area) * 50, 30);
+    }
+    return Math.max(0, score);
+  };
+  const scored = sold.map(prop => ({ ...prop, similarity_score: similarity(prop) }));
+  scored.sort((a, b) => (b.similarity_score || 0) - (a.similarity_score || 0));
+  return scored.slice(0, LIMIT);
+}
+
+function columnarFindBest(target: { beds: number; baths: number; land_area: number | null }, sold: SoldProperty[]) {
+  const scores = scoreColumns(target, toColumns(sold));
+  return Array.from(topK(scores, LIMIT), i => ({ ...sold[i], similarity_score: scores[i] }));
+}
+
+function syntheticSales(count: number): SoldProperty[] {
+  const sales: SoldProperty[] = [];
+  for (let i = 0; i < count; i++) {
+    sales.push({
+      id: String(i),
+      address: `${i} Example St`,
+      price: 400000 + Math.round(Math.random() * 1600000),
+      beds: Math.random() < 0.05 ? null : 1 + Math.floor(Math.random() * 5),
+      baths: Math.random() < 0.05 ? null : 1 + Math.floor(Math.random() * 3),
+      cars: Math.floor(Math.random() * 3),
+      land_area: Math.random() < 0.3 ? null : 150 + Math.round(Math.random() * 900),
+      property_type: 'House',
+      sold_date: 'Recently',
+      source: 'synthetic'
+    });
+  }
+  return sales;
+}
+
+function bench(fn: () => unknown): number {
+  let iterations = 0;
+  const started = performance.now();
+  let elapsed = 0;
+  while (elapsed < MIN_BENCH_MS) {
+    fn();
+    iterations++;
+    elapsed = performance.now() - started;
+  }
+  return (iterations / elapsed) * 1000;
+}
+
+const sizes = process.argv.slice(2).map(Number).filter(n => n > 0);
+const target = { beds: 3, baths: 2, land_area: 600 };
+
+console.log(`${'Candidates'.padEnd(12)}${'legacy/s'.padStart(12)}${'columnar/s'.padStart(12)}${'speedup'.padStart(10)}  match`);
+for (const size of sizes.length > 0 ? sizes : [100, 1000, 10000, 100000]) {
+  const sales = syntheticSales(size);
+  const expected = legacyFindBest(target, sales).map(s => s.id).join(',');
+  const actual = columnarFindBest(target, sales).map(s => s.id).join(',');
+
+  const legacy = bench(() => legacyFindBest(target, sales));
+  const columnar = bench(() => columnarFindBest(target, sales));
+  console.log(
+    `${String(size).padEnd(12)}${legacy.toFixed(0).padStart(12)}${columnar.toFixed(0).padStart(12)}` +
+    `${(columnar / legacy).toFixed(1).padStart(9)}x  ${expected === actual ? 'yes' : 'NO'}`
+  );
+}
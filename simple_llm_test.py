@@ -2,13 +2,17 @@ import requests
 import json
 import time
 
+from api_client import get_client
+
+client = get_client("https://aiagent-estate.preview.emergentagent.com")
+
 def test_llm_budget():
     """Simple test to check LLM budget status"""
     print("🔍 Testing Emergent LLM Key Budget Status")
     print("=" * 50)
     
     # Test with quick evaluation (faster than full evaluation)
-    url = "https://aiagent-estate.preview.emergentagent.com/api/evaluate-quick"
+    url = client.url("evaluate-quick")
     
     test_data = {
         "beds": 2,
@@ -28,10 +32,9 @@ def test_llm_budget():
     
     try:
         start_time = time.time()
-        response = requests.post(
-            url, 
-            json=test_data, 
-            headers={'Content-Type': 'application/json'},
+        response = client.post(
+            "evaluate-quick",
+            json=test_data,
             timeout=60
         )
         end_time = time.time()
@@ -105,7 +108,7 @@ def test_no_photos_handling():
     # Use existing property ID
     try:
         # Get existing properties
-        response = requests.get("https://aiagent-estate.preview.emergentagent.com/api/properties")
+        response = client.get("properties")
         if response.status_code == 200:
             properties = response.json()
             if properties:
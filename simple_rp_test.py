@@ -4,16 +4,17 @@ Simple test to verify RP Data functionality is working
 Uses local backend connection to avoid network timeouts
 """
 
-import requests
 import json
 import time
 
+from api_client import get_client
+
 def test_rp_data_functionality():
     """Test RP Data functionality using local backend"""
     
     # Use local backend URL
     base_url = "http://localhost:8001"
-    api_url = f"{base_url}/api"
+    client = get_client(base_url)
     
     print("🧪 Testing RP Data Functionality (Local Backend)")
     print("=" * 50)
@@ -33,7 +34,7 @@ def test_rp_data_functionality():
     }
     
     try:
-        response = requests.post(f"{api_url}/properties", json=property_data, timeout=10)
+        response = client.post("properties", json=property_data, timeout=10)
         if response.status_code == 200:
             property_id = response.json()['id']
             print(f"   ✅ Property created: {property_id}")
@@ -51,7 +52,7 @@ def test_rp_data_functionality():
     }
     
     try:
-        response = requests.put(f"{api_url}/properties/{property_id}/update-rp-data", json=rp_data, timeout=10)
+        response = client.put(f"properties/{property_id}/update-rp-data", json=rp_data, timeout=10)
         if response.status_code == 200:
             print(f"   ✅ RP Data added successfully")
         else:
@@ -64,7 +65,7 @@ def test_rp_data_functionality():
     # Test 3: Check status endpoint
     print("3. Testing status endpoint...")
     try:
-        response = requests.get(f"{api_url}/properties/{property_id}/evaluation-status", timeout=10)
+        response = client.get(f"properties/{property_id}/evaluation-status", timeout=10)
         if response.status_code == 200:
             status_data = response.json()
             print(f"   ✅ Status endpoint working")
@@ -90,7 +91,7 @@ def test_rp_data_functionality():
     }
     
     try:
-        response = requests.post(f"{api_url}/evaluate-quick", json=quick_data, timeout=30)
+        response = client.post("evaluate-quick", json=quick_data, timeout=30)
         if response.status_code == 200:
             result = response.json()
             if result.get('success'):